@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Warm the redirect cache and start background jobs in each worker process
+# on its first request, never at import time (safe under gunicorn --preload)
+from links.startup import start_worker_on_first_request  # noqa: E402
+
+start_worker_on_first_request()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'links.throttling.LoadSheddingMiddleware',
+    'links.profiling.ProfilingMiddleware',
+    'links.profiling.QueryCountMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,6 +93,28 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/ref/settings/#caches
+# Idempotency keys and the 'cache' click dedup backend must be visible to
+# every worker: with more than one process set LINKS_CACHE_REDIS_URL, e.g.
+# redis://localhost:6379/1. The LocMem fallback is per process (links.W001/W002).
+
+LINKS_CACHE_REDIS_URL = os.environ.get('LINKS_CACHE_REDIS_URL') or None
+if LINKS_CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': LINKS_CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -136,7 +162,14 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    'DEFAULT_RENDERER_CLASSES': [
+        'links.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'links.throttling.TokenBucketThrottle',
+    ],
 }
 
 # CORS settings
@@ -147,4 +180,134 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
 ]
 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# Links app settings
+LINKS_REDIRECT_CACHE_SIZE = 10000
+LINKS_REDIRECT_CACHE_TTL = 60  # seconds a cached link is served before it is reloaded; 0 = until invalidated
+LINKS_CACHE_INVALIDATION_BACKEND = 'local'  # 'redis' drops edited links from every worker's cache at once
+LINKS_CACHE_INVALIDATION_REDIS_URL = 'redis://localhost:6379/0'
+LINKS_WARMUP_ON_START = True
+LINKS_WARMUP_LIMIT = 1000
+LINKS_WARMUP_TIME_BUDGET = 2.0
+LINKS_FAST_RENDERING = True
+LINKS_CLICK_STREAM_BACKEND = 'local'  # 'local' or 'redis' for cross-worker fan-out
+LINKS_CLICK_STREAM_REDIS_URL = 'redis://localhost:6379/0'
+LINKS_CLICK_STREAM_QUEUE_SIZE = 100
+LINKS_CLICK_STREAM_HEARTBEAT = 15.0
+
+# Sharding: database aliases holding links and clicks (see links.sharding).
+# Extra aliases default to local SQLite files, e.g. LINKS_SHARDS=default,shard_1
+LINKS_SHARDS = [alias.strip() for alias in os.environ.get('LINKS_SHARDS', 'default').split(',') if alias.strip()]
+LINKS_SHARD_MAP = None  # [(first_bucket, last_bucket, alias), ...]; None splits evenly
+for _alias in LINKS_SHARDS:
+    DATABASES.setdefault(_alias, {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_{_alias}.sqlite3',
+    })
+DATABASE_ROUTERS = ['links.routers.ShardRouter']
+
+LINKS_BOT_SIGNATURES_EXTRA = []  # extra user-agent substrings treated as bots
+LINKS_BOT_UA_CACHE_SIZE = 4096
+LINKS_BOT_EMPTY_USER_AGENT = False  # count clicks without a User-Agent header as bots
+
+LINKS_GEOIP_DATABASE = None  # path to a start_ip,end_ip,country[,asn] CSV
+
+LINKS_CLICK_DEDUP_WINDOW = 10  # seconds; 0 disables repeat-click suppression
+LINKS_CLICK_DEDUP_BACKEND = 'memory'  # 'memory' (per process) or 'cache' (shared; needs LINKS_CACHE_REDIS_URL)
+LINKS_CLICK_DEDUP_MAX_KEYS = 100000
+
+# Rate limiting (token buckets per client IP and endpoint scope) and load shedding
+LINKS_RATE_LIMITS = {
+    'shorten': {'rate': 1.0, 'burst': 20},
+    'redirect': {'rate': 50.0, 'burst': 200},
+    'analytics': {'rate': 5.0, 'burst': 50},
+}
+LINKS_LATENCY_SLO_MS = 250
+LINKS_LOW_PRIORITY_VIEWS = [
+    'shorten', 'links-list', 'analytics', 'analytics-batch', 'analytics-geo', 'analytics-timeseries',
+    'link-qr', 'campaigns-list', 'campaign-stats',
+]
+LINKS_UNMEASURED_VIEWS = ['analytics-stream']
+LINKS_LOW_PRIORITY_MAX_CONCURRENCY = 100
+LINKS_RATE_LIMIT_REDIS_URL = None  # e.g. 'redis://localhost:6379/0' to share buckets between workers
+LINKS_RATE_LIMIT_MAX_KEYS = 100000  # buckets kept per process without Redis
+LINKS_TRUSTED_PROXY_COUNT = 0  # reverse proxies appending to X-Forwarded-For; 0 = use the socket address
+
+LINKS_IDEMPOTENCY_TTL = 86400  # seconds a shorten response is replayable
+LINKS_IDEMPOTENCY_WAIT = 5.0  # seconds a duplicate waits for an in-flight original
+LINKS_IDEMPOTENCY_PENDING_TTL = 120  # seconds an in-flight marker lives; keep above the server's request timeout
+
+LINKS_EXPIRY_SWEEP_BATCH_SIZE = 500  # links/clicks per sweeper select and delete
+
+# Periodic jobs, coordinated across processes by lease rows. Run them with
+# `manage.py run_scheduler`; True also starts a scheduler in every web worker
+LINKS_SCHEDULER_ENABLED = False
+LINKS_SCHEDULER_TICK = 5.0  # seconds between checks for due jobs
+LINKS_SCHEDULER_WORKERS = 2
+LINKS_EXPIRY_SWEEP_INTERVAL = 300  # seconds; 0 disables the job
+
+# Opt-in sampling profiler (collapsed stacks per URL name, see links.profiling)
+LINKS_PROFILING_ENABLED = False
+LINKS_PROFILING_SAMPLE_RATE = 100  # profile 1 in N requests per URL name
+LINKS_PROFILING_VIEWS = ['redirect', 'analytics', 'links-list', 'shorten']
+LINKS_PROFILING_INTERVAL_MS = 5
+LINKS_PROFILING_TRACEMALLOC = False  # also record allocated bytes (slower)
+LINKS_PROFILING_DIR = BASE_DIR / 'profiles'
+LINKS_PROFILING_MAX_STACKS = 5000  # distinct stacks per profile file
+LINKS_PROFILING_RETENTION = 86400  # seconds before a profile file is deleted
+LINKS_PROFILING_FLUSH_EVERY = 10  # sampled requests between file writes
+
+LINKS_QUERY_COUNT_HEADER = False  # add X-Query-Count to responses (load testing only)
+
+# Columnar click segments for analytics (requires NumPy; None disables)
+LINKS_SEGMENT_DIR = BASE_DIR / 'segments'
+LINKS_SEGMENT_ROWS = 250000  # clicks per segment
+LINKS_SEGMENT_COMPACTION_DELAY = 300  # seconds a click ages before compaction
+LINKS_SEGMENT_COMPACTION_INTERVAL = 600  # seconds; 0 disables the job
+
+# Per-link routing rules (see links.routing)
+LINKS_ROUTING_CACHE_SIZE = 10000  # links whose compiled rules are kept per process
+LINKS_ROUTING_MAX_RULES = 50  # rules accepted per link
+
+# QR codes for short links (requires segno; None disables the file cache)
+LINKS_QR_CACHE_DIR = BASE_DIR / 'qrcodes'
+LINKS_QR_CACHE_MAX_BYTES = 256 * 1024 * 1024  # least recently used files are deleted above this
+LINKS_QR_MAX_AGE = 86400  # Cache-Control max-age in seconds
+
+# Destination health checks (requires aiohttp, see links.health)
+LINKS_HEALTH_CHECK_INTERVAL = 3600  # seconds; 0 disables the job
+LINKS_HEALTH_CHECK_TTL = 86400  # seconds before a link is checked again
+LINKS_HEALTH_CHECK_BATCH_SIZE = 500  # links per select/probe/update round
+LINKS_HEALTH_CHECK_MAX_LINKS = 5000  # links per job run; 0 = every due link
+LINKS_HEALTH_CHECK_CONCURRENCY = 100  # open connections in total
+LINKS_HEALTH_CHECK_PER_HOST = 4  # open connections per destination host
+LINKS_HEALTH_CHECK_TIMEOUT = 10.0  # seconds per URL, redirects included
+LINKS_HEALTH_CHECK_ALLOW_PRIVATE = False  # also probe private, loopback and link-local addresses
+LINKS_HEALTH_CHECK_USER_AGENT = 'links-health-checker/1.0'
+
+LINKS_CAMPAIGN_DEFAULT_DAYS = 30  # days in a campaign report without ?start=
+
+# Bulk link export/import (Parquet requires pyarrow, see links.transfer)
+LINKS_EXPORT_CHUNK_SIZE = 2000  # rows per database round trip and encoded piece
+LINKS_IMPORT_BATCH_SIZE = 5000  # rows per bulk insert
+
+# Click-rate spike detection, per process (see links.anomaly)
+LINKS_ANOMALY_ENABLED = True
+LINKS_ANOMALY_BUCKET_SECONDS = 10  # width of a counting bucket
+LINKS_ANOMALY_HALF_LIFE = 600  # seconds for a bucket's weight in the average to halve
+LINKS_ANOMALY_THRESHOLD = 4.0  # standard deviations above the average that count as a spike
+LINKS_ANOMALY_MIN_CLICKS = 20  # clicks a bucket needs before it can be flagged
+LINKS_ANOMALY_WARMUP_BUCKETS = 6  # buckets a new link only builds its baseline for
+LINKS_ANOMALY_IDLE_TIMEOUT = 3600  # seconds without clicks before a link is forgotten
+LINKS_ANOMALY_MAX_LINKS = 100000  # links tracked at once
+LINKS_ANOMALY_HISTORY = 100  # recent anomalies kept for api/anomalies/
+
+# Branded short-link domains (see links.domains)
+LINKS_DOMAIN_CACHE_TTL = 60  # seconds before a process reloads its host -> domain snapshot
+
+# Analytics result cache (see links.cache.StaleWhileRevalidateCache)
+LINKS_ANALYTICS_CACHE_SIZE = 1000  # link/filter combinations whose click details are kept; 0 disables
+LINKS_ANALYTICS_CACHE_MAX_ROWS = 10000  # click details per cached result; larger results are computed per request
+LINKS_ANALYTICS_CACHE_MAX_STALE = 60  # seconds outdated details are served while they are refreshed
+LINKS_ANALYTICS_REFRESH_WORKERS = 2  # background refresh threads per process
@@ -39,6 +39,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'links.throttling.LoadSheddingMiddleware',
+    'links.profiling.ProfilingMiddleware',
+    'links.profiling.QueryCountMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,6 +83,28 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/ref/settings/#caches
+# Idempotency keys and the 'cache' click dedup backend must be visible to
+# every worker: with more than one process set LINKS_CACHE_REDIS_URL, e.g.
+# redis://localhost:6379/1. The LocMem fallback is per process (links.W001/W002).
+
+LINKS_CACHE_REDIS_URL = os.environ.get('LINKS_CACHE_REDIS_URL') or None
+if LINKS_CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': LINKS_CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -129,11 +154,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', '10')),
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'links.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'links.throttling.TokenBucketThrottle',
+    ],
 }
 
 # CORS settings
@@ -148,3 +176,131 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+
+# Links app settings
+LINKS_REDIRECT_CACHE_SIZE = int(os.environ.get('LINKS_REDIRECT_CACHE_SIZE', '10000'))
+LINKS_REDIRECT_CACHE_TTL = float(os.environ.get('LINKS_REDIRECT_CACHE_TTL', '60'))
+LINKS_CACHE_INVALIDATION_BACKEND = os.environ.get('LINKS_CACHE_INVALIDATION_BACKEND', 'local')
+LINKS_CACHE_INVALIDATION_REDIS_URL = os.environ.get('LINKS_CACHE_INVALIDATION_REDIS_URL', 'redis://localhost:6379/0')
+LINKS_WARMUP_ON_START = os.environ.get('LINKS_WARMUP_ON_START', 'True').lower() == 'true'
+LINKS_WARMUP_LIMIT = int(os.environ.get('LINKS_WARMUP_LIMIT', '1000'))
+LINKS_WARMUP_TIME_BUDGET = float(os.environ.get('LINKS_WARMUP_TIME_BUDGET', '2.0'))
+LINKS_FAST_RENDERING = os.environ.get('LINKS_FAST_RENDERING', 'True').lower() == 'true'
+LINKS_CLICK_STREAM_BACKEND = os.environ.get('LINKS_CLICK_STREAM_BACKEND', 'local')
+LINKS_CLICK_STREAM_REDIS_URL = os.environ.get('LINKS_CLICK_STREAM_REDIS_URL', 'redis://localhost:6379/0')
+LINKS_CLICK_STREAM_QUEUE_SIZE = int(os.environ.get('LINKS_CLICK_STREAM_QUEUE_SIZE', '100'))
+LINKS_CLICK_STREAM_HEARTBEAT = float(os.environ.get('LINKS_CLICK_STREAM_HEARTBEAT', '15.0'))
+
+# Sharding: database aliases holding links and clicks (see links.sharding).
+# Extra aliases default to local SQLite files, e.g. LINKS_SHARDS=default,shard_1
+LINKS_SHARDS = [alias.strip() for alias in os.environ.get('LINKS_SHARDS', 'default').split(',') if alias.strip()]
+LINKS_SHARD_MAP = None  # [(first_bucket, last_bucket, alias), ...]; None splits evenly
+for _alias in LINKS_SHARDS:
+    DATABASES.setdefault(_alias, {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_{_alias}.sqlite3',
+    })
+DATABASE_ROUTERS = ['links.routers.ShardRouter']
+
+LINKS_BOT_SIGNATURES_EXTRA = [s.strip() for s in os.environ.get('LINKS_BOT_SIGNATURES_EXTRA', '').split(',') if s.strip()]
+LINKS_BOT_UA_CACHE_SIZE = int(os.environ.get('LINKS_BOT_UA_CACHE_SIZE', '4096'))
+LINKS_BOT_EMPTY_USER_AGENT = os.environ.get('LINKS_BOT_EMPTY_USER_AGENT', 'False').lower() == 'true'
+
+LINKS_GEOIP_DATABASE = os.environ.get('LINKS_GEOIP_DATABASE') or None
+
+LINKS_CLICK_DEDUP_WINDOW = float(os.environ.get('LINKS_CLICK_DEDUP_WINDOW', '10'))
+LINKS_CLICK_DEDUP_BACKEND = os.environ.get('LINKS_CLICK_DEDUP_BACKEND', 'memory')
+LINKS_CLICK_DEDUP_MAX_KEYS = int(os.environ.get('LINKS_CLICK_DEDUP_MAX_KEYS', '100000'))
+
+# Rate limiting (token buckets per client IP and endpoint scope) and load shedding
+LINKS_RATE_LIMITS = {
+    'shorten': {
+        'rate': float(os.environ.get('LINKS_SHORTEN_RATE', '1.0')),
+        'burst': int(os.environ.get('LINKS_SHORTEN_BURST', '20')),
+    },
+    'redirect': {
+        'rate': float(os.environ.get('LINKS_REDIRECT_RATE', '50.0')),
+        'burst': int(os.environ.get('LINKS_REDIRECT_BURST', '200')),
+    },
+    'analytics': {
+        'rate': float(os.environ.get('LINKS_ANALYTICS_RATE', '5.0')),
+        'burst': int(os.environ.get('LINKS_ANALYTICS_BURST', '50')),
+    },
+}
+LINKS_LATENCY_SLO_MS = int(os.environ.get('LINKS_LATENCY_SLO_MS', '250'))
+LINKS_LOW_PRIORITY_VIEWS = [
+    'shorten', 'links-list', 'analytics', 'analytics-batch', 'analytics-geo', 'analytics-timeseries',
+    'link-qr', 'campaigns-list', 'campaign-stats',
+]
+LINKS_UNMEASURED_VIEWS = ['analytics-stream']
+LINKS_LOW_PRIORITY_MAX_CONCURRENCY = int(os.environ.get('LINKS_LOW_PRIORITY_MAX_CONCURRENCY', '100'))
+LINKS_RATE_LIMIT_REDIS_URL = os.environ.get('LINKS_RATE_LIMIT_REDIS_URL') or None
+LINKS_RATE_LIMIT_MAX_KEYS = int(os.environ.get('LINKS_RATE_LIMIT_MAX_KEYS', '100000'))
+LINKS_TRUSTED_PROXY_COUNT = int(os.environ.get('LINKS_TRUSTED_PROXY_COUNT', '0'))
+
+LINKS_IDEMPOTENCY_TTL = int(os.environ.get('LINKS_IDEMPOTENCY_TTL', '86400'))
+LINKS_IDEMPOTENCY_WAIT = float(os.environ.get('LINKS_IDEMPOTENCY_WAIT', '5.0'))
+LINKS_IDEMPOTENCY_PENDING_TTL = int(os.environ.get('LINKS_IDEMPOTENCY_PENDING_TTL', '120'))
+
+LINKS_EXPIRY_SWEEP_BATCH_SIZE = int(os.environ.get('LINKS_EXPIRY_SWEEP_BATCH_SIZE', '500'))
+
+LINKS_SCHEDULER_ENABLED = os.environ.get('LINKS_SCHEDULER_ENABLED', 'False').lower() == 'true'
+LINKS_SCHEDULER_TICK = float(os.environ.get('LINKS_SCHEDULER_TICK', '5.0'))
+LINKS_SCHEDULER_WORKERS = int(os.environ.get('LINKS_SCHEDULER_WORKERS', '2'))
+LINKS_EXPIRY_SWEEP_INTERVAL = int(os.environ.get('LINKS_EXPIRY_SWEEP_INTERVAL', '300'))
+
+LINKS_PROFILING_ENABLED = os.environ.get('LINKS_PROFILING_ENABLED', 'False').lower() == 'true'
+LINKS_PROFILING_SAMPLE_RATE = int(os.environ.get('LINKS_PROFILING_SAMPLE_RATE', '100'))
+LINKS_PROFILING_VIEWS = ['redirect', 'analytics', 'links-list', 'shorten']
+LINKS_PROFILING_INTERVAL_MS = int(os.environ.get('LINKS_PROFILING_INTERVAL_MS', '5'))
+LINKS_PROFILING_TRACEMALLOC = os.environ.get('LINKS_PROFILING_TRACEMALLOC', 'False').lower() == 'true'
+LINKS_PROFILING_DIR = os.environ.get('LINKS_PROFILING_DIR', str(BASE_DIR / 'profiles'))
+LINKS_PROFILING_MAX_STACKS = int(os.environ.get('LINKS_PROFILING_MAX_STACKS', '5000'))
+LINKS_PROFILING_RETENTION = int(os.environ.get('LINKS_PROFILING_RETENTION', '86400'))
+LINKS_PROFILING_FLUSH_EVERY = int(os.environ.get('LINKS_PROFILING_FLUSH_EVERY', '10'))
+
+LINKS_QUERY_COUNT_HEADER = os.environ.get('LINKS_QUERY_COUNT_HEADER', 'False').lower() == 'true'
+
+LINKS_SEGMENT_DIR = os.environ.get('LINKS_SEGMENT_DIR', str(BASE_DIR / 'segments')) or None
+LINKS_SEGMENT_ROWS = int(os.environ.get('LINKS_SEGMENT_ROWS', '250000'))
+LINKS_SEGMENT_COMPACTION_DELAY = int(os.environ.get('LINKS_SEGMENT_COMPACTION_DELAY', '300'))
+LINKS_SEGMENT_COMPACTION_INTERVAL = int(os.environ.get('LINKS_SEGMENT_COMPACTION_INTERVAL', '600'))
+
+LINKS_ROUTING_CACHE_SIZE = int(os.environ.get('LINKS_ROUTING_CACHE_SIZE', '10000'))
+LINKS_ROUTING_MAX_RULES = int(os.environ.get('LINKS_ROUTING_MAX_RULES', '50'))
+
+LINKS_QR_CACHE_DIR = os.environ.get('LINKS_QR_CACHE_DIR', str(BASE_DIR / 'qrcodes')) or None
+LINKS_QR_CACHE_MAX_BYTES = int(os.environ.get('LINKS_QR_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+LINKS_QR_MAX_AGE = int(os.environ.get('LINKS_QR_MAX_AGE', '86400'))
+
+LINKS_HEALTH_CHECK_INTERVAL = int(os.environ.get('LINKS_HEALTH_CHECK_INTERVAL', '3600'))
+LINKS_HEALTH_CHECK_TTL = int(os.environ.get('LINKS_HEALTH_CHECK_TTL', '86400'))
+LINKS_HEALTH_CHECK_BATCH_SIZE = int(os.environ.get('LINKS_HEALTH_CHECK_BATCH_SIZE', '500'))
+LINKS_HEALTH_CHECK_MAX_LINKS = int(os.environ.get('LINKS_HEALTH_CHECK_MAX_LINKS', '5000'))
+LINKS_HEALTH_CHECK_CONCURRENCY = int(os.environ.get('LINKS_HEALTH_CHECK_CONCURRENCY', '100'))
+LINKS_HEALTH_CHECK_PER_HOST = int(os.environ.get('LINKS_HEALTH_CHECK_PER_HOST', '4'))
+LINKS_HEALTH_CHECK_TIMEOUT = float(os.environ.get('LINKS_HEALTH_CHECK_TIMEOUT', '10.0'))
+LINKS_HEALTH_CHECK_ALLOW_PRIVATE = os.environ.get('LINKS_HEALTH_CHECK_ALLOW_PRIVATE', 'False').lower() == 'true'
+LINKS_HEALTH_CHECK_USER_AGENT = os.environ.get('LINKS_HEALTH_CHECK_USER_AGENT', 'links-health-checker/1.0')
+
+LINKS_CAMPAIGN_DEFAULT_DAYS = int(os.environ.get('LINKS_CAMPAIGN_DEFAULT_DAYS', '30'))
+
+LINKS_EXPORT_CHUNK_SIZE = int(os.environ.get('LINKS_EXPORT_CHUNK_SIZE', '2000'))
+LINKS_IMPORT_BATCH_SIZE = int(os.environ.get('LINKS_IMPORT_BATCH_SIZE', '5000'))
+
+LINKS_ANOMALY_ENABLED = os.environ.get('LINKS_ANOMALY_ENABLED', 'True').lower() == 'true'
+LINKS_ANOMALY_BUCKET_SECONDS = float(os.environ.get('LINKS_ANOMALY_BUCKET_SECONDS', '10'))
+LINKS_ANOMALY_HALF_LIFE = float(os.environ.get('LINKS_ANOMALY_HALF_LIFE', '600'))
+LINKS_ANOMALY_THRESHOLD = float(os.environ.get('LINKS_ANOMALY_THRESHOLD', '4.0'))
+LINKS_ANOMALY_MIN_CLICKS = int(os.environ.get('LINKS_ANOMALY_MIN_CLICKS', '20'))
+LINKS_ANOMALY_WARMUP_BUCKETS = int(os.environ.get('LINKS_ANOMALY_WARMUP_BUCKETS', '6'))
+LINKS_ANOMALY_IDLE_TIMEOUT = float(os.environ.get('LINKS_ANOMALY_IDLE_TIMEOUT', '3600'))
+LINKS_ANOMALY_MAX_LINKS = int(os.environ.get('LINKS_ANOMALY_MAX_LINKS', '100000'))
+LINKS_ANOMALY_HISTORY = int(os.environ.get('LINKS_ANOMALY_HISTORY', '100'))
+
+LINKS_DOMAIN_CACHE_TTL = float(os.environ.get('LINKS_DOMAIN_CACHE_TTL', '60'))
+
+LINKS_ANALYTICS_CACHE_SIZE = int(os.environ.get('LINKS_ANALYTICS_CACHE_SIZE', '1000'))
+LINKS_ANALYTICS_CACHE_MAX_ROWS = int(os.environ.get('LINKS_ANALYTICS_CACHE_MAX_ROWS', '10000'))
+LINKS_ANALYTICS_CACHE_MAX_STALE = float(os.environ.get('LINKS_ANALYTICS_CACHE_MAX_STALE', '60'))
+LINKS_ANALYTICS_REFRESH_WORKERS = int(os.environ.get('LINKS_ANALYTICS_REFRESH_WORKERS', '2'))
@@ -1,10 +1,83 @@
 """
 Admin configuration for links app.
 Follows Single Responsibility Principle by organizing admin interfaces.
+Changelists are tuned for very large tables: no per-row queries, no
+unbounded COUNT(*) and only index-backed filters and searches.
 """
 
 from django.contrib import admin
-from .models import Link, Click
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .domains import get_domain_resolver, normalize_host
+from .models import Campaign, Domain, Link, Click, RoutingRule, ScheduledJob
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids exact COUNT(*) over huge tables.
+    Unfiltered PostgreSQL querysets use the planner's row estimate;
+    everything else is counted up to MAX_COUNT rows.
+    """
+    MAX_COUNT = 10000
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return int(row[0])
+        
+        return queryset.order_by()[:self.MAX_COUNT].count()
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    List filter rendered as a text box instead of one entry per value.
+    Keeps the sidebar constant-size however many related rows exist.
+    """
+    template = 'admin/links/input_filter.html'
+    
+    def lookups(self, request, model_admin):
+        # A single dummy lookup so the filter is rendered
+        return ((None, None),)
+    
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = (
+            (key, value)
+            for key, values in changelist.get_filters_params().items()
+            for value in values
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+
+class LinkSlugFilter(InputFilter):
+    """Filter clicks by the exact slug of their link, on any domain (slug index lookup)."""
+    title = 'link slug'
+    parameter_name = 'slug'
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(short_url__slug=self.value().strip())
+        return queryset
+
+
+class RoutingRuleInline(admin.TabularInline):
+    """Routing rules edited on the link page, in evaluation order."""
+    model = RoutingRule
+    fields = ('priority', 'device', 'country', 'referrer', 'destination', 'weight')
+    ordering = ('priority', 'id')
+    extra = 0
 
 
 @admin.register(Link)
@@ -13,20 +86,46 @@ class LinkAdmin(admin.ModelAdmin):
     Admin interface for Link model.
     Provides organized display and filtering options.
     """
-    list_display = ('slug', 'original_url', 'click_count', 'created_at')
+    list_display = (
+        'slug', 'domain_id', 'original_url', 'click_count', 'bot_click_count', 'raw_click_count', 'created_at',
+        'expires_at', 'health_status',
+    )
     list_filter = ('created_at',)
-    search_fields = ('slug', 'original_url')
-    readonly_fields = ('slug', 'created_at', 'click_count')
+    search_fields = ('^slug',)
+    readonly_fields = (
+        'slug', 'domain_id', 'created_at', 'click_count', 'bot_click_count', 'raw_click_count',
+        'health_status', 'health_code', 'last_checked_at',
+    )
     ordering = ('-created_at',)
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     
     fieldsets = (
         ('Link Information', {
-            'fields': ('slug', 'original_url', 'click_count')
+            'fields': ('slug', 'domain_id', 'original_url', 'click_count', 'bot_click_count', 'raw_click_count')
+        }),
+        ('Limits', {
+            'fields': ('expires_at', 'max_clicks')
+        }),
+        ('Campaign', {
+            'fields': ('campaign_id',)
+        }),
+        ('Health', {
+            'fields': ('health_status', 'health_code', 'last_checked_at')
         }),
         ('Timestamps', {
             'fields': ('created_at',)
         }),
     )
+    inlines = (RoutingRuleInline,)
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if any(formset.has_changed() for formset in formsets):
+            from .services import get_routing_service
+            get_routing_service().rules_changed(form.instance)
 
 
 @admin.register(Click)
@@ -35,17 +134,80 @@ class ClickAdmin(admin.ModelAdmin):
     Admin interface for Click model.
     Provides organized display and filtering options.
     """
-    list_display = ('short_url', 'ip_address', 'timestamp', 'referrer')
-    list_filter = ('timestamp', 'short_url')
-    search_fields = ('ip_address', 'user_agent', 'short_url__slug')
+    list_display = ('short_url', 'ip_address', 'country', 'timestamp', 'referrer', 'is_bot')
+    list_select_related = ('short_url',)
+    list_filter = (LinkSlugFilter, 'is_bot')
+    search_fields = ('=ip_address', '^short_url__slug')
+    autocomplete_fields = ('short_url',)
     readonly_fields = ('timestamp',)
     ordering = ('-timestamp',)
+    date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     
     fieldsets = (
         ('Click Information', {
-            'fields': ('short_url', 'ip_address', 'user_agent', 'referrer')
+            'fields': ('short_url', 'ip_address', 'country', 'asn', 'user_agent', 'referrer', 'is_bot')
         }),
         ('Timestamps', {
             'fields': ('timestamp',)
         }),
     )
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    """
+    Admin interface for Campaign model.
+    Counters are maintained by the click path and shown read-only.
+    """
+    list_display = ('name', 'click_count', 'bot_click_count', 'raw_click_count', 'created_at')
+    search_fields = ('^name',)
+    readonly_fields = ('created_at', 'click_count', 'bot_click_count', 'raw_click_count')
+    ordering = ('name',)
+
+
+@admin.register(Domain)
+class DomainAdmin(admin.ModelAdmin):
+    """
+    Admin interface for Domain model.
+    Changes take effect at once in this process and within
+    LINKS_DOMAIN_CACHE_TTL seconds in the others.
+    """
+    list_display = ('host', 'id', 'created_at')
+    search_fields = ('^host',)
+    readonly_fields = ('created_at',)
+    ordering = ('host',)
+    
+    def save_model(self, request, obj, form, change):
+        obj.host = normalize_host(obj.host)
+        super().save_model(request, obj, form, change)
+        get_domain_resolver().invalidate()
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        get_domain_resolver().invalidate()
+    
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        get_domain_resolver().invalidate()
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    """
+    Read-only view of periodic jobs with their last-run duration and lag.
+    Rows are maintained by links.scheduler.
+    """
+    list_display = (
+        'name', 'next_run_at', 'last_started_at', 'last_duration', 'last_lag', 'run_count', 'owner', 'last_error',
+    )
+    ordering = ('name',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
@@ -0,0 +1,299 @@
+"""
+Streaming detection of click-rate spikes per link.
+Follows Single Responsibility Principle by keeping traffic anomaly detection out of the click path.
+
+Clicks are counted into fixed, epoch-aligned buckets per link. When a
+bucket closes its count updates an exponentially weighted moving average
+and variance of clicks per bucket (empty buckets in between count as
+zero), so every active link costs a handful of numbers however long it has
+been clicked. A click is flagged as soon as the open bucket's count exceeds
+the average by `threshold` standard deviations (at least the Poisson
+deviation of the average, and never fewer than `min_clicks` clicks), at most
+once per bucket and link. A link's first `warmup_buckets` buckets only build
+its baseline: a new link starts from an average of zero, so its launch
+traffic would otherwise look like a spike.
+
+Links are kept in least-recently-clicked order, so links idle for longer
+than `idle_timeout` (by then their average has decayed to nothing) are
+dropped from the front in O(1) as new clicks arrive. The detector reads no
+database tables. State is per process: with several workers each one sees
+its share of the traffic, which scales counts but not z-scores.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone as dt_timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+
+from .utils import format_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Anomaly(NamedTuple):
+    """A click-rate spike on one link."""
+    slug: str  # Link.cache_key, which is the bare slug on the primary domain
+    detected_at: float  # Unix time
+    bucket_start: float  # Unix time the spiking bucket opened
+    clicks: int  # clicks in the bucket when it was flagged
+    expected: float  # average clicks per bucket
+    score: float  # standard deviations above the average
+    bot_clicks: int
+    repeat_clicks: int
+
+    def as_dict(self) -> Dict:
+        """JSON-ready representation."""
+        return {
+            "slug": self.slug,
+            "detected_at": format_datetime(datetime.fromtimestamp(self.detected_at, tz=dt_timezone.utc)),
+            "bucket_start": format_datetime(datetime.fromtimestamp(self.bucket_start, tz=dt_timezone.utc)),
+            "clicks": self.clicks,
+            "expected": round(self.expected, 2),
+            "score": round(self.score, 2),
+            "bot_clicks": self.bot_clicks,
+            "repeat_clicks": self.repeat_clicks,
+        }
+
+
+class _RateState:
+    """Per-link counters; fixed size."""
+    __slots__ = ('bucket', 'clicks', 'bots', 'repeats', 'mean', 'variance', 'buckets_seen', 'flagged', 'last_seen')
+
+    def __init__(self, bucket: int, now: float):
+        self.bucket = bucket
+        self.clicks = 0
+        self.bots = 0
+        self.repeats = 0
+        self.mean = 0.0
+        self.variance = 0.0
+        self.buckets_seen = 0
+        self.flagged = False
+        self.last_seen = now
+
+
+class RateAnomalyDetector:
+    """
+    Per-link EWMA click-rate tracker flagging spikes as they happen.
+    Thread-safe; every observation is O(1).
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: float = 10,
+        half_life: float = 600,
+        threshold: float = 4.0,
+        min_clicks: int = 20,
+        warmup_buckets: int = 6,
+        idle_timeout: float = 3600,
+        max_links: int = 100000,
+        history: int = 100,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize RateAnomalyDetector.
+
+        Args:
+            bucket_seconds: Width of a counting bucket
+            half_life: Seconds after which an observation weighs half as much in the average
+            threshold: Standard deviations above the average that count as a spike
+            min_clicks: Clicks a bucket needs before it can be flagged
+            warmup_buckets: Buckets a link is tracked for before it can be flagged
+            idle_timeout: Seconds without clicks after which a link is forgotten
+            max_links: Links tracked at once; the least recently clicked are forgotten first
+            history: Recent anomalies kept for recent()
+            clock: Wall-clock time source
+        """
+        self.bucket_seconds = bucket_seconds
+        self.threshold = threshold
+        self.min_clicks = min_clicks
+        self.warmup_buckets = warmup_buckets
+        self.idle_timeout = idle_timeout
+        self.max_links = max_links
+        # Weight of the newest bucket for the given half-life
+        self.alpha = 1 - 0.5 ** (bucket_seconds / half_life)
+        self._clock = clock
+        self._states: 'OrderedDict[str, _RateState]' = OrderedDict()
+        self._recent = deque(maxlen=history)
+        self._listeners: List[Callable[[Anomaly], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Anomaly], None]) -> None:
+        """
+        Call `listener` with every anomaly, after it is logged.
+        Listeners run on the click path and should return quickly.
+
+        Args:
+            listener: Callable receiving an Anomaly
+        """
+        self._listeners.append(listener)
+
+    def observe(self, slug: str, is_bot: bool = False, repeat: bool = False) -> Optional[Anomaly]:
+        """
+        Count one click and check its link for a spike.
+
+        Args:
+            slug: The link's cache_key
+            is_bot: The click came from a bot or crawler
+            repeat: The click was a suppressed repeat
+
+        Returns:
+            The Anomaly if this click made the link's current bucket spike, otherwise None
+        """
+        now = self._clock()
+        bucket = int(now // self.bucket_seconds)
+        anomaly = None
+        with self._lock:
+            state = self._states.get(slug)
+            if state is None:
+                state = self._states[slug] = _RateState(bucket, now)
+            else:
+                self._states.move_to_end(slug)
+                if bucket > state.bucket:
+                    self._close_buckets(state, bucket)
+            state.last_seen = now
+            state.clicks += 1
+            state.bots += is_bot
+            state.repeats += repeat
+
+            if (
+                not state.flagged
+                and state.clicks >= self.min_clicks
+                and state.buckets_seen >= self.warmup_buckets
+            ):
+                deviation = max(math.sqrt(state.variance), math.sqrt(state.mean), 1.0)
+                score = (state.clicks - state.mean) / deviation
+                if score > self.threshold:
+                    state.flagged = True
+                    anomaly = Anomaly(
+                        slug, now, bucket * self.bucket_seconds, state.clicks, state.mean, score,
+                        state.bots, state.repeats,
+                    )
+                    self._recent.append(anomaly)
+            self._evict(now)
+
+        if anomaly is not None:
+            self._notify(anomaly)
+        return anomaly
+
+    def _close_buckets(self, state: _RateState, bucket: int) -> None:
+        """Fold the finished bucket, then any empty ones up to `bucket`, into the averages."""
+        alpha = self.alpha
+        value = state.clicks
+        for _ in range(bucket - state.bucket):
+            # Incremental exponentially weighted mean and variance
+            delta = value - state.mean
+            state.mean += alpha * delta
+            state.variance = (1 - alpha) * (state.variance + alpha * delta * delta)
+            state.buckets_seen += 1
+            value = 0
+            if state.mean < 1e-3 and state.variance < 1e-3:
+                state.mean = state.variance = 0.0
+                break
+        state.bucket = bucket
+        state.clicks = state.bots = state.repeats = 0
+        state.flagged = False
+
+    def _evict(self, now: float) -> None:
+        states = self._states
+        while states:
+            slug, state = next(iter(states.items()))
+            if now - state.last_seen < self.idle_timeout and len(states) <= self.max_links:
+                break
+            del states[slug]
+
+    def _notify(self, anomaly: Anomaly) -> None:
+        logger.warning(
+            "Click spike on %s: %d clicks in %gs bucket, expected %.1f (%.1f sd; %d bot, %d repeat)",
+            anomaly.slug, anomaly.clicks, self.bucket_seconds, anomaly.expected, anomaly.score,
+            anomaly.bot_clicks, anomaly.repeat_clicks,
+            extra={'anomaly': anomaly._asdict()},
+        )
+        for listener in list(self._listeners):
+            try:
+                listener(anomaly)
+            except Exception:
+                logger.exception("Anomaly listener %r failed", listener)
+
+    def recent(self, slug: str = None) -> List[Anomaly]:
+        """
+        Recently detected anomalies, newest first.
+
+        Args:
+            slug: Only anomalies of this link (optional)
+
+        Returns:
+            List of Anomaly
+        """
+        with self._lock:
+            anomalies = list(self._recent)
+        anomalies.reverse()
+        if slug is not None:
+            anomalies = [anomaly for anomaly in anomalies if anomaly.slug == slug]
+        return anomalies
+
+    def rate(self, slug: str) -> Optional[Dict]:
+        """
+        Current traffic estimate for a link.
+
+        Args:
+            slug: The link's cache_key
+
+        Returns:
+            Dictionary with the open bucket's clicks and the average and
+            standard deviation of clicks per bucket, or None when the link
+            has no recent clicks in this process
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._states.get(slug)
+            if state is None or now - state.last_seen >= self.idle_timeout:
+                return None
+            bucket = int(now // self.bucket_seconds)
+            if bucket > state.bucket:
+                self._close_buckets(state, bucket)
+            return {
+                "bucket_seconds": self.bucket_seconds,
+                "current_clicks": state.clicks,
+                "expected": round(state.mean, 2),
+                "stddev": round(math.sqrt(state.variance), 2),
+                "buckets_seen": state.buckets_seen,
+            }
+
+    def __len__(self) -> int:
+        """Number of links currently tracked."""
+        return len(self._states)
+
+
+_default_detector = None
+_default_detector_lock = threading.Lock()
+
+
+def get_anomaly_detector() -> Optional[RateAnomalyDetector]:
+    """
+    Get the process-wide detector configured by LINKS_ANOMALY_* settings.
+
+    Returns:
+        RateAnomalyDetector instance, or None when LINKS_ANOMALY_ENABLED is off
+    """
+    global _default_detector
+    if not getattr(settings, 'LINKS_ANOMALY_ENABLED', True):
+        return None
+    if _default_detector is None:
+        with _default_detector_lock:
+            if _default_detector is None:
+                _default_detector = RateAnomalyDetector(
+                    bucket_seconds=getattr(settings, 'LINKS_ANOMALY_BUCKET_SECONDS', 10),
+                    half_life=getattr(settings, 'LINKS_ANOMALY_HALF_LIFE', 600),
+                    threshold=getattr(settings, 'LINKS_ANOMALY_THRESHOLD', 4.0),
+                    min_clicks=getattr(settings, 'LINKS_ANOMALY_MIN_CLICKS', 20),
+                    warmup_buckets=getattr(settings, 'LINKS_ANOMALY_WARMUP_BUCKETS', 6),
+                    idle_timeout=getattr(settings, 'LINKS_ANOMALY_IDLE_TIMEOUT', 3600),
+                    max_links=getattr(settings, 'LINKS_ANOMALY_MAX_LINKS', 100000),
+                    history=getattr(settings, 'LINKS_ANOMALY_HISTORY', 100),
+                )
+    return _default_detector
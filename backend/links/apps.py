@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class LinksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'links'
+    
+    def ready(self):
+        # Connect cache invalidation on Link edits and deletes
+        from . import signals  # noqa: F401
+        # Register the deployment checks
+        from . import checks  # noqa: F401
@@ -0,0 +1,359 @@
+"""
+In-process caching primitives for the links app.
+Follows Single Responsibility Principle by keeping cache mechanics out of services.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded least-recently-used cache.
+    Memory is bounded by the number of entries it may hold.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize LRUCache.
+
+        Args:
+            max_size: Maximum number of entries kept before evicting the oldest
+        """
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retrieve a value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove a key if present.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def is_full(self) -> bool:
+        """Return True when the cache holds max_size entries."""
+        return len(self) >= self.max_size
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+    Callers arriving while a load is in flight wait for and share its result.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        """Initialize SingleFlight with no calls in flight."""
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for key, sharing the result with concurrent callers.
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument loader
+
+        Returns:
+            Result of fn
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class RedirectCache:
+    """
+    Cache of slug -> Link used on the redirect path.
+    Misses for the same slug are coalesced so only one database query runs.
+    Entries expire after `ttl` seconds, which bounds how long a change made
+    by another process can go unnoticed if its invalidation message is lost.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize RedirectCache.
+
+        Args:
+            max_size: Maximum number of links kept in memory
+            ttl: Seconds a link is served from memory before it is reloaded (0 = no expiry)
+            clock: Monotonic time source
+        """
+        self.ttl = ttl
+        self._lru = LRUCache(max_size)
+        self._flight = SingleFlight()
+        self._clock = clock
+        # Bumped by every invalidation; loads that raced one are not stored
+        self._generation = 0
+
+    def get_or_load(self, slug: str, loader: Callable[[str], Optional[Any]]) -> Optional[Any]:
+        """
+        Return the cached link for slug, loading it on a miss.
+
+        Misses (None results) are not cached so newly created links
+        become visible immediately.
+
+        Args:
+            slug: The link slug
+            loader: Callable fetching the link from storage
+
+        Returns:
+            Link instance or None if not found
+        """
+        entry = self._lru.get(slug)
+        if entry is not None and (not self.ttl or self._clock() < entry[1]):
+            return entry[0]
+
+        def load():
+            generation = self._generation
+            found = loader(slug)
+            if found is not None and generation == self._generation:
+                self.set(slug, found)
+            return found
+
+        return self._flight.do(slug, load)
+
+    def set(self, slug: str, link: Any) -> None:
+        """Store a link under its slug."""
+        self._lru.set(slug, (link, self._clock() + self.ttl))
+
+    def invalidate(self, slug: str) -> None:
+        """Drop a slug from the cache."""
+        self._generation += 1
+        self._lru.delete(slug)
+
+    def clear(self) -> None:
+        """Drop every cached link."""
+        self._lru.clear()
+
+    def is_full(self) -> bool:
+        """Return True when no more links can be added without eviction."""
+        return self._lru.is_full()
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._lru
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+
+class _VersionedEntry:
+    __slots__ = ('version', 'value', 'stale_since')
+
+    def __init__(self, version: Hashable, value: Any):
+        self.version = version
+        self.value = value
+        self.stale_since = None
+
+
+class StaleWhileRevalidateCache:
+    """
+    Cache of computed results tagged with the version of the data they were
+    computed from. Callers pass the current version with every lookup, so
+    writers only bump a version and never have to find and delete entries.
+
+    A hit whose version is outdated is returned at once while a background
+    thread recomputes it (one refresh per key at a time); readers only wait
+    on a miss, or once an entry has been outdated for longer than max_stale.
+    Results rejected by `cacheable` (e.g. too large to hold) are returned
+    but not kept.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        max_stale: float = 60,
+        workers: int = 2,
+        executor: Executor = None,
+        clock: Callable[[], float] = time.monotonic,
+        cacheable: Callable[[Any], bool] = None,
+    ):
+        """
+        Initialize StaleWhileRevalidateCache.
+
+        Args:
+            max_size: Maximum number of results kept before evicting the oldest
+            max_stale: Seconds an outdated result may still be served while it
+                is refreshed (0 recomputes outdated results in the caller)
+            workers: Background refresh threads, started on the first refresh
+            executor: Executor running refreshes (defaults to a private thread pool)
+            clock: Monotonic time source
+            cacheable: Predicate deciding whether a computed result is kept
+                (defaults to keeping every result)
+        """
+        self.max_stale = max_stale
+        self.workers = workers
+        self._lru = LRUCache(max_size)
+        self._flight = SingleFlight()
+        self._executor = executor
+        self._refreshing = set()
+        self._clock = clock
+        self._cacheable = cacheable
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: Hashable,
+        version: Hashable,
+        compute: Callable[[], Any],
+        read_version: Callable[[], Hashable],
+    ) -> Any:
+        """
+        Return the result for key, computing it on a miss.
+
+        Args:
+            key: Cache key
+            version: Current version of the data behind key
+            compute: Zero-argument callable computing the result
+            read_version: Zero-argument callable reading the current version,
+                used by background refreshes
+
+        Returns:
+            The cached result if its version is current or it may still be
+            served stale, otherwise a freshly computed one
+        """
+        entry = self._lru.get(key)
+        if entry is not None:
+            if entry.version == version:
+                return entry.value
+            now = self._clock()
+            if entry.stale_since is None:
+                entry.stale_since = now
+            if now - entry.stale_since < self.max_stale:
+                self._schedule(key, compute, read_version)
+                return entry.value
+
+        return self._flight.do(key, lambda: self._store(key, version, compute()))
+
+    def _store(self, key: Hashable, version: Hashable, value: Any) -> Any:
+        if self._cacheable is None or self._cacheable(value):
+            self._lru.set(key, _VersionedEntry(version, value))
+        else:
+            # Also drop the previous result, which would otherwise keep being served stale
+            self._lru.delete(key)
+        return value
+
+    def _schedule(self, key: Hashable, compute: Callable[[], Any], read_version: Callable[[], Hashable]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='links-cache-refresh')
+            self._refreshing.add(key)
+            executor = self._executor
+        try:
+            executor.submit(self._refresh, key, compute, read_version)
+        except RuntimeError:
+            # Executor shut down (interpreter exit); keep serving what we have
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: Hashable, compute: Callable[[], Any], read_version: Callable[[], Hashable]) -> None:
+        close_old_connections()
+        try:
+            # Read the version first: clicks landing during compute() make it outdated, never ahead
+            version = read_version()
+            self._flight.do(key, lambda: self._store(key, version, compute()))
+        except Exception:
+            logger.warning("Background refresh of %r failed; serving the previous result", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            close_old_connections()
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key from the cache."""
+        self._lru.delete(key)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self._lru.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
@@ -0,0 +1,73 @@
+"""
+System checks for the deployment requirements of the links app.
+Follows Single Responsibility Principle by reporting misconfiguration at start-up instead of in requests.
+
+Some features coordinate workers through Django's cache and silently
+degrade to per-process behaviour when the cache is not shared. These
+checks run with every management command (runserver, migrate, check) and
+can be silenced with SILENCED_SYSTEM_CHECKS on single-process setups.
+"""
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose entries no other worker process can see
+UNSHARED_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    """
+    Report whether every worker process sees the entries of a cache.
+
+    Args:
+        alias: Django cache alias
+
+    Returns:
+        False for in-memory and dummy backends
+    """
+    return not isinstance(caches[alias], UNSHARED_CACHE_BACKENDS)
+
+
+@checks.register(checks.Tags.caches)
+def check_idempotency_cache(app_configs, **kwargs):
+    """Warn when Idempotency-Key replays are stored in a per-process cache."""
+    if is_shared_cache('default'):
+        return []
+    return [
+        checks.Warning(
+            "Idempotency keys are stored in a cache that worker processes do not share.",
+            hint=(
+                "A retried request that reaches another worker is executed again. "
+                "Set LINKS_CACHE_REDIS_URL (or CACHES['default']) to a shared cache "
+                "when running more than one process."
+            ),
+            obj=f"CACHES['default'] ({type(caches['default']).__name__})",
+            id='links.W001',
+        )
+    ]
+
+
+@checks.register(checks.Tags.caches)
+def check_click_dedup_cache(app_configs, **kwargs):
+    """Warn when the shared click deduplicator is backed by a per-process cache."""
+    if (
+        not getattr(settings, 'LINKS_CLICK_DEDUP_WINDOW', 0)
+        or getattr(settings, 'LINKS_CLICK_DEDUP_BACKEND', 'memory') != 'cache'
+        or is_shared_cache('default')
+    ):
+        return []
+    return [
+        checks.Warning(
+            "LINKS_CLICK_DEDUP_BACKEND is 'cache', but worker processes do not share the cache.",
+            hint=(
+                "Repeats that reach different workers are counted as new clicks. "
+                "Set LINKS_CACHE_REDIS_URL (or CACHES['default']) to a shared cache, "
+                "or use the 'memory' backend."
+            ),
+            obj=f"CACHES['default'] ({type(caches['default']).__name__})",
+            id='links.W002',
+        )
+    ]
@@ -0,0 +1,143 @@
+"""
+Lazily built, process-wide service instances.
+Follows Single Responsibility Principle by keeping service construction and lookup in one place.
+
+Services are registered as factories and nothing is constructed (or
+imported beyond the service module itself) until the first lookup, so a
+worker that boots and serves redirects never pays for analytics or health
+check dependencies it does not touch. Construction happens at most once per
+provider, under a lock, even when the first requests race for it.
+
+Lookups can be overridden for the current context only: override() sets a
+context variable, so a request, a test or an asyncio task sees its own
+instances while every other thread keeps the shared ones.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator
+
+
+class ServiceContainer:
+    """
+    Registry of named service factories with lazily built singletons.
+    Safe to share between threads and asyncio tasks.
+    """
+
+    def __init__(self):
+        """Initialize an empty ServiceContainer."""
+        self._factories: Dict[str, Callable[['ServiceContainer'], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        # Reentrant, because factories look up the services they depend on
+        self._lock = threading.RLock()
+        self._overrides: ContextVar = ContextVar(f'service_overrides_{id(self)}', default=None)
+
+    def register(self, name: str, factory: Callable[['ServiceContainer'], Any]) -> None:
+        """
+        Register (or replace) the factory building a service.
+
+        Args:
+            name: Service name
+            factory: Callable receiving this container and returning the instance
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service, building it on first use.
+
+        Args:
+            name: Service name
+
+        Returns:
+            The overriding instance for the current context, if any,
+            otherwise the shared instance
+
+        Raises:
+            LookupError: If no factory is registered under the name
+        """
+        overrides = self._overrides.get()
+        if overrides is not None and name in overrides:
+            return overrides[name]
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if name not in self._instances:
+                try:
+                    factory = self._factories[name]
+                except KeyError:
+                    raise LookupError(f"No service registered as '{name}'") from None
+                self._instances[name] = factory(self)
+            return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        """Whether the shared instance of a service has been constructed."""
+        return name in self._instances
+
+    @contextmanager
+    def override(self, **instances: Any) -> Iterator[None]:
+        """
+        Replace services for the current context (thread, request or task).
+        Overrides nest; leaving the block restores the previous lookups.
+
+        Args:
+            **instances: Service name -> instance to return instead
+
+        Example:
+            with container.override(link=LinkService(cache=RedirectCache(0))):
+                ...
+        """
+        token = self._overrides.set({**(self._overrides.get() or {}), **instances})
+        try:
+            yield
+        finally:
+            self._overrides.reset(token)
+
+    def reset(self, *names: str) -> None:
+        """
+        Drop shared instances so the next lookup builds them again.
+
+        Args:
+            *names: Services to drop (all when omitted)
+        """
+        with self._lock:
+            if names:
+                for name in names:
+                    self._instances.pop(name, None)
+            else:
+                self._instances.clear()
+
+    def proxy(self, name: str) -> 'ServiceProxy':
+        """
+        Get a stand-in that resolves the service on every attribute access,
+        for module-level references that must stay lazy and overridable.
+
+        Args:
+            name: Service name
+
+        Returns:
+            ServiceProxy for the service
+        """
+        return ServiceProxy(self, name)
+
+
+class ServiceProxy:
+    """Forwards attribute access to a container service looked up at call time."""
+
+    __slots__ = ('_container', '_name')
+
+    def __init__(self, container: ServiceContainer, name: str):
+        object.__setattr__(self, '_container', container)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._container.get(self._name), attr)
+
+    def __repr__(self) -> str:
+        return f"<ServiceProxy {self._name!r}>"
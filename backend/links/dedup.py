@@ -0,0 +1,125 @@
+"""
+Duplicate-click suppression over a sliding time window.
+Follows Single Responsibility Principle by isolating repeat detection.
+
+A click is a repeat when the same (slug, client IP, user agent) was seen
+within the configured window. Both deduplicators answer in O(1):
+the in-memory one keeps two time-bucketed generations of keys and drops a
+whole generation at a time, the cache one relies on an atomic cache.add.
+The cache one only deduplicates across workers when they share the cache
+(LINKS_CACHE_REDIS_URL); the links.W002 system check reports when they do not.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class MemoryClickDeduplicator:
+    """
+    Per-process deduplicator with generation-based expiry.
+    Keys live in the current generation; when it is older than the window it
+    becomes the previous generation and the old previous one is discarded,
+    so expiry costs nothing per key and memory is bounded by max_keys.
+    """
+
+    def __init__(self, window: float, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize MemoryClickDeduplicator.
+
+        Args:
+            window: Seconds during which a repeat is suppressed
+            max_keys: Keys per generation before an early rotation
+            clock: Monotonic time source
+        """
+        self.window = window
+        self.max_keys = max_keys
+        self._clock = clock
+        self._current = {}
+        self._previous = {}
+        self._generation_start = clock()
+        self._lock = threading.Lock()
+
+    def is_repeat(self, slug: str, ip_address: str, user_agent: str) -> bool:
+        """
+        Record a click and report whether it repeats one inside the window.
+
+        Args:
+            slug: The link slug
+            ip_address: Client IP address
+            user_agent: User agent string
+
+        Returns:
+            True if the same click was seen less than `window` seconds ago
+        """
+        key = (slug, ip_address, user_agent)
+        now = self._clock()
+        with self._lock:
+            if now - self._generation_start >= self.window or len(self._current) >= self.max_keys:
+                self._previous = self._current
+                self._current = {}
+                self._generation_start = now
+
+            last_seen = self._current.get(key)
+            if last_seen is None:
+                last_seen = self._previous.get(key)
+            self._current[key] = now
+        return last_seen is not None and now - last_seen < self.window
+
+
+class CacheClickDeduplicator:
+    """
+    Deduplicator shared by every worker through Django's cache.
+    Uses cache.add, which only succeeds for absent keys, as the atomic check.
+    """
+
+    KEY_PREFIX = 'links:dedup:'
+
+    def __init__(self, window: float, cache_alias: str = 'default'):
+        """
+        Initialize CacheClickDeduplicator.
+
+        Args:
+            window: Seconds during which a repeat is suppressed
+            cache_alias: Django cache alias to use
+        """
+        self.window = window
+        self.cache = caches[cache_alias]
+
+    def is_repeat(self, slug: str, ip_address: str, user_agent: str) -> bool:
+        """
+        Record a click and report whether it repeats one inside the window.
+
+        Args:
+            slug: The link slug
+            ip_address: Client IP address
+            user_agent: User agent string
+
+        Returns:
+            True if the same click was seen less than `window` seconds ago
+        """
+        digest = hashlib.blake2b(
+            f"{slug}\0{ip_address}\0{user_agent}".encode('utf-8'), digest_size=16
+        ).hexdigest()
+        return not self.cache.add(self.KEY_PREFIX + digest, 1, timeout=self.window)
+
+
+def build_click_deduplicator():
+    """
+    Build the deduplicator described by settings.
+    LINKS_CLICK_DEDUP_WINDOW (seconds, 0 disables) and
+    LINKS_CLICK_DEDUP_BACKEND ('memory' or 'cache').
+
+    Returns:
+        Deduplicator instance, or None when deduplication is disabled
+    """
+    window = getattr(settings, 'LINKS_CLICK_DEDUP_WINDOW', 0)
+    if not window:
+        return None
+    if getattr(settings, 'LINKS_CLICK_DEDUP_BACKEND', 'memory') == 'cache':
+        return CacheClickDeduplicator(window)
+    return MemoryClickDeduplicator(window, getattr(settings, 'LINKS_CLICK_DEDUP_MAX_KEYS', 100000))
@@ -0,0 +1,163 @@
+"""
+Resolution of request hosts to branded short-link domains.
+Follows Single Responsibility Principle by keeping host handling out of views and services.
+
+The Domain table is small and changes rarely, so every process keeps a
+snapshot of it (host -> id and id -> host) and answers lookups from memory;
+a redirect never queries for its domain. The snapshot is reloaded once it is
+older than LINKS_DOMAIN_CACHE_TTL (only one thread reloads, the others keep
+using the previous snapshot meanwhile) and immediately in the process that
+changes a domain. Hosts that are not registered resolve to the primary
+domain, PRIMARY_DOMAIN_ID.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .models import PRIMARY_DOMAIN_ID
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_host(host: str) -> str:
+    """
+    Canonical form of a host for lookups: lower case, no port, no trailing dot.
+
+    Args:
+        host: Host name, optionally with a port (e.g. a Host header)
+
+    Returns:
+        Normalized host name
+    """
+    host = host.strip().lower()
+    if host.startswith('['):
+        # IPv6 literal, possibly followed by a port
+        host = host[:host.find(']') + 1] if ']' in host else host
+    elif host.count(':') == 1:
+        host = host.split(':', 1)[0]
+    return host.rstrip('.')
+
+
+class DomainResolver:
+    """
+    In-process, periodically reloaded map between hosts and domain ids.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        loader: Callable[[], Iterable[Tuple[int, str]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize DomainResolver.
+
+        Args:
+            ttl: Seconds a snapshot is used before it is reloaded
+            loader: Callable returning (id, host) pairs (defaults to DomainRepository.get_rows)
+            clock: Monotonic time source
+        """
+        if loader is None:
+            from .repositories import DomainRepository
+            loader = DomainRepository.get_rows
+        self.ttl = ttl
+        self._loader = loader
+        self._clock = clock
+        self._snapshot: Optional[Tuple[Dict[str, int], Dict[int, str]]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current(self) -> Tuple[Dict[str, int], Dict[int, str]]:
+        snapshot = self._snapshot
+        if snapshot is not None and self._clock() - self._loaded_at < self.ttl:
+            return snapshot
+        # Only one thread reloads; while a snapshot exists the others keep using it
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is not None and self._clock() - self._loaded_at < self.ttl:
+                return self._snapshot
+            try:
+                rows = list(self._loader())
+            except DatabaseError:
+                if self._snapshot is None:
+                    raise
+                logger.warning("Domain reload failed; keeping the previous snapshot", exc_info=True)
+                self._loaded_at = self._clock()
+                return self._snapshot
+            self._snapshot = (
+                {normalize_host(host): domain_id for domain_id, host in rows},
+                {domain_id: host for domain_id, host in rows},
+            )
+            self._loaded_at = self._clock()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def lookup(self, host: str) -> Optional[int]:
+        """
+        Id of a registered domain.
+
+        Args:
+            host: Host name, optionally with a port
+
+        Returns:
+            Domain id, or None if the host is not registered
+        """
+        return self._current()[0].get(normalize_host(host))
+
+    def resolve(self, host: str) -> int:
+        """
+        Domain whose keyspace a request for this host addresses.
+
+        Args:
+            host: Host name, optionally with a port
+
+        Returns:
+            Domain id, or PRIMARY_DOMAIN_ID for hosts that are not registered
+        """
+        domain_id = self.lookup(host)
+        return PRIMARY_DOMAIN_ID if domain_id is None else domain_id
+
+    def host_for(self, domain_id: int) -> Optional[str]:
+        """
+        Host of a registered domain.
+
+        Args:
+            domain_id: Domain id
+
+        Returns:
+            Host name, or None for the primary domain or an unknown id
+        """
+        if domain_id == PRIMARY_DOMAIN_ID:
+            return None
+        return self._current()[1].get(domain_id)
+
+    def invalidate(self) -> None:
+        """Reload the snapshot on the next lookup."""
+        self._loaded_at = float('-inf')
+
+
+_default_resolver = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_domain_resolver() -> DomainResolver:
+    """
+    Get the process-wide resolver configured by LINKS_DOMAIN_CACHE_TTL.
+
+    Returns:
+        DomainResolver instance
+    """
+    global _default_resolver
+    if _default_resolver is None:
+        with _default_resolver_lock:
+            if _default_resolver is None:
+                _default_resolver = DomainResolver(ttl=getattr(settings, 'LINKS_DOMAIN_CACHE_TTL', 60))
+    return _default_resolver
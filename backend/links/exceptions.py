@@ -14,9 +14,57 @@ class LinkNotFoundError(APIException):
     default_code = "link_not_found"
 
 
+class UnknownDomainError(APIException):
+    """Exception raised when a link is created on a domain that is not registered."""
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Unknown domain."
+    default_code = "unknown_domain"
+
+
+class CampaignNotFoundError(APIException):
+    """Exception raised when a campaign is not found."""
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Campaign not found."
+    default_code = "campaign_not_found"
+
+
+class LinkExpiredError(APIException):
+    """Exception raised when a link is past its expiry time or click limit."""
+    status_code = status.HTTP_410_GONE
+    default_detail = "Link has expired."
+    default_code = "link_expired"
+
+
 class InvalidURLError(APIException):
     """Exception raised when URL validation fails."""
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = "Invalid URL provided."
     default_code = "invalid_url"
 
+
+class IdempotencyKeyConflictError(APIException):
+    """Exception raised when an Idempotency-Key is reused with a different payload."""
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key was already used with a different request body."
+    default_code = "idempotency_key_conflict"
+
+
+class IdempotencyKeyInProgressError(APIException):
+    """Exception raised when a request with the same Idempotency-Key is still running."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress."
+    default_code = "idempotency_key_in_progress"
+
+
+class QRCodeUnavailableError(APIException):
+    """Exception raised when QR code rendering is not installed."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "QR code rendering is not available."
+    default_code = "qr_code_unavailable"
+
+
+class AnomalyDetectionDisabledError(APIException):
+    """Exception raised when click-rate anomaly detection is turned off."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Click-rate anomaly detection is disabled."
+    default_code = "anomaly_detection_disabled"
@@ -0,0 +1,196 @@
+"""
+IP-to-country/ASN lookup over a local GeoIP-style range database.
+Follows Single Responsibility Principle by isolating IP enrichment.
+
+The CSV holds one range per line: ``start_ip,end_ip,country[,asn]`` where
+the addresses are either dotted/colon notation or integers. Ranges are kept
+in sorted, array-backed columns and resolved with binary search:
+IPv4 bounds as 32-bit unsigned arrays, IPv6 bounds as packed 16-byte
+big-endian records (byte order equals numeric order), and countries
+dictionary-coded into 16-bit ids. A few million ranges fit in tens of MB.
+"""
+
+import csv
+import ipaddress
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class GeoInfo(NamedTuple):
+    """Result of an IP lookup."""
+    country: str
+    asn: Optional[int]
+
+
+def _parse_address(value: str):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return ipaddress.ip_address(number) if number < 2 ** 32 else ipaddress.IPv6Address(number)
+    return ipaddress.ip_address(value)
+
+
+class _Ranges:
+    """Sorted ranges for one address family."""
+
+    def __init__(self, width: int):
+        self.width = width
+        self.rows = []
+
+    def freeze(self, countries: dict) -> None:
+        self.rows.sort(key=lambda row: row[0])
+        if self.width == 4:
+            self.starts = array('I', (row[0] for row in self.rows))
+            self.ends = array('I', (row[1] for row in self.rows))
+        else:
+            self.starts = b''.join(row[0].to_bytes(16, 'big') for row in self.rows)
+            self.ends = b''.join(row[1].to_bytes(16, 'big') for row in self.rows)
+        self.country_ids = array('H', (countries.setdefault(row[2], len(countries)) for row in self.rows))
+        self.asns = array('I', (row[3] for row in self.rows))
+        self.size = len(self.rows)
+        del self.rows
+
+    def find(self, number: int) -> int:
+        """Index of the range containing number, or -1."""
+        if self.width == 4:
+            index = bisect_right(self.starts, number) - 1
+            if index >= 0 and number <= self.ends[index]:
+                return index
+            return -1
+
+        key = number.to_bytes(16, 'big')
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.starts[middle * 16:middle * 16 + 16] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        index = low - 1
+        if index >= 0 and key <= self.ends[index * 16:index * 16 + 16]:
+            return index
+        return -1
+
+
+class GeoIPIndex:
+    """
+    In-memory interval index mapping IPv4 and IPv6 addresses to country and ASN.
+    Immutable after loading, so lookups are lock-free.
+    """
+
+    def __init__(self):
+        """Initialize an empty GeoIPIndex."""
+        self._v4 = _Ranges(4)
+        self._v6 = _Ranges(6)
+        self._countries = []
+        self._frozen = False
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'GeoIPIndex':
+        """
+        Build an index from a range CSV file.
+
+        Args:
+            path: Path to the CSV database
+
+        Returns:
+            Loaded GeoIPIndex
+        """
+        index = cls()
+        with open(path, newline='', encoding='utf-8') as handle:
+            for line_number, row in enumerate(csv.reader(handle), start=1):
+                if not row or row[0].startswith('#'):
+                    continue
+                try:
+                    index.add_range(row[0], row[1], row[2], row[3] if len(row) > 3 else None)
+                except (ValueError, IndexError):
+                    if line_number > 1:  # the first line may be a header
+                        logger.warning("Skipping malformed GeoIP row %d in %s", line_number, path)
+        index.freeze()
+        return index
+
+    def add_range(self, start: str, end: str, country: str, asn=None) -> None:
+        """
+        Add one address range. Must be called before freeze().
+
+        Args:
+            start: First address of the range
+            end: Last address of the range
+            country: ISO 3166 country code
+            asn: Autonomous system number (optional)
+        """
+        first, last = _parse_address(start), _parse_address(end)
+        if first.version != last.version:
+            raise ValueError("Range bounds must share an address family")
+        asn = int(str(asn).upper().lstrip('AS')) if asn not in (None, '', '-') else 0
+        ranges = self._v4 if first.version == 4 else self._v6
+        ranges.rows.append((int(first), int(last), country.strip().upper()[:2], asn))
+
+    def freeze(self) -> None:
+        """Sort and pack the ranges into compact arrays."""
+        codes = {}
+        self._v4.freeze(codes)
+        self._v6.freeze(codes)
+        self._countries = [code for code, _ in sorted(codes.items(), key=lambda item: item[1])]
+        self._frozen = True
+
+    def lookup(self, ip: str) -> Optional[GeoInfo]:
+        """
+        Resolve an address to its country and ASN.
+
+        Args:
+            ip: IPv4 or IPv6 address string
+
+        Returns:
+            GeoInfo or None if the address is invalid or not covered
+        """
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+
+        ranges = self._v4 if address.version == 4 else self._v6
+        index = ranges.find(int(address))
+        if index < 0:
+            return None
+        asn = ranges.asns[index]
+        return GeoInfo(self._countries[ranges.country_ids[index]], asn or None)
+
+    def __len__(self) -> int:
+        return self._v4.size + self._v6.size
+
+
+_default_index = None
+_default_index_loaded = False
+_default_index_lock = threading.Lock()
+
+
+def get_geoip_index() -> Optional[GeoIPIndex]:
+    """
+    Get the process-wide index loaded from LINKS_GEOIP_DATABASE.
+
+    Returns:
+        GeoIPIndex, or None when no database is configured or it fails to load
+    """
+    global _default_index, _default_index_loaded
+    if not _default_index_loaded:
+        with _default_index_lock:
+            if not _default_index_loaded:
+                path = getattr(settings, 'LINKS_GEOIP_DATABASE', None)
+                if path:
+                    try:
+                        _default_index = GeoIPIndex.from_csv(path)
+                    except OSError:
+                        logger.warning("Could not load GeoIP database %s", path, exc_info=True)
+                _default_index_loaded = True
+    return _default_index
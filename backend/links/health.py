@@ -0,0 +1,273 @@
+"""
+Concurrent health checks for link destinations.
+Follows Single Responsibility Principle by isolating outbound HTTP probing.
+
+URLs are probed from one asyncio event loop through a single aiohttp
+session whose connector bounds the total number of open connections and
+the connections per host, so a large batch never floods one origin. Each
+URL is tried with HEAD first and, because many servers answer HEAD with
+405 or other errors they would not return for a real visit, with GET
+(headers only) when HEAD fails. Redirects are followed. Results are kept
+in a bounded in-process cache for the recheck TTL, so links sharing a
+destination are probed once per TTL.
+
+A probe's timeout starts once it holds one of its host's connection slots,
+so URLs queued behind a slow origin are not reported unreachable. Targets
+that are (or resolve to) private, loopback, link-local or otherwise
+non-public addresses are never contacted, including through redirects,
+unless LINKS_HEALTH_CHECK_ALLOW_PRIVATE is set; they are reported blocked.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+
+from .cache import LRUCache
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+OK = 'ok'
+BROKEN = 'broken'
+UNREACHABLE = 'unreachable'
+BLOCKED = 'blocked'
+STATUSES = (OK, BROKEN, UNREACHABLE, BLOCKED)
+
+REDIRECT_CODES = frozenset({301, 302, 303, 307, 308})
+
+
+class HealthResult(NamedTuple):
+    """Outcome of probing one URL."""
+    status: str
+    code: Optional[int]  # final HTTP status, None if no response was received
+    error: str = ''
+
+
+def classify_status(code: int) -> str:
+    """Health status for a final HTTP status code."""
+    return OK if code < 400 else BROKEN
+
+
+def is_public_address(host: str) -> bool:
+    """Whether an IP address is globally routable (not private, loopback, link-local, reserved or multicast)."""
+    address = ipaddress.ip_address(host.split('%', 1)[0])
+    if getattr(address, 'ipv4_mapped', None) is not None:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+class BlockedTargetError(OSError):
+    """Raised instead of connecting to a non-public address."""
+
+    def __init__(self, host: str):
+        super().__init__(f"{host} is not a public address")
+
+
+class PublicAddressResolver:
+    """
+    aiohttp resolver that drops non-public addresses, so neither a hostname
+    nor a redirect to one can make the checker connect to internal services.
+    """
+
+    def __init__(self, resolver=None):
+        """
+        Initialize PublicAddressResolver.
+
+        Args:
+            resolver: aiohttp resolver doing the lookups (defaults to aiohttp.DefaultResolver)
+        """
+        self._resolver = resolver or aiohttp.DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET):
+        addresses = [
+            address for address in await self._resolver.resolve(host, port, family)
+            if is_public_address(address['host'])
+        ]
+        if not addresses:
+            raise BlockedTargetError(host)
+        return addresses
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+class HealthChecker:
+    """
+    Probes URLs concurrently with per-host connection limits.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = None,
+        per_host: int = None,
+        timeout: float = None,
+        ttl: float = None,
+        max_redirects: int = 5,
+        cache_size: int = 100000,
+        allow_private: bool = None,
+    ):
+        """
+        Initialize HealthChecker.
+
+        Args:
+            concurrency: Maximum open connections and in-flight probes (defaults to LINKS_HEALTH_CHECK_CONCURRENCY)
+            per_host: Maximum connections per host (defaults to LINKS_HEALTH_CHECK_PER_HOST)
+            timeout: Seconds allowed per probe once it holds a connection slot for its host,
+                including redirects (defaults to LINKS_HEALTH_CHECK_TIMEOUT)
+            ttl: Seconds a result is reused before the URL is probed again (defaults to LINKS_HEALTH_CHECK_TTL)
+            max_redirects: Redirects followed before giving up
+            cache_size: Number of URL results kept in memory
+            allow_private: Also probe non-public addresses (defaults to LINKS_HEALTH_CHECK_ALLOW_PRIVATE)
+        """
+        self.concurrency = concurrency or getattr(settings, 'LINKS_HEALTH_CHECK_CONCURRENCY', 100)
+        self.per_host = per_host or getattr(settings, 'LINKS_HEALTH_CHECK_PER_HOST', 4)
+        self.timeout = timeout or getattr(settings, 'LINKS_HEALTH_CHECK_TIMEOUT', 10.0)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'LINKS_HEALTH_CHECK_TTL', 86400)
+        self.max_redirects = max_redirects
+        self.user_agent = getattr(settings, 'LINKS_HEALTH_CHECK_USER_AGENT', 'links-health-checker/1.0')
+        self.allow_private = (
+            allow_private if allow_private is not None
+            else getattr(settings, 'LINKS_HEALTH_CHECK_ALLOW_PRIVATE', False)
+        )
+        self._results = LRUCache(cache_size)
+
+    def check(self, urls: Iterable[str]) -> Dict[str, HealthResult]:
+        """
+        Probe URLs, reusing results younger than the TTL.
+        Must not be called from a running event loop.
+
+        Args:
+            urls: URLs to probe (duplicates are probed once)
+
+        Returns:
+            Dictionary of URL -> HealthResult
+
+        Raises:
+            RuntimeError: If aiohttp is not installed
+        """
+        if aiohttp is None:
+            raise RuntimeError("Link health checks require the aiohttp package")
+
+        results = {}
+        pending = []
+        now = time.monotonic()
+        for url in dict.fromkeys(urls):
+            cached = self._results.get(url)
+            if cached is not None and now - cached[0] < self.ttl:
+                results[url] = cached[1]
+            else:
+                pending.append(url)
+
+        if pending:
+            probed = asyncio.run(self.check_async(pending))
+            checked_at = time.monotonic()
+            for url, result in probed.items():
+                self._results.set(url, (checked_at, result))
+            results.update(probed)
+        return results
+
+    async def check_async(self, urls: Iterable[str]) -> Dict[str, HealthResult]:
+        """
+        Probe URLs on the running event loop without consulting the cache.
+
+        Args:
+            urls: URLs to probe
+
+        Returns:
+            Dictionary of URL -> HealthResult
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.per_host,
+            ttl_dns_cache=300,
+            resolver=None if self.allow_private else PublicAddressResolver(),
+        )
+        # No total: time spent queued for a pooled connection must not count
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        # Bounds queued tasks too, not just sockets
+        slots = asyncio.Semaphore(self.concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={'User-Agent': self.user_agent},
+        ) as session:
+            async def probe(url):
+                # Host slot first: tasks queued on a slow host must not hold global slots
+                async with host_slots[urlsplit(url).hostname]:
+                    async with slots:
+                        return url, await self._probe(session, url)
+
+            pairs = await asyncio.gather(*(probe(url) for url in dict.fromkeys(urls)))
+        return dict(pairs)
+
+    async def _probe(self, session, url: str) -> HealthResult:
+        try:
+            code = await asyncio.wait_for(self._head_then_get(session, url), self.timeout)
+        except asyncio.TimeoutError:
+            return HealthResult(UNREACHABLE, None, 'timeout')
+        except BlockedTargetError as exc:
+            return HealthResult(BLOCKED, None, str(exc)[:255])
+        except aiohttp.ClientConnectorError as exc:
+            if isinstance(exc.os_error, BlockedTargetError):
+                return HealthResult(BLOCKED, None, str(exc.os_error)[:255])
+            return HealthResult(UNREACHABLE, None, f"{type(exc).__name__}: {exc}"[:255])
+        except (aiohttp.ClientError, ValueError) as exc:
+            return HealthResult(UNREACHABLE, None, f"{type(exc).__name__}: {exc}"[:255])
+        return HealthResult(classify_status(code), code)
+
+    async def _head_then_get(self, session, url: str) -> int:
+        code = await self._request(session, 'HEAD', url)
+        if code >= 400:
+            code = await self._request(session, 'GET', url)
+        return code
+
+    async def _request(self, session, method: str, url: str) -> int:
+        # Redirects are followed here so every hop's address can be checked
+        for _ in range(self.max_redirects + 1):
+            self._check_target(url)
+            # Only the status line and headers are read; the body is discarded
+            async with session.request(method, url, allow_redirects=False) as response:
+                location = response.headers.get('Location')
+                if response.status not in REDIRECT_CODES or not location:
+                    return response.status
+                url = urljoin(str(response.url), location)
+        raise ValueError(f"more than {self.max_redirects} redirects")
+
+    def _check_target(self, url: str) -> None:
+        # Hostnames are checked by PublicAddressResolver; IP literals never reach it
+        if self.allow_private:
+            return
+        host = urlsplit(url).hostname or ''
+        try:
+            public = is_public_address(host)
+        except ValueError:
+            return
+        if not public:
+            raise BlockedTargetError(host)
+
+
+_default_checker = None
+
+
+def get_health_checker() -> Optional[HealthChecker]:
+    """
+    Get the process-wide checker configured by LINKS_HEALTH_CHECK_* settings.
+
+    Returns:
+        HealthChecker instance, or None when aiohttp is not installed
+    """
+    global _default_checker
+    if _default_checker is None and aiohttp is not None:
+        _default_checker = HealthChecker()
+    return _default_checker
@@ -0,0 +1,162 @@
+"""
+Idempotency-Key support for unsafe requests.
+Follows Single Responsibility Principle by isolating replay bookkeeping.
+
+The first successful response for a key is stored in the cache for a TTL
+and replayed for retries. Keys are scoped to the client (the user, or the
+client IP for anonymous requests), so two clients choosing the same key
+never see each other's responses. Concurrent duplicates are coalesced:
+inside one process they share a single execution, across processes the
+loser waits for the winner's stored result through a pending marker. The
+marker outlives the longest request (LINKS_IDEMPOTENCY_PENDING_TTL); if the
+winner fails and releases it, a waiting duplicate runs the request itself.
+
+Coalescing across processes needs a cache every worker shares (Redis via
+LINKS_CACHE_REDIS_URL); with a per-process cache a retry that reaches
+another worker runs again. The links.W001 system check reports that setup.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Callable, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import SingleFlight
+from .exceptions import IdempotencyKeyConflictError, IdempotencyKeyInProgressError
+
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+def fingerprint_request(data: Any) -> str:
+    """
+    Hash a request payload so a reused key with a different body is detected.
+
+    Args:
+        data: Parsed request data
+
+    Returns:
+        Hex digest of the canonical JSON encoding
+    """
+    encoded = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    TTL-bounded store of responses keyed by Idempotency-Key.
+    """
+
+    KEY_PREFIX = 'links:idempotency:'
+
+    def __init__(
+        self,
+        ttl: int = None,
+        wait_timeout: float = None,
+        cache_alias: str = 'default',
+        pending_ttl: int = None,
+    ):
+        """
+        Initialize IdempotencyStore.
+
+        Args:
+            ttl: Seconds a stored response is replayable (defaults to LINKS_IDEMPOTENCY_TTL)
+            wait_timeout: Seconds to wait for an in-flight duplicate (defaults to LINKS_IDEMPOTENCY_WAIT)
+            cache_alias: Django cache alias to use
+            pending_ttl: Seconds an in-flight marker lives; must exceed the server's
+                request timeout (defaults to LINKS_IDEMPOTENCY_PENDING_TTL)
+        """
+        self.ttl = ttl if ttl is not None else getattr(settings, 'LINKS_IDEMPOTENCY_TTL', 86400)
+        self.wait_timeout = (
+            wait_timeout if wait_timeout is not None
+            else getattr(settings, 'LINKS_IDEMPOTENCY_WAIT', 5.0)
+        )
+        self.pending_ttl = (
+            pending_ttl if pending_ttl is not None
+            else getattr(settings, 'LINKS_IDEMPOTENCY_PENDING_TTL', 120)
+        )
+        self.cache = caches[cache_alias]
+        self._flight = SingleFlight()
+
+    def execute(
+        self,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], Tuple[int, Any]],
+        scope: str = '',
+    ) -> Tuple[int, Any, bool]:
+        """
+        Run fn once per key and replay its result for later duplicates.
+        Only 2xx results are stored; failures may be retried with the same key.
+
+        Args:
+            key: Client-supplied idempotency key
+            fingerprint: Fingerprint of the request payload
+            fn: Callable returning (status_code, data)
+            scope: Identity of the client the key belongs to
+
+        Returns:
+            Tuple of (status_code, data, replayed)
+
+        Raises:
+            IdempotencyKeyConflictError: If the key was used with a different payload
+            IdempotencyKeyInProgressError: If a duplicate is still running elsewhere
+        """
+        scoped = f"{len(scope)}:{scope}:{key}"
+        cache_key = self.KEY_PREFIX + hashlib.sha256(scoped.encode('utf-8')).hexdigest()
+
+        stored = self._stored(cache_key, fingerprint)
+        if stored is not None:
+            return stored['status'], stored['data'], True
+
+        leader = []
+
+        def run():
+            leader.append(True)
+            return self._run(cache_key, fingerprint, fn)
+
+        status_code, data, replayed = self._flight.do(cache_key, run)
+        return status_code, data, replayed or not leader
+
+    def _stored(self, cache_key: str, fingerprint: str):
+        record = self.cache.get(cache_key)
+        if record is None:
+            return None
+        if record['fingerprint'] != fingerprint:
+            raise IdempotencyKeyConflictError()
+        return record if record['state'] == DONE else None
+
+    def _run(self, cache_key: str, fingerprint: str, fn) -> Tuple[int, Any, bool]:
+        pending = {'state': PENDING, 'fingerprint': fingerprint}
+        deadline = time.monotonic() + self.wait_timeout
+        while not self.cache.add(cache_key, pending, timeout=self.pending_ttl):
+            # Another worker owns this key; wait for its stored response
+            stored = self._stored(cache_key, fingerprint)
+            if stored is not None:
+                return stored['status'], stored['data'], True
+            if self.cache.get(cache_key) is None:
+                continue  # the owner failed and released the key; try to take it over
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgressError()
+            time.sleep(0.05)
+
+        try:
+            status_code, data = fn()
+        except Exception:
+            self.cache.delete(cache_key)
+            raise
+
+        if 200 <= status_code < 300:
+            self.cache.set(cache_key, {
+                'state': DONE,
+                'fingerprint': fingerprint,
+                'status': status_code,
+                'data': data,
+            }, timeout=self.ttl)
+        else:
+            self.cache.delete(cache_key)
+        return status_code, data, False
@@ -0,0 +1,107 @@
+"""
+Cross-process invalidation of cached links.
+Follows Single Responsibility Principle by keeping cache coherence out of models and services.
+
+Every worker keeps Link rows (the redirect cache) and compiled routing
+rules in memory. When a link or its rules change, publish() drops the
+link's entries in this process and, with LINKS_CACHE_INVALIDATION_BACKEND
+set to 'redis', in every other worker through Redis pub/sub. Messages lost
+while a worker is disconnected are covered by the redirect cache's TTL
+(LINKS_REDIRECT_CACHE_TTL), which is also the only bound with the 'local'
+backend.
+"""
+
+import logging
+import threading
+from typing import Callable, List
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LinkInvalidationBus:
+    """
+    Fans out "this link changed" messages, keyed by Link.cache_key, to the
+    handlers registered in every process.
+    """
+
+    CHANNEL = 'links:invalidate'
+
+    def __init__(self, redis_url: str = None):
+        """
+        Initialize LinkInvalidationBus.
+
+        Args:
+            redis_url: Redis connection URL for cross-worker delivery
+                (None delivers to this process only)
+        """
+        self._handlers: List[Callable[[str], None]] = []
+        self._client = None
+        self._listener = None
+        if redis_url:
+            import redis
+
+            from .pubsub import RedisPatternListener
+
+            self._client = redis.Redis.from_url(redis_url)
+            self._listener = RedisPatternListener(
+                self._client, self.CHANNEL, lambda channel, key: self._apply(key), name='link-invalidation-redis',
+            )
+
+    def subscribe(self, handler: Callable[[str], None]) -> None:
+        """
+        Call `handler` with the cache key of every changed link.
+
+        Args:
+            handler: Callable receiving a Link.cache_key
+        """
+        self._handlers.append(handler)
+
+    def publish(self, key: str) -> None:
+        """
+        Drop a link from the caches of this process and, if configured, every other one.
+
+        Args:
+            key: The link's cache_key
+        """
+        self._apply(key)
+        if self._client is not None:
+            try:
+                self._client.publish(self.CHANNEL, key)
+            except Exception:
+                logger.warning("Could not publish invalidation of %s; other workers catch up by TTL", key, exc_info=True)
+
+    def _apply(self, key: str) -> None:
+        for handler in list(self._handlers):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("Invalidation handler %r failed", handler)
+
+
+_default_bus = None
+_default_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus() -> LinkInvalidationBus:
+    """
+    Get the process-wide bus configured by LINKS_CACHE_INVALIDATION_BACKEND,
+    subscribed to the default services' caches.
+
+    Returns:
+        LinkInvalidationBus instance
+    """
+    global _default_bus
+    if _default_bus is None:
+        with _default_bus_lock:
+            if _default_bus is None:
+                from .services import invalidate_cached_link
+
+                redis_url = None
+                if getattr(settings, 'LINKS_CACHE_INVALIDATION_BACKEND', 'local') == 'redis':
+                    redis_url = settings.LINKS_CACHE_INVALIDATION_REDIS_URL
+                bus = LinkInvalidationBus(redis_url)
+                bus.subscribe(invalidate_cached_link)
+                _default_bus = bus
+    return _default_bus
@@ -0,0 +1,61 @@
+"""
+Periodic maintenance jobs run by links.scheduler.
+Follows Single Responsibility Principle by keeping job wiring in one place.
+"""
+
+from importlib.util import find_spec
+
+from django.conf import settings
+
+from .scheduler import Scheduler
+
+
+def _installed(module: str) -> bool:
+    """Whether an optional dependency is importable, without importing it at boot."""
+    return find_spec(module) is not None
+
+
+def sweep_expired_links() -> int:
+    """Delete links past their expiry time or click limit."""
+    from .services import get_default_services
+
+    link_service, _, _ = get_default_services()
+    return link_service.sweep_expired_links()
+
+
+def compact_clicks() -> int:
+    """Move aged clicks into columnar analytics segments."""
+    from .services import get_default_services
+
+    _, _, analytics_service = get_default_services()
+    return analytics_service.compact_clicks()
+
+
+def check_link_health() -> dict:
+    """Probe destinations of links due for a health check."""
+    from .services import get_default_services
+
+    link_service, _, _ = get_default_services()
+    return link_service.check_link_health()
+
+
+def register_default_jobs(scheduler: Scheduler) -> None:
+    """
+    Register the built-in jobs whose interval setting is non-zero.
+
+    Args:
+        scheduler: Scheduler to register with
+    """
+    interval = getattr(settings, 'LINKS_EXPIRY_SWEEP_INTERVAL', 300)
+    if interval:
+        scheduler.register('sweep_expired_links', interval, sweep_expired_links)
+    
+    interval = getattr(settings, 'LINKS_SEGMENT_COMPACTION_INTERVAL', 600)
+    # Mirrors get_segment_store() without importing NumPy at boot
+    if interval and getattr(settings, 'LINKS_SEGMENT_DIR', None) and _installed('numpy'):
+        scheduler.register('compact_clicks', interval, compact_clicks)
+    
+    interval = getattr(settings, 'LINKS_HEALTH_CHECK_INTERVAL', 3600)
+    # Mirrors get_health_checker() without importing aiohttp at boot
+    if interval and _installed('aiohttp'):
+        scheduler.register('check_link_health', interval, check_link_health)
@@ -0,0 +1,60 @@
+"""
+Management command tagging existing clicks with country and ASN.
+Walks each shard's Click table in primary-key order and writes results
+back with bulk_update, so memory stays flat however many rows exist.
+Columnar segments holding updated clicks are rewritten afterwards.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...geoip import GeoIPIndex, get_geoip_index
+from ...models import Click
+from ...services import get_default_services
+from ...sharding import get_shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Backfill Click.country and Click.asn from a GeoIP range CSV."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help="CSV path (defaults to LINKS_GEOIP_DATABASE)")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per update batch")
+        parser.add_argument('--all', action='store_true', help="Re-tag clicks that already have a country")
+    
+    def handle(self, *args, **options):
+        index = GeoIPIndex.from_csv(options['database']) if options['database'] else get_geoip_index()
+        if index is None:
+            raise CommandError("No GeoIP database configured; pass --database or set LINKS_GEOIP_DATABASE")
+        
+        batch_size = options['batch_size']
+        _, _, analytics_service = get_default_services()
+        for alias in get_shard_aliases():
+            clicks = Click.objects.using(alias).only('pk', 'ip_address', 'country', 'asn').order_by('pk')
+            if not options['all']:
+                clicks = clicks.filter(country='')
+            
+            scanned = tagged = 0
+            last_pk = 0
+            changed_ranges = []
+            while True:
+                batch = list(clicks.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                scanned += len(batch)
+                
+                changed = []
+                for click in batch:
+                    geo = index.lookup(click.ip_address)
+                    if geo is not None:
+                        click.country, click.asn = geo.country, geo.asn
+                        changed.append(click)
+                if changed:
+                    with transaction.atomic(using=alias):
+                        Click.objects.using(alias).bulk_update(changed, ['country', 'asn'])
+                    tagged += len(changed)
+                    changed_ranges.append((changed[0].pk, changed[-1].pk))
+            
+            rewritten = analytics_service.recompact_clicks(alias, click_ranges=changed_ranges)
+            self.stdout.write(f"{alias}: scanned {scanned} clicks, tagged {tagged}, rewrote {rewritten} segments")
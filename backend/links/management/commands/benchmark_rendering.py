@@ -0,0 +1,96 @@
+"""
+Management command comparing DRF serializer rendering with the fast path.
+Runs entirely in memory; no database rows are required.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ...models import Link
+from ...renderers import FastJSONRenderer
+from ...serializers import LinkSerializer, AnalyticsSerializer, serialize_link_row
+from ...utils import format_datetime
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-row rendering cost of the DRF path against the fast path."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Rows per rendered page")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed iterations per path")
+    
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        now = timezone.now()
+        
+        links = [
+            Link(
+                original_url=f"https://example.com/page/{i}",
+                slug=f"s{i:06d}",
+                created_at=now - timedelta(seconds=i),
+                click_count=i,
+            )
+            for i in range(rows)
+        ]
+        link_rows = [
+            {
+                'original_url': link.original_url,
+                'slug': link.slug,
+                'created_at': link.created_at,
+                'click_count': link.click_count,
+                'expires_at': link.expires_at,
+                'max_clicks': link.max_clicks,
+                'health_status': link.health_status,
+                'last_checked_at': link.last_checked_at,
+                'campaign_id': link.campaign_id,
+                'domain_id': link.domain_id,
+            }
+            for link in links
+        ]
+        analytics = {
+            "slug": "s000000",
+            "original_url": "https://example.com/page/0",
+            "total_clicks": rows,
+            "clicks": [
+                {
+                    "timestamp": format_datetime(now - timedelta(seconds=i)),
+                    "ip_address": "203.0.113.7",
+                    "user_agent": "Mozilla/5.0 (X11; Linux x86_64)",
+                    "referrer": None,
+                }
+                for i in range(rows)
+            ],
+        }
+        
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        
+        def drf_list():
+            return drf.render(LinkSerializer(links, many=True).data)
+        
+        def fast_list():
+            return fast.render([serialize_link_row(row) for row in link_rows])
+        
+        def drf_analytics():
+            serializer = AnalyticsSerializer(data=analytics)
+            serializer.is_valid(raise_exception=True)
+            return drf.render(serializer.validated_data)
+        
+        def fast_analytics():
+            return fast.render(analytics)
+        
+        for label, fn in (
+            ("links-list  DRF ", drf_list),
+            ("links-list  fast", fast_list),
+            ("analytics   DRF ", drf_analytics),
+            ("analytics   fast", fast_analytics),
+        ):
+            fn()  # warm up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            per_row_us = (time.perf_counter() - start) / (repeat * rows) * 1e6
+            self.stdout.write(f"{label}: {per_row_us:8.2f} us/row")
@@ -0,0 +1,96 @@
+"""
+Management command measuring worker cold-start time.
+Each run boots a fresh interpreter the way config.wsgi does, then serves
+two requests in-process, so imports, service construction and first-request
+setup are all counted.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in the child interpreter; prints one JSON line of phase timings in seconds
+CHILD = r'''
+import io, json, sys, time
+started = time.perf_counter()
+from config.wsgi import application
+booted = time.perf_counter()
+
+from django.conf import settings
+from django.test import RequestFactory
+
+hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+environ = RequestFactory()._base_environ(PATH_INFO=sys.argv[1], HTTP_HOST=hosts[0] if hosts else 'localhost')
+
+def serve():
+    statuses = []
+    body = application(dict(environ, **{'wsgi.input': io.BytesIO()}), lambda status, headers, exc_info=None: statuses.append(status))
+    b''.join(body)
+    return statuses[0]
+
+status = serve()
+first = time.perf_counter()
+serve()
+second = time.perf_counter()
+
+from links.services import container
+print(json.dumps({
+    'boot': booted - started,
+    'first_request': first - booted,
+    'warm_request': second - first,
+    'status': status,
+    'built': sorted(name for name in ('link', 'click', 'analytics', 'routing', 'campaign') if container.is_built(name)),
+    'heavy': sorted(name for name in ('numpy', 'aiohttp', 'pyarrow', 'segno') if name in sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = "Benchmark worker start-up: interpreter, boot imports and the first request."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/links/', help="Request path served after boot")
+        parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters to start")
+        parser.add_argument(
+            '--budget-ms', type=float, default=0,
+            help="Fail if the median time to first response exceeds this (0 = report only)",
+        )
+    
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        runs = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, '-c', CHILD, options['path']],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            total = time.perf_counter() - start
+            if completed.returncode:
+                raise CommandError(f"Worker failed to start:\n{completed.stderr}")
+            run = json.loads(completed.stdout.strip().splitlines()[-1])
+            # Interpreter start-up and teardown, outside the child's own clocks
+            run['interpreter'] = total - run['boot'] - run['first_request'] - run['warm_request']
+            run['to_first_response'] = total - run['warm_request']
+            runs.append(run)
+        
+        self.stdout.write(f"{options['path']} -> {runs[-1]['status']} over {len(runs)} cold starts")
+        for phase in ('interpreter', 'boot', 'first_request', 'warm_request', 'to_first_response'):
+            values = [run[phase] * 1000 for run in runs]
+            self.stdout.write(
+                f"{phase:18}: median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms"
+            )
+        self.stdout.write(f"services built    : {', '.join(runs[-1]['built']) or '-'}")
+        self.stdout.write(f"heavy modules     : {', '.join(runs[-1]['heavy']) or '-'}")
+        
+        median = statistics.median(run['to_first_response'] for run in runs) * 1000
+        if options['budget_ms'] and median > options['budget_ms']:
+            raise CommandError(
+                f"Median time to first response {median:.1f} ms exceeds the {options['budget_ms']:.0f} ms budget"
+            )
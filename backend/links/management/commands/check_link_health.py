@@ -0,0 +1,45 @@
+"""
+Management command probing link destinations for dead targets.
+
+Checks links that were never checked or whose last check is older than
+LINKS_HEALTH_CHECK_TTL, using concurrent HEAD-then-GET requests (see
+links.health). Results are stored on each link, e.g. from cron:
+    check_link_health --max-links 20000 --concurrency 200
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...health import HealthChecker, STATUSES, aiohttp
+from ...services import get_default_services
+
+
+class Command(BaseCommand):
+    help = "Probe link destinations and record their health status."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Links per select/probe/update round")
+        parser.add_argument('--max-links', type=int, help="Stop after this many links (0 = all due links)")
+        parser.add_argument('--ttl', type=float, help="Seconds before a link is checked again")
+        parser.add_argument('--concurrency', type=int, help="Maximum open connections")
+        parser.add_argument('--per-host', type=int, help="Maximum connections per host")
+        parser.add_argument('--timeout', type=float, help="Seconds allowed per URL")
+
+    def handle(self, *args, **options):
+        if aiohttp is None:
+            raise CommandError("Link health checks require the aiohttp package")
+
+        checker = HealthChecker(
+            concurrency=options['concurrency'],
+            per_host=options['per_host'],
+            timeout=options['timeout'],
+            ttl=options['ttl'],
+        )
+        link_service, _, _ = get_default_services()
+        counts = link_service.check_link_health(
+            checker=checker,
+            batch_size=options['batch_size'],
+            max_links=options['max_links'],
+        )
+
+        summary = ', '.join(f"{counts.get(status, 0)} {status}" for status in STATUSES)
+        self.stdout.write(f"Checked {sum(counts.values())} links: {summary}")
@@ -0,0 +1,42 @@
+"""
+Management command compacting clicks into columnar analytics segments.
+
+The scheduler runs the same compaction every LINKS_SEGMENT_COMPACTION_INTERVAL
+seconds. Commands that change or delete compacted clicks (backfill_geoip,
+sweep_expired_links, rebalance_shards --delete-source) rewrite the segments
+they touch; --rebuild recompacts every shard from scratch instead.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...segments import get_segment_store
+from ...services import get_default_services
+from ...sharding import get_shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Compact aged clicks into immutable columnar segments for analytics."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segment-rows', type=int, help="Maximum clicks per segment")
+        parser.add_argument('--delay', type=float, help="Seconds a click must age before compaction")
+        parser.add_argument('--rebuild', action='store_true', help="Delete existing segments first")
+
+    def handle(self, *args, **options):
+        store = get_segment_store()
+        if store is None:
+            raise CommandError("Columnar analytics need NumPy and LINKS_SEGMENT_DIR")
+
+        if options['rebuild']:
+            for alias in get_shard_aliases():
+                store.drop(alias)
+
+        _, _, analytics_service = get_default_services()
+        compacted = analytics_service.compact_clicks(
+            segment_rows=options['segment_rows'], delay=options['delay']
+        )
+        for alias in get_shard_aliases():
+            segments = store.segments(alias)
+            rows = sum(segment.rows for segment in segments)
+            self.stdout.write(f"{alias}: {len(segments)} segments, {rows} clicks")
+        self.stdout.write(f"Compacted {compacted} clicks")
@@ -0,0 +1,65 @@
+"""
+Management command importing links written by export_links.
+
+Rows are read incrementally and inserted with one bulk_create per shard
+and batch; click totals and creation times are kept as exported. Rows
+that fail validation are reported on stderr and skipped:
+    import_links links.parquet --on-conflict update
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import transfer
+from .export_links import _format_for
+
+
+class Command(BaseCommand):
+    help = "Bulk-load links from a CSV, NDJSON or Parquet export."
+
+    PROGRESS_EVERY = 100000
+    # Invalid rows listed individually; the rest are only counted
+    MAX_REPORTED_ERRORS = 100
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Export file to read")
+        parser.add_argument('--format', dest='fmt', choices=transfer.FORMATS, help="Defaults to the file extension")
+        parser.add_argument(
+            '--on-conflict',
+            choices=[transfer.SKIP, transfer.UPDATE],
+            default=transfer.SKIP,
+            help="Keep (skip) or overwrite (update) links whose domain and slug already exist",
+        )
+        parser.add_argument('--batch-size', type=int, help="Rows per bulk insert")
+
+    def handle(self, *args, **options):
+        fmt = options['fmt'] or _format_for(options['path'])
+        if fmt is None:
+            raise CommandError("Cannot infer the format from the file name; pass --format")
+        if fmt not in transfer.available_formats():
+            raise CommandError(f"The {fmt} format is not available (missing optional dependency)")
+
+        reported = 0
+        invalid = 0
+
+        def progress(processed):
+            nonlocal reported
+            if processed - reported >= self.PROGRESS_EVERY:
+                self.stderr.write(f"{processed} rows")
+                reported = processed
+
+        def on_error(number, errors):
+            nonlocal invalid
+            invalid += 1
+            if invalid <= self.MAX_REPORTED_ERRORS:
+                details = '; '.join(f"{field}: {' '.join(map(str, messages))}" for field, messages in errors.items())
+                self.stderr.write(f"Row {number} skipped: {details}")
+
+        with open(options['path'], 'rb') as handle:
+            result = transfer.import_links(
+                transfer.read_rows(handle, fmt),
+                on_conflict=options['on_conflict'],
+                batch_size=options['batch_size'],
+                progress=progress,
+                on_error=on_error,
+            )
+        self.stdout.write(f"Processed {result['processed']} rows, skipped {result['invalid']} invalid")
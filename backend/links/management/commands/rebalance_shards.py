@@ -0,0 +1,246 @@
+"""
+Management command moving a bucket range of links, clicks and routing rules between shards.
+
+Typical flow for moving buckets 0-255 to shard_1:
+    1. rebalance_shards --buckets 0-255 --to shard_1
+       (copies; idempotent, safe while the old map is live)
+    2. Point LINKS_SHARD_MAP at the new owner and deploy (restarts workers,
+       which also drops redirect caches holding rows from the old shard)
+    3. rebalance_shards --buckets 0-255 --to shard_1 --delete-source
+       (copies stragglers, then deletes the range from the old shards)
+
+Each run records, in a ShardMoveCheckpoint on the default database, the id
+up to which source clicks were copied. Later runs copy the clicks recorded
+after that point for links already on the target, and add them to those
+links' counters. Clicks recorded on the target after the switch are left
+as they are. Runs before the switch only copy clicks older than --settle
+seconds, so a click whose transaction is still open is not skipped.
+Repeat clicks counted in raw_click_count on the source after the first
+copy, and link edits made there in between, are not carried over.
+Deleting the range rewrites the source's columnar segments that held it.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from ...models import Click, Link, RoutingRule, ShardMoveCheckpoint
+from ...services import get_default_services
+from ...sharding import NUM_BUCKETS, get_shard_aliases, shard_for_bucket
+
+
+def _clone(instance, **overrides):
+    """Unsaved copy of a model instance with every concrete field except the pk."""
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key
+    }
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def _bulk_copy(alias, originals, copies):
+    """
+    Insert copies and restore their auto_now_add values, which Django
+    overwrites with the current time on insert.
+    """
+    model = type(copies[0])
+    model.objects.using(alias).bulk_create(copies)
+    auto_fields = [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    if auto_fields:
+        for copy, original in zip(copies, originals):
+            for attname in auto_fields:
+                setattr(copy, attname, getattr(original, attname))
+        model.objects.using(alias).bulk_update(copies, auto_fields)
+
+
+class Command(BaseCommand):
+    help = "Copy (and optionally delete) a bucket range of links, their clicks and routing rules between shards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buckets', required=True, help="Inclusive bucket range, e.g. 0-255")
+        parser.add_argument('--to', dest='target', required=True, help="Target database alias")
+        parser.add_argument('--from', dest='source', help="Source alias (defaults to every other shard)")
+        parser.add_argument('--batch-size', type=int, default=500, help="Links per copy transaction")
+        parser.add_argument(
+            '--settle', type=float, default=60,
+            help="Seconds a click must age before it is copied (ignored with --delete-source)",
+        )
+        parser.add_argument(
+            '--delete-source',
+            action='store_true',
+            help="Delete the range from sources after copying (requires the shard map to point at --to)",
+        )
+
+    def handle(self, *args, **options):
+        first, last = self._parse_range(options['buckets'])
+        target = options['target']
+        aliases = get_shard_aliases()
+        if target not in aliases:
+            raise CommandError(f"Unknown shard alias: {target}")
+
+        sources = [options['source']] if options['source'] else [a for a in aliases if a != target]
+        for source in sources:
+            if source not in aliases or source == target:
+                raise CommandError(f"Invalid source alias: {source}")
+
+        if options['delete_source']:
+            owners = {shard_for_bucket(bucket) for bucket in range(first, last + 1)}
+            if owners != {target}:
+                raise CommandError(
+                    "Refusing to delete: LINKS_SHARD_MAP does not assign the whole range to "
+                    f"{target} yet (owners: {', '.join(sorted(owners))})"
+                )
+
+        # Once the map points at the target, sources get no new clicks; copy all of them
+        settle = 0 if options['delete_source'] else options['settle']
+        for source in sources:
+            copied_links, copied_clicks = self._copy(source, target, first, last, options['batch_size'], settle)
+            self.stdout.write(
+                f"{source} -> {target}: copied {copied_links} links, {copied_clicks} clicks"
+            )
+            if options['delete_source']:
+                deleted = self._delete(source, first, last, options['batch_size'])
+                self.stdout.write(f"{source}: deleted {deleted} links")
+
+    def _parse_range(self, value):
+        try:
+            first, last = (int(part) for part in value.split('-', 1))
+        except ValueError:
+            raise CommandError("--buckets must look like FIRST-LAST")
+        if not 0 <= first <= last < NUM_BUCKETS:
+            raise CommandError(f"Bucket range must lie within 0-{NUM_BUCKETS - 1}")
+        return first, last
+
+    def _range(self, alias, first, last):
+        return Link.objects.using(alias).filter(bucket__gte=first, bucket__lte=last).order_by('pk')
+
+    def _copy(self, source, target, first, last, batch_size, settle):
+        checkpoint, first_run = ShardMoveCheckpoint.objects.get_or_create(
+            source=source, target=target, first_bucket=first, last_bucket=last,
+        )
+        low = checkpoint.click_watermark
+        high = max(low, self._click_high_water(source, settle))
+
+        copied_links = copied_clicks = 0
+        last_pk = 0
+        while True:
+            # Clicks above the watermark are left for the next run; so are their counts
+            batch = list(
+                self._range(source, first, last).filter(pk__gt=last_pk).annotate(
+                    later_clicks=Count('click', filter=Q(click__pk__gt=high, click__is_bot=False)),
+                    later_bot_clicks=Count('click', filter=Q(click__pk__gt=high, click__is_bot=True)),
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            target_ids = {
+                (domain_id, slug): pk
+                for domain_id, slug, pk in Link.objects.using(target)
+                .filter(slug__in=[link.slug for link in batch])
+                .values_list('domain_id', 'slug', 'pk')
+            }
+            pending = [link for link in batch if (link.domain_id, link.slug) not in target_ids]
+            # Links copied by a previous run only need the clicks recorded since
+            existing = {
+                link.pk: target_ids[(link.domain_id, link.slug)]
+                for link in batch if (link.domain_id, link.slug) in target_ids
+            }
+
+            with transaction.atomic(using=target):
+                if pending:
+                    copies = [
+                        _clone(
+                            link,
+                            click_count=link.click_count - link.later_clicks,
+                            bot_click_count=link.bot_click_count - link.later_bot_clicks,
+                            raw_click_count=link.raw_click_count - link.later_clicks - link.later_bot_clicks,
+                        )
+                        for link in pending
+                    ]
+                    _bulk_copy(target, pending, copies)
+                    new_ids = {link.pk: copy.pk for link, copy in zip(pending, copies)}
+                    self._copy_rules(source, target, new_ids)
+                    copied_clicks += self._copy_clicks(source, target, new_ids, batch_size, 0, high, count=False)
+                    copied_links += len(pending)
+                # Without a checkpoint there is no telling which of their clicks are already there
+                if existing and not first_run and high > low:
+                    copied_clicks += self._copy_clicks(source, target, existing, batch_size, low, high, count=True)
+
+        checkpoint.click_watermark = high
+        checkpoint.save(update_fields=['click_watermark', 'updated_at'])
+        return copied_links, copied_clicks
+
+    def _click_high_water(self, source, settle):
+        """Highest source click id that is safe to copy now."""
+        clicks = Click.objects.using(source)
+        if settle:
+            clicks = clicks.filter(timestamp__lt=timezone.now() - timedelta(seconds=settle))
+        return clicks.aggregate(high=Max('pk'))['high'] or 0
+
+    def _copy_rules(self, source, target, new_ids):
+        rules = list(RoutingRule.objects.using(source).filter(link_id__in=list(new_ids)))
+        if rules:
+            RoutingRule.objects.using(target).bulk_create(
+                [_clone(rule, link_id=new_ids[rule.link_id]) for rule in rules]
+            )
+
+    def _copy_clicks(self, source, target, new_ids, batch_size, low, high, count):
+        """Copy the clicks of the given links with low < id <= high, optionally adding them to counters."""
+        copied = 0
+        clicks = (
+            Click.objects.using(source)
+            .filter(short_url_id__in=list(new_ids), pk__gt=low, pk__lte=high)
+            .order_by('pk')
+            .iterator(chunk_size=batch_size)
+        )
+        chunk = []
+        for click in clicks:
+            chunk.append(click)
+            if len(chunk) >= batch_size:
+                copied += self._insert_clicks(target, chunk, new_ids, count=count)
+                chunk = []
+        if chunk:
+            copied += self._insert_clicks(target, chunk, new_ids, count=count)
+        return copied
+
+    def _insert_clicks(self, target, chunk, new_ids, count):
+        copies = [_clone(click, short_url_id=new_ids[click.short_url_id]) for click in chunk]
+        _bulk_copy(target, chunk, copies)
+        if count:
+            # Straggler clicks of links copied earlier are not in their copied counters yet
+            totals = {}
+            for copy in copies:
+                human, bots = totals.get(copy.short_url_id, (0, 0))
+                totals[copy.short_url_id] = (human + (not copy.is_bot), bots + copy.is_bot)
+            for link_id, (human, bots) in totals.items():
+                Link.objects.using(target).filter(pk=link_id).update(
+                    click_count=F('click_count') + human,
+                    bot_click_count=F('bot_click_count') + bots,
+                    raw_click_count=F('raw_click_count') + human + bots,
+                )
+        return len(copies)
+
+    def _delete(self, source, first, last, batch_size):
+        deleted_ids = []
+        while True:
+            ids = list(self._range(source, first, last).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                if deleted_ids:
+                    _, _, analytics_service = get_default_services()
+                    analytics_service.recompact_clicks(source, link_ids=deleted_ids)
+                return len(deleted_ids)
+            with transaction.atomic(using=source):
+                Click.objects.using(source).filter(short_url_id__in=ids).delete()
+                RoutingRule.objects.using(source).filter(link_id__in=ids).delete()
+                Link.objects.using(source).filter(pk__in=ids).delete()
+            deleted_ids.extend(ids)
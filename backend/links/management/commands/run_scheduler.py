@@ -0,0 +1,52 @@
+"""
+Management command running the periodic job scheduler.
+
+This is how periodic jobs are meant to run: one dedicated process (or a
+few, the leases keep each run on one of them). Web workers only start a
+scheduler of their own when LINKS_SCHEDULER_ENABLED is set. The command
+can also run due jobs once or print the last-run stats of every job.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...scheduler import get_scheduler
+
+
+class Command(BaseCommand):
+    help = "Run periodic maintenance jobs, or show their last-run duration and lag."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run every due job once and exit")
+        parser.add_argument('--status', action='store_true', help="Print job stats and exit")
+
+    def handle(self, *args, **options):
+        scheduler = get_scheduler()
+
+        if options['status']:
+            for job in scheduler.status():
+                duration = '-' if job['last_duration'] is None else f"{job['last_duration']:.3f}s"
+                lag = '-' if job['last_lag'] is None else f"{job['last_lag']:.3f}s"
+                state = f"running on {job['owner']}" if job['running'] else f"next {job['next_run_at']}"
+                self.stdout.write(
+                    f"{job['name']}: every {job['interval']:g}s, runs={job['run_count']}, "
+                    f"duration={duration}, lag={lag}, {state}"
+                )
+                if job['last_error']:
+                    self.stdout.write(f"  last error: {job['last_error']}")
+            return
+
+        if options['once']:
+            for job in scheduler.jobs:
+                ran = scheduler.run_job(job.name)
+                self.stdout.write(f"{job.name}: {'ran' if ran else 'not due'}")
+            return
+
+        scheduler.start()
+        self.stdout.write(f"Scheduler running {len(scheduler.jobs)} jobs; press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scheduler.stop()
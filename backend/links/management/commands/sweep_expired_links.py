@@ -0,0 +1,44 @@
+"""
+Management command deleting links past their expiry time or click limit.
+
+Runs shard by shard in small batches (see LinkService.sweep_expired_links),
+so it is safe to run against a live database, e.g. from cron:
+    sweep_expired_links --archive /var/archive/links.ndjson
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ...services import get_default_services
+
+
+class Command(BaseCommand):
+    help = "Delete (and optionally archive) expired links and their clicks in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Rows per select/delete")
+        parser.add_argument(
+            '--archive',
+            metavar='PATH',
+            help="Append deleted links and clicks to this NDJSON file before deleting them",
+        )
+
+    def handle(self, *args, **options):
+        link_service, _, _ = get_default_services()
+
+        if not options['archive']:
+            deleted = link_service.sweep_expired_links(batch_size=options['batch_size'])
+        else:
+            with open(options['archive'], 'a', encoding='utf-8') as handle:
+                def archive(kind, rows):
+                    for row in rows:
+                        handle.write(json.dumps({'type': kind, **row}, cls=DjangoJSONEncoder) + '\n')
+                    handle.flush()
+
+                deleted = link_service.sweep_expired_links(
+                    batch_size=options['batch_size'], archive=archive
+                )
+
+        self.stdout.write(f"Deleted {deleted} expired links")
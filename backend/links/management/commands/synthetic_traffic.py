@@ -0,0 +1,403 @@
+"""
+Management command generating synthetic data and replaying traffic.
+
+    synthetic_traffic generate --links 100000 --clicks 5000000
+        Bulk-inserts links and Zipf-distributed clicks spread over --days,
+        with the denormalized link counters already consistent.
+
+    synthetic_traffic replay --url http://127.0.0.1:8000 --rps 500 --concurrency 64
+        Sends an open-loop mix of redirect/shorten/analytics requests for
+        Zipf-ranked slugs (or the requests listed in --log) and reports
+        latency percentiles and status codes per request kind, plus database
+        queries per request when the server sets LINKS_QUERY_COUNT_HEADER.
+        Without --url the requests run in-process through Django's test
+        client and queries are counted directly.
+
+Latency is measured from each request's scheduled start, so a saturated
+server shows up as queueing delay instead of a silently lower send rate.
+"""
+
+import json
+import queue
+import random
+import re
+import string
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from datetime import timedelta
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from ...models import Click, Link
+from ...repositories import LinkRepository
+from ...sharding import bucket_for_slug, group_by_shard
+
+
+SLUG_CHARS = string.ascii_letters + string.digits
+BROWSER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0',
+)
+BOT_AGENTS = (
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'facebookexternalhit/1.1',
+    'Slackbot-LinkExpanding 1.0',
+    'curl/8.5.0',
+)
+REFERRERS = ('', '', '', 'https://twitter.com/', 'https://www.google.com/', 'https://news.ycombinator.com/')
+COUNTRIES = ('US', 'US', 'US', 'DE', 'GB', 'IN', 'BR', 'FR', 'JP', 'CA', '')
+LOG_REQUEST = re.compile(r'"(?P<method>[A-Z]+) (?P<path>\S+)[^"]*"')
+
+
+def _zipf_cum_weights(count, exponent):
+    """Cumulative Zipf weights for ranks 1..count."""
+    total = 0.0
+    weights = []
+    for rank in range(1, count + 1):
+        total += rank ** -exponent
+        weights.append(total)
+    return weights
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic links/clicks, or replay Zipf-distributed or recorded traffic."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        generate = subparsers.add_parser('generate', help="Bulk-insert synthetic links and clicks")
+        generate.add_argument('--links', type=int, default=10000, help="Links to create")
+        generate.add_argument('--clicks', type=int, default=100000, help="Clicks to create")
+        generate.add_argument('--zipf', type=float, default=1.1, help="Zipf exponent of clicks over links")
+        generate.add_argument('--bot-ratio', type=float, default=0.05, help="Fraction of clicks from bots")
+        generate.add_argument('--days', type=int, default=30, help="Spread click timestamps over this many days (0 = now)")
+        generate.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert")
+        generate.add_argument('--seed', type=int, default=None, help="Random seed for reproducible data")
+
+        replay = subparsers.add_parser('replay', help="Replay traffic and report latency")
+        replay.add_argument('--url', help="Server base URL (default: in-process test client)")
+        replay.add_argument('--rps', type=float, default=100.0, help="Target requests per second")
+        replay.add_argument('--duration', type=float, default=10.0, help="Seconds of traffic to send")
+        replay.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+        replay.add_argument(
+            '--mix',
+            default='redirect=90,analytics=8,shorten=2',
+            help="Request kind weights, e.g. redirect=90,analytics=8,shorten=2",
+        )
+        replay.add_argument('--zipf', type=float, default=1.1, help="Zipf exponent of requests over slugs")
+        replay.add_argument('--slugs', type=int, default=10000, help="Most clicked slugs to draw from")
+        replay.add_argument('--clients', type=int, default=1000, help="Distinct client IPs sent in X-Forwarded-For (honoured with LINKS_TRUSTED_PROXY_COUNT >= 1)")
+        replay.add_argument('--log', help="Replay 'METHOD PATH' lines or access-log lines from this file instead")
+        replay.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout in seconds")
+        replay.add_argument('--seed', type=int, default=None, help="Random seed")
+
+    def handle(self, *args, **options):
+        if options['action'] == 'generate':
+            self._generate(options)
+        else:
+            self._replay(options)
+
+    # Data generation
+
+    def _generate(self, options):
+        rng = random.Random(options['seed'])
+        link_total, click_total = options['links'], options['clicks']
+        batch_size = options['batch_size']
+        if link_total <= 0:
+            raise CommandError("--links must be positive")
+        started = time.perf_counter()
+
+        # Decide every click's link first so links are inserted with final counters
+        cum_weights = _zipf_cum_weights(link_total, options['zipf'])
+        ranks = list(range(link_total))
+        targets, bots = array('I'), array('B')
+        for offset in range(0, click_total, batch_size):
+            size = min(batch_size, click_total - offset)
+            targets.extend(rng.choices(ranks, cum_weights=cum_weights, k=size))
+            bots.extend(rng.random() < options['bot_ratio'] for _ in range(size))
+        human_counts, bot_counts = [0] * link_total, [0] * link_total
+        for rank, is_bot in zip(targets, bots):
+            if is_bot:
+                bot_counts[rank] += 1
+            else:
+                human_counts[rank] += 1
+
+        slugs = self._fresh_slugs(rng, link_total)
+        rank_of = {slug: rank for rank, slug in enumerate(slugs)}
+        homes = [None] * link_total  # rank -> (alias, pk)
+        for alias, shard_slugs in group_by_shard(slugs).items():
+            for offset in range(0, len(shard_slugs), batch_size):
+                batch = [
+                    Link(
+                        original_url=f"https://example.com/synthetic/{slug}",
+                        slug=slug,
+                        bucket=bucket_for_slug(slug),
+                        click_count=human_counts[rank_of[slug]],
+                        bot_click_count=bot_counts[rank_of[slug]],
+                        raw_click_count=human_counts[rank_of[slug]] + bot_counts[rank_of[slug]],
+                    )
+                    for slug in shard_slugs[offset:offset + batch_size]
+                ]
+                with transaction.atomic(using=alias):
+                    Link.objects.using(alias).bulk_create(batch)
+                for link in batch:
+                    homes[rank_of[link.slug]] = (alias, link.pk)
+        links_done = time.perf_counter()
+
+        now = timezone.now()
+        span = options['days'] * 86400
+        for offset in range(0, click_total, batch_size):
+            by_alias = defaultdict(list)
+            for index in range(offset, min(offset + batch_size, click_total)):
+                alias, link_id = homes[targets[index]]
+                is_bot = bool(bots[index])
+                by_alias[alias].append(Click(
+                    short_url_id=link_id,
+                    ip_address=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                    user_agent=rng.choice(BOT_AGENTS if is_bot else BROWSER_AGENTS),
+                    referrer=rng.choice(REFERRERS),
+                    is_bot=is_bot,
+                    country=rng.choice(COUNTRIES),
+                ))
+            for alias, clicks in by_alias.items():
+                with transaction.atomic(using=alias):
+                    Click.objects.using(alias).bulk_create(clicks)
+                    if span:
+                        # bulk_create applies auto_now_add; spread the timestamps afterwards
+                        for click in clicks:
+                            click.timestamp = now - timedelta(seconds=rng.random() * span)
+                        Click.objects.using(alias).bulk_update(clicks, ['timestamp'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Created {link_total} links in {links_done - started:.1f}s and "
+            f"{click_total} clicks in {elapsed - (links_done - started):.1f}s "
+            f"({(link_total + click_total) / elapsed:,.0f} rows/s)"
+        )
+
+    def _fresh_slugs(self, rng, count):
+        """Random 7-character slugs that are unique and not yet in the database."""
+        slugs = set()
+        while len(slugs) < count:
+            candidates = set()
+            while len(slugs) + len(candidates) < count:
+                slug = ''.join(rng.choices(SLUG_CHARS, k=7))
+                if slug not in slugs:
+                    candidates.add(slug)
+            candidates = list(candidates)
+            for offset in range(0, len(candidates), 1000):
+                chunk = set(candidates[offset:offset + 1000])
+                taken = {link.slug for link in LinkRepository.get_by_slugs(chunk)}
+                slugs.update(chunk - taken)
+        # Sets iterate in hash order; sort first so --seed reproduces the ranking
+        ordered = sorted(slugs)
+        rng.shuffle(ordered)
+        return ordered
+
+    # Traffic replay
+
+    def _replay(self, options):
+        rng = random.Random(options['seed'])
+        requests = self._request_source(options, rng)
+        total = int(options['rps'] * options['duration'])
+        interval = 1.0 / options['rps']
+
+        pending = queue.Queue()
+        results = []
+        results_lock = threading.Lock()
+        send = self._http_sender(options) if options['url'] else self._local_sender()
+        client_ips = [
+            f"198.18.{index // 250 % 256}.{index % 250 + 1}" for index in range(max(1, options['clients']))
+        ]
+
+        def client():
+            local = threading.local()
+            while True:
+                item = pending.get()
+                if item is None:
+                    # In-process requests opened this thread's own database connections
+                    connections.close_all()
+                    return
+                kind, method, path, body, scheduled = item
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                sent = time.perf_counter()
+                headers = {
+                    'User-Agent': rng.choice(BROWSER_AGENTS),
+                    'X-Forwarded-For': rng.choice(client_ips),
+                }
+                try:
+                    status, queries = send(local, method, path, body, headers)
+                except Exception as exc:
+                    status, queries = type(exc).__name__, None
+                finished = time.perf_counter()
+                with results_lock:
+                    results.append((kind, status, finished - scheduled, finished - sent, queries))
+
+        workers = [threading.Thread(target=client, daemon=True) for _ in range(options['concurrency'])]
+        for worker in workers:
+            worker.start()
+
+        started = time.perf_counter()
+        for index in range(total):
+            kind, method, path, body = next(requests)
+            pending.put((kind, method, path, body, started + index * interval))
+        for _ in workers:
+            pending.put(None)
+        for worker in workers:
+            worker.join()
+        self._report(results, time.perf_counter() - started, options['rps'])
+
+    def _request_source(self, options, rng):
+        if options['log']:
+            entries = []
+            with open(options['log'], encoding='utf-8') as handle:
+                for line in handle:
+                    match = LOG_REQUEST.search(line)
+                    method, path = (match['method'], match['path']) if match else (line.split() + ['', ''])[:2]
+                    if method and path.startswith('/'):
+                        entries.append((method.upper(), path))
+            if not entries:
+                raise CommandError(f"No requests found in {options['log']}")
+
+            def recorded():
+                while True:
+                    for method, path in entries:
+                        body = {'original_url': 'https://example.com/replayed'} if method == 'POST' else None
+                        yield self._classify(path), method, path, body
+            return recorded()
+
+        slugs = [link.slug for link in LinkRepository.get_most_clicked(options['slugs'])]
+        if not slugs:
+            raise CommandError("No links to replay against; run 'synthetic_traffic generate' first")
+        cum_weights = _zipf_cum_weights(len(slugs), options['zipf'])
+        mix = {}
+        for part in options['mix'].split(','):
+            kind, _, weight = part.partition('=')
+            if kind not in ('redirect', 'analytics', 'shorten') or not weight:
+                raise CommandError(f"Invalid --mix entry: {part!r}")
+            mix[kind] = float(weight)
+
+        def synthetic():
+            kinds, weights = list(mix), list(mix.values())
+            counter = 0
+            while True:
+                kind = rng.choices(kinds, weights)[0]
+                if kind == 'shorten':
+                    counter += 1
+                    yield kind, 'POST', '/api/shorten/', {'original_url': f"https://example.com/replay/{counter}"}
+                    continue
+                slug = rng.choices(slugs, cum_weights=cum_weights)[0]
+                path = f"/{slug}/" if kind == 'redirect' else f"/api/analytics/{slug}/"
+                yield kind, 'GET', path, None
+        return synthetic()
+
+    @staticmethod
+    def _classify(path):
+        if path.startswith('/api/analytics/'):
+            return 'analytics'
+        if path.startswith('/api/shorten/'):
+            return 'shorten'
+        if path.startswith('/api/'):
+            return 'api'
+        return 'redirect'
+
+    @staticmethod
+    def _http_sender(options):
+        target = urlsplit(options['url'])
+        connection_class = HTTPSConnection if target.scheme == 'https' else HTTPConnection
+        prefix = target.path.rstrip('/')
+
+        def send(local, method, path, body, headers):
+            connection = getattr(local, 'connection', None)
+            if connection is None:
+                connection = local.connection = connection_class(target.netloc, timeout=options['timeout'])
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            try:
+                connection.request(method, prefix + path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except Exception:
+                connection.close()
+                local.connection = None
+                raise
+            queries = response.getheader('X-Query-Count')
+            return response.status, int(queries) if queries is not None else None
+        return send
+
+    @staticmethod
+    def _local_sender():
+        from django.test import Client
+
+        def send(local, method, path, body, headers):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            queries = 0
+
+            def count(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(count))
+                response = client.generic(
+                    method, path,
+                    data=json.dumps(body) if body is not None else '',
+                    content_type='application/json',
+                    **extra,
+                )
+            return response.status_code, queries
+        return send
+
+    def _report(self, results, elapsed, target_rps):
+        self.stdout.write(
+            f"Sent {len(results)} requests in {elapsed:.1f}s "
+            f"({len(results) / elapsed:,.1f} req/s, target {target_rps:,.1f})"
+        )
+        by_kind = defaultdict(list)
+        for result in results:
+            by_kind[result[0]].append(result)
+
+        self.stdout.write(
+            f"{'kind':<10} {'count':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8} "
+            f"{'service':>8} {'queries':>7}  statuses"
+        )
+        for kind in sorted(by_kind):
+            rows = by_kind[kind]
+            latencies = sorted(row[2] * 1000 for row in rows)
+            service = sum(row[3] for row in rows) / len(rows) * 1000
+            counted = [row[4] for row in rows if row[4] is not None]
+            queries = f"{sum(counted) / len(counted):.2f}" if counted else 'n/a'
+            statuses = ', '.join(f"{status}={count}" for status, count in sorted(
+                Counter(row[1] for row in rows).items(), key=lambda item: str(item[0])
+            ))
+            self.stdout.write(
+                f"{kind:<10} {len(rows):>7} {_percentile(latencies, 0.5):>8.1f} {_percentile(latencies, 0.9):>8.1f} "
+                f"{_percentile(latencies, 0.99):>8.1f} {_percentile(latencies, 0.999):>8.1f} {latencies[-1]:>8.1f} "
+                f"{service:>8.1f} {queries:>7}  {statuses}"
+            )
+        self.stdout.write("Latencies in ms from scheduled start; 'service' is the mean time from send.")
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0003_rename_url_link_original_url_remove_link_clicks_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['timestamp'], name='click_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['short_url', '-timestamp'], name='click_link_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['ip_address'], name='click_ip_address_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['created_at'], name='link_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['-click_count'], name='link_click_count_idx'),
+        ),
+    ]
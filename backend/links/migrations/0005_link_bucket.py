@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:56
+
+import zlib
+
+from django.db import migrations, models
+
+
+def fill_buckets(apps, schema_editor):
+    # Mirrors links.sharding.bucket_for_slug at the time of this migration
+    Link = apps.get_model('links', 'Link')
+    db_alias = schema_editor.connection.alias
+    for link in Link.objects.using(db_alias).only('pk', 'slug').iterator(chunk_size=1000):
+        bucket = zlib.crc32(link.slug.encode('utf-8')) % 1024
+        Link.objects.using(db_alias).filter(pk=link.pk).update(bucket=bucket)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0004_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='bucket',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_buckets, migrations.RunPython.noop),
+    ]
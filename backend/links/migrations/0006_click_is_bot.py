@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0005_link_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='click',
+            name='is_bot',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='bot_click_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['short_url', 'is_bot', '-timestamp'], name='click_link_bot_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0006_click_is_bot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='click',
+            name='asn',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='click',
+            name='country',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:01
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_raw_click_count(apps, schema_editor):
+    Link = apps.get_model('links', 'Link')
+    Link.objects.using(schema_editor.connection.alias).update(
+        raw_click_count=F('click_count') + F('bot_click_count')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0007_click_geo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='raw_click_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_raw_click_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0008_link_raw_click_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='max_clicks',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='link_expires_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(condition=models.Q(('max_clicks__isnull', False)), fields=['max_clicks'], name='link_max_clicks_idx'),
+        ),
+    ]
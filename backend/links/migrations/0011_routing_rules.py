@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0010_scheduled_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='routing_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RoutingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.PositiveSmallIntegerField(default=0)),
+                ('device', models.CharField(blank=True, choices=[('mobile', 'Mobile'), ('tablet', 'Tablet'), ('desktop', 'Desktop'), ('bot', 'Bot')], default='', max_length=10)),
+                ('country', models.CharField(blank=True, default='', max_length=2)),
+                ('referrer', models.CharField(blank=True, default='', max_length=255)),
+                ('destination', models.URLField()),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('link', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='routing_rules', to='links.link')),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0011_routing_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='health_code',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='health_status',
+            field=models.CharField(blank=True, choices=[('ok', 'OK'), ('broken', 'Broken'), ('unreachable', 'Unreachable')], default='', editable=False, max_length=11),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['last_checked_at'], name='link_last_checked_idx'),
+        ),
+    ]
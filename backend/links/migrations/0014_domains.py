@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0013_campaigns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Domain',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=253, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='domain_id',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='link',
+            name='slug',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['slug'], name='link_slug_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='link',
+            constraint=models.UniqueConstraint(fields=('domain_id', 'slug'), name='link_domain_slug_unique'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0014_domains'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardMoveCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100)),
+                ('target', models.CharField(max_length=100)),
+                ('first_bucket', models.PositiveIntegerField()),
+                ('last_bucket', models.PositiveIntegerField()),
+                ('click_watermark', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'target', 'first_bucket', 'last_bucket'), name='shard_move_unique')],
+            },
+        ),
+    ]
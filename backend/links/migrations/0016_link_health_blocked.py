@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0015_shard_move_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='link',
+            name='health_status',
+            field=models.CharField(blank=True, choices=[('ok', 'OK'), ('broken', 'Broken'), ('unreachable', 'Unreachable'), ('blocked', 'Blocked')], default='', editable=False, max_length=11),
+        ),
+    ]
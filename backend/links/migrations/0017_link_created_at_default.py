@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0016_link_health_blocked'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='link',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
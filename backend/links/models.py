@@ -1,19 +1,235 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .sharding import bucket_for_slug
+
 # Create your models here.
+# Link.domain_id of links served on every host that is not a registered Domain
+PRIMARY_DOMAIN_ID = 0
+
+
 class Link(models.Model):
     original_url = models.URLField()
-    slug = models.CharField(max_length=10, unique=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Unique per domain, see link_domain_slug_unique
+    slug = models.CharField(max_length=10)
+    # A default rather than auto_now_add, so imports and shard moves can insert a given value
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     click_count = models.IntegerField(default=0)
+    bot_click_count = models.IntegerField(default=0)
+    # Every redirect, including repeats suppressed by the dedup window
+    raw_click_count = models.IntegerField(default=0)
+    # Shard bucket derived from the slug; lets rebalancing select ranges by index
+    bucket = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
+    # Optional lifetime limits, checked on the (possibly cached) instance at redirect time
+    expires_at = models.DateTimeField(null=True, blank=True)
+    max_clicks = models.PositiveIntegerField(null=True, blank=True)
+    # Bumped whenever the link's routing rules change; 0 means it never had any
+    routing_version = models.PositiveIntegerField(default=0, editable=False)
+    # Result of the last destination probe by links.health; blank until first checked
+    HEALTH_CHOICES = [
+        ('ok', 'OK'),
+        ('broken', 'Broken'),
+        ('unreachable', 'Unreachable'),
+        ('blocked', 'Blocked'),
+    ]
+    health_status = models.CharField(max_length=11, choices=HEALTH_CHOICES, blank=True, default='', editable=False)
+    health_code = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    last_checked_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Campaign row on the default database; a plain id because links are sharded
+    campaign_id = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    # Domain row on the default database, or PRIMARY_DOMAIN_ID; a plain id because links are sharded
+    domain_id = models.PositiveIntegerField(default=PRIMARY_DOMAIN_ID)
+
+    class Meta:
+        constraints = [
+            # Each domain is its own slug keyspace; also the index behind every slug lookup
+            models.UniqueConstraint(fields=['domain_id', 'slug'], name='link_domain_slug_unique'),
+        ]
+        indexes = [
+            # Slug lookups across every domain (admin search, rebalancing)
+            models.Index(fields=['slug'], name='link_slug_idx'),
+            models.Index(fields=['created_at'], name='link_created_at_idx'),
+            models.Index(fields=['-click_count'], name='link_click_count_idx'),
+            # Partial indexes: only links with a limit are visible to the sweeper
+            models.Index(
+                fields=['expires_at'],
+                name='link_expires_at_idx',
+                condition=models.Q(expires_at__isnull=False),
+            ),
+            models.Index(
+                fields=['max_clicks'],
+                name='link_max_clicks_idx',
+                condition=models.Q(max_clicks__isnull=False),
+            ),
+            # Lets the health checker pick the least recently checked links
+            models.Index(fields=['last_checked_at'], name='link_last_checked_idx'),
+        ]
 
     def __str__(self):
         return f"{self.slug} -> {self.original_url}"
 
+    def save(self, *args, **kwargs):
+        self.bucket = bucket_for_slug(self.slug)
+        super().save(*args, **kwargs)
+
+    @property
+    def cache_key(self) -> str:
+        """Key identifying the link in per-process caches (see link_cache_key)."""
+        return link_cache_key(self.domain_id, self.slug)
+
+    def is_expired(self, now=None) -> bool:
+        """True once expires_at has passed or max_clicks human clicks were recorded."""
+        if self.max_clicks is not None and self.click_count >= self.max_clicks:
+            return True
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
+
+def link_cache_key(domain_id: int, slug: str) -> str:
+    """
+    Key of a link in per-process caches and streams: the bare slug on the
+    primary domain, '<domain_id>/<slug>' elsewhere (slugs never contain '/').
+    """
+    return f"{domain_id}/{slug}" if domain_id else slug
+
+
 class Click(models.Model):
     short_url = models.ForeignKey(Link, on_delete=models.CASCADE)
     timestamp = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
-    referrer = models.URLField(null=True, blank=True)
\ No newline at end of file
+    referrer = models.URLField(null=True, blank=True)
+    is_bot = models.BooleanField(default=False)
+    country = models.CharField(max_length=2, blank=True, default='')
+    asn = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='click_timestamp_idx'),
+            models.Index(fields=['short_url', '-timestamp'], name='click_link_timestamp_idx'),
+            models.Index(fields=['ip_address'], name='click_ip_address_idx'),
+            models.Index(fields=['short_url', 'is_bot', '-timestamp'], name='click_link_bot_ts_idx'),
+        ]
+
+
+class RoutingRule(models.Model):
+    """
+    Alternative destination for a link, optionally limited to a device
+    class, country or referrer host. Rules with the same priority and
+    condition split traffic by weight; see links.routing.
+    """
+    DEVICE_CHOICES = [
+        ('mobile', 'Mobile'),
+        ('tablet', 'Tablet'),
+        ('desktop', 'Desktop'),
+        ('bot', 'Bot'),
+    ]
+
+    link = models.ForeignKey(Link, on_delete=models.CASCADE, related_name='routing_rules')
+    # Lower priorities are evaluated first
+    priority = models.PositiveSmallIntegerField(default=0)
+    device = models.CharField(max_length=10, choices=DEVICE_CHOICES, blank=True, default='')
+    country = models.CharField(max_length=2, blank=True, default='')
+    # Host matched together with its subdomains, e.g. "twitter.com"
+    referrer = models.CharField(max_length=255, blank=True, default='')
+    destination = models.URLField()
+    weight = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.link_id} -> {self.destination}"
+
+
+class Campaign(models.Model):
+    """
+    Named group of links with click counters maintained on every click,
+    so reports never have to aggregate member links or their clicks.
+    Lives on the default database only.
+    """
+    name = models.SlugField(max_length=50, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    click_count = models.BigIntegerField(default=0)
+    bot_click_count = models.BigIntegerField(default=0)
+    raw_click_count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class Domain(models.Model):
+    """
+    Branded host serving its own keyspace of short links.
+    Lives on the default database only; hosts are resolved from an
+    in-process snapshot (see links.domains).
+    """
+    host = models.CharField(max_length=253, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.host
+
+
+class CampaignDailyStats(models.Model):
+    """
+    Per-day (UTC) click counters of a campaign.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    click_count = models.BigIntegerField(default=0)
+    bot_click_count = models.BigIntegerField(default=0)
+    raw_click_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'day'], name='campaign_day_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} {self.day}"
+
+
+class ScheduledJob(models.Model):
+    """
+    Lease row for a periodic job run by links.scheduler.
+    A worker runs the job only after claiming the row with a conditional
+    UPDATE, so each run happens on exactly one process; the row also keeps
+    the stats of the last run.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    next_run_at = models.DateTimeField()
+    # Lease held while a run is in progress; expires if the owner dies
+    owner = models.CharField(max_length=255, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_duration = models.FloatField(null=True, blank=True)  # seconds
+    last_lag = models.FloatField(null=True, blank=True)  # seconds between due time and start
+    last_error = models.TextField(blank=True, default='')
+    run_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
+
+class ShardMoveCheckpoint(models.Model):
+    """
+    Progress of rebalance_shards copying a bucket range from one shard to another.
+    Clicks with an id up to click_watermark on the source have been copied,
+    so a later run only copies the clicks recorded after it.
+    """
+    source = models.CharField(max_length=100)
+    target = models.CharField(max_length=100)
+    first_bucket = models.PositiveIntegerField()
+    last_bucket = models.PositiveIntegerField()
+    click_watermark = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'target', 'first_bucket', 'last_bucket'], name='shard_move_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} -> {self.target} [{self.first_bucket}-{self.last_bucket}]"
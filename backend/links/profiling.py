@@ -0,0 +1,359 @@
+"""
+Opt-in sampling profiler for API endpoints.
+Follows Single Responsibility Principle by keeping performance capture out of views.
+
+ProfilingMiddleware profiles 1 in LINKS_PROFILING_SAMPLE_RATE requests of
+each URL name in LINKS_PROFILING_VIEWS. A single sampler thread snapshots
+the stacks of the threads serving those requests every few milliseconds
+(sys._current_frames), so unsampled requests pay nothing but a counter.
+With LINKS_PROFILING_TRACEMALLOC, sampled requests also record the bytes
+they allocated per allocation traceback.
+
+Stacks are aggregated per URL name in the collapsed format understood by
+flamegraph.pl and speedscope ("frame;frame;frame count"). Each process
+rewrites its own file under LINKS_PROFILING_DIR, capped at
+LINKS_PROFILING_MAX_STACKS distinct stacks; files older than
+LINKS_PROFILING_RETENTION are removed when profiles are read.
+
+QueryCountMiddleware (LINKS_QUERY_COUNT_HEADER) reports the database
+queries each request ran, for load tests such as `synthetic_traffic replay`.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+CPU = 'cpu'
+ALLOC = 'alloc'
+KINDS = (CPU, ALLOC)
+
+# Stacks beyond the per-profile cap are folded into this frame
+OTHER_STACK = '[other]'
+
+
+def _frame_name(code) -> str:
+    path = Path(code.co_filename)
+    return f"{path.parent.name}/{path.name}:{code.co_name}"
+
+
+def _collapse(frame) -> str:
+    """Collapsed representation of a frame's stack, outermost call first."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+class ProfileStore:
+    """
+    Bounded on-disk collapsed-stack profiles, one file per process, URL name and kind.
+    """
+
+    def __init__(self, directory: str, max_stacks: int = 5000, retention: float = 86400):
+        """
+        Initialize ProfileStore.
+
+        Args:
+            directory: Directory holding the profile files
+            max_stacks: Distinct stacks kept per profile before folding into OTHER_STACK
+            retention: Seconds after which an unmodified file is deleted
+        """
+        self.directory = Path(directory)
+        self.max_stacks = max_stacks
+        self.retention = retention
+        self._profiles: Dict[tuple, Counter] = {}
+        self._lock = threading.Lock()
+
+    def add(self, url_name: str, kind: str, stacks: Counter) -> None:
+        """
+        Merge samples into this process's in-memory profile.
+
+        Args:
+            url_name: URL name the samples belong to
+            kind: CPU (sample counts) or ALLOC (bytes)
+            stacks: Counter of collapsed stack -> weight
+        """
+        with self._lock:
+            profile = self._profiles.setdefault((url_name, kind), Counter())
+            for stack, weight in stacks.items():
+                if stack not in profile and len(profile) >= self.max_stacks:
+                    stack = OTHER_STACK
+                profile[stack] += weight
+
+    def flush(self) -> None:
+        """Rewrite this process's files from its in-memory profiles."""
+        with self._lock:
+            snapshot = {key: Counter(profile) for key, profile in self._profiles.items()}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for (url_name, kind), profile in snapshot.items():
+            target = self.directory / f"{url_name}.{kind}.{os.getpid()}.collapsed"
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                for stack, weight in profile.most_common():
+                    handle.write(f"{stack} {weight}\n")
+            os.replace(tmp, target)
+
+    def available(self) -> List[Dict]:
+        """
+        List the URL names and kinds that have captured profiles.
+
+        Returns:
+            List of {'url_name', 'kind', 'files', 'bytes'} dictionaries
+        """
+        summary = {}
+        for path in self._files():
+            url_name, kind, _ = path.name.rsplit('.', 3)[:3]
+            entry = summary.setdefault((url_name, kind), {'url_name': url_name, 'kind': kind, 'files': 0, 'bytes': 0})
+            entry['files'] += 1
+            entry['bytes'] += path.stat().st_size
+        return sorted(summary.values(), key=lambda entry: (entry['url_name'], entry['kind']))
+
+    def read(self, url_name: str, kind: str = CPU) -> Optional[str]:
+        """
+        Merge every process's profile for a URL name.
+
+        Args:
+            url_name: URL name to read
+            kind: CPU or ALLOC
+
+        Returns:
+            Collapsed-stack text, or None if nothing was captured
+        """
+        merged = Counter()
+        found = False
+        for path in self._files():
+            if not path.name.startswith(f"{url_name}.{kind}."):
+                continue
+            found = True
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    stack, _, weight = line.rstrip('\n').rpartition(' ')
+                    if stack and weight.isdigit():
+                        merged[stack] += int(weight)
+        if not found:
+            return None
+        return ''.join(f"{stack} {weight}\n" for stack, weight in merged.most_common())
+
+    def _files(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        cutoff = time.time() - self.retention
+        files = []
+        for path in self.directory.glob('*.collapsed'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            files.append(path)
+        return files
+
+
+class StackSampler:
+    """
+    Statistical profiler sampling the stacks of registered threads.
+    One daemon thread serves every profiled request in the process and
+    sleeps while none is active.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize StackSampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self._targets: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def begin(self, thread_id: int = None) -> None:
+        """
+        Start sampling a thread.
+
+        Args:
+            thread_id: Thread to sample (defaults to the calling thread)
+        """
+        thread_id = thread_id or threading.get_ident()
+        with self._lock:
+            self._targets[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='links-profiler', daemon=True)
+                self._thread.start()
+            self._active.set()
+
+    def end(self, thread_id: int = None) -> Counter:
+        """
+        Stop sampling a thread.
+
+        Args:
+            thread_id: Thread to stop sampling (defaults to the calling thread)
+
+        Returns:
+            Counter of collapsed stack -> number of samples
+        """
+        thread_id = thread_id or threading.get_ident()
+        with self._lock:
+            stacks = self._targets.pop(thread_id, Counter())
+            if not self._targets:
+                self._active.clear()
+        return stacks
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own_id:
+                        stacks[_collapse(frame)] += 1
+            del frames
+
+
+def allocation_stacks(before, after) -> Counter:
+    """
+    Bytes allocated between two tracemalloc snapshots, per allocation traceback.
+
+    Args:
+        before: Snapshot taken when the request started
+        after: Snapshot taken when the request finished
+
+    Returns:
+        Counter of collapsed stack -> bytes
+    """
+    stacks = Counter()
+    for stat in after.compare_to(before, 'traceback'):
+        if stat.size_diff <= 0:
+            continue
+        # tracemalloc lists the most recent frame first
+        stack = ';'.join(
+            f"{Path(frame.filename).parent.name}/{Path(frame.filename).name}:{frame.lineno}"
+            for frame in reversed(stat.traceback)
+        )
+        stacks[stack] += stat.size_diff
+    return stacks
+
+
+_default_store = None
+
+
+def get_profile_store() -> ProfileStore:
+    """
+    Get the process-wide profile store configured by LINKS_PROFILING_* settings.
+
+    Returns:
+        ProfileStore instance
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = ProfileStore(
+            getattr(settings, 'LINKS_PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'links-profiles')),
+            max_stacks=getattr(settings, 'LINKS_PROFILING_MAX_STACKS', 5000),
+            retention=getattr(settings, 'LINKS_PROFILING_RETENTION', 86400),
+        )
+    return _default_store
+
+
+class ProfilingMiddleware:
+    """
+    Profiles 1 in N requests of selected URL names.
+    Removed from the middleware chain entirely unless LINKS_PROFILING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LINKS_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = max(1, int(getattr(settings, 'LINKS_PROFILING_SAMPLE_RATE', 100)))
+        self.views = set(getattr(settings, 'LINKS_PROFILING_VIEWS', ()))
+        self.flush_every = getattr(settings, 'LINKS_PROFILING_FLUSH_EVERY', 10)
+        self.sampler = StackSampler(getattr(settings, 'LINKS_PROFILING_INTERVAL_MS', 5) / 1000.0)
+        self.store = get_profile_store()
+        self.trace_allocations = getattr(settings, 'LINKS_PROFILING_TRACEMALLOC', False)
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(getattr(settings, 'LINKS_PROFILING_TRACEMALLOC_FRAMES', 25))
+        self._requests = Counter()
+        self._captured = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        url_name = getattr(request, '_links_profiled', None)
+        if url_name is not None:
+            self._finish(request, url_name)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if url_name not in self.views:
+            return None
+        with self._lock:
+            self._requests[url_name] += 1
+            sampled = self._requests[url_name] % self.sample_rate == 0
+        if sampled:
+            request._links_profiled = url_name
+            if self.trace_allocations:
+                request._links_heap_before = tracemalloc.take_snapshot()
+            self.sampler.begin()
+        return None
+
+    def _finish(self, request, url_name: str) -> None:
+        self.store.add(url_name, CPU, self.sampler.end())
+        before = getattr(request, '_links_heap_before', None)
+        if before is not None:
+            # Includes allocations made by other threads meanwhile
+            self.store.add(url_name, ALLOC, allocation_stacks(before, tracemalloc.take_snapshot()))
+        with self._lock:
+            self._captured += 1
+            flush = self._captured % self.flush_every == 0
+        if flush:
+            self.store.flush()
+
+
+class QueryCountMiddleware:
+    """
+    Adds an X-Query-Count header with the number of database queries the
+    request ran on any database alias. Removed from the middleware chain
+    unless LINKS_QUERY_COUNT_HEADER.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LINKS_QUERY_COUNT_HEADER', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count))
+            response = self.get_response(request)
+        response['X-Query-Count'] = str(queries)
+        return response
+
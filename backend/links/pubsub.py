@@ -0,0 +1,379 @@
+"""
+In-process publish/subscribe for live click events.
+Follows Single Responsibility Principle by isolating event fan-out from
+click recording and from the streaming view.
+
+Publishers are synchronous (ClickService runs in request threads);
+subscribers are asyncio consumers on the ASGI event loop. Each subscriber
+owns a bounded queue that drops its oldest events when it falls behind, so
+a slow dashboard can never stall publishers or grow memory unbounded.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    A single subscriber's bounded event queue.
+    Safe to feed from any thread and to consume from one event loop.
+    """
+
+    def __init__(self, channel: str, max_size: int, loop: asyncio.AbstractEventLoop):
+        """
+        Initialize Subscription.
+
+        Args:
+            channel: Channel (slug) subscribed to
+            max_size: Maximum queued events before the oldest are dropped
+            loop: Event loop the consumer runs on
+        """
+        self.channel = channel
+        self.dropped = 0
+        self._queue = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def put(self, message: str) -> None:
+        """
+        Enqueue a message, dropping the oldest one if the queue is full.
+
+        Args:
+            message: Pre-encoded event payload
+        """
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(message)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Consumer loop already closed; the hub will unsubscribe it
+            pass
+
+    def drain(self) -> List[str]:
+        """
+        Take every queued message.
+
+        Returns:
+            Messages in publish order
+        """
+        with self._lock:
+            messages = list(self._queue)
+            self._queue.clear()
+            self._ready.clear()
+        return messages
+
+    def take_dropped(self) -> int:
+        """
+        Return and reset the number of messages dropped since the last call.
+
+        Returns:
+            Dropped message count
+        """
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait until messages are available.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if messages may be available, False on timeout
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class ClickStreamHub:
+    """
+    Local fan-out of messages to subscriptions in this process.
+    """
+
+    def __init__(self):
+        """Initialize ClickStreamHub with no subscribers."""
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, max_size: int) -> Subscription:
+        """
+        Register a subscriber on the current event loop.
+
+        Args:
+            channel: Channel (slug) to subscribe to
+            max_size: Bounded queue size for this subscriber
+
+        Returns:
+            New Subscription
+        """
+        subscription = Subscription(channel, max_size, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove a subscriber.
+
+        Args:
+            subscription: Subscription to remove
+        """
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def dispatch(self, channel: str, message: str) -> int:
+        """
+        Deliver a message to every local subscriber of a channel.
+
+        Args:
+            channel: Channel (slug)
+            message: Pre-encoded payload
+
+        Returns:
+            Number of subscribers the message was delivered to
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+
+    def subscriber_count(self, channel: Optional[str] = None) -> int:
+        """
+        Count subscribers, optionally for one channel.
+
+        Args:
+            channel: Channel to count, or None for all
+
+        Returns:
+            Number of subscribers
+        """
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+class LocalBackend:
+    """
+    Fan-out backend for a single process: publishes straight to the hub.
+    """
+
+    def __init__(self, hub: ClickStreamHub):
+        """
+        Initialize LocalBackend.
+
+        Args:
+            hub: Hub receiving published messages
+        """
+        self.hub = hub
+
+    def publish(self, channel: str, message: str) -> None:
+        """Deliver a message to local subscribers."""
+        self.hub.dispatch(channel, message)
+
+
+class RedisPatternListener:
+    """
+    Background subscription to a Redis channel pattern that survives outages.
+    When the connection drops, the listener logs it and resubscribes with
+    exponential backoff; messages published while it is disconnected are
+    lost, as with any Redis pub/sub subscriber.
+    """
+
+    def __init__(
+        self,
+        client,
+        pattern: str,
+        on_message: Callable[[str, str], None],
+        name: str,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        """
+        Initialize RedisPatternListener and start its thread.
+
+        Args:
+            client: redis.Redis client
+            pattern: Channel pattern to psubscribe to
+            on_message: Callable receiving (channel, data) as strings
+            name: Thread name, also used in log messages
+            backoff: Seconds before the first reconnection attempt
+            max_backoff: Upper bound of the doubling reconnection delay
+        """
+        self._client = client
+        self._pattern = pattern
+        self._on_message = on_message
+        self.name = name
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        delay = self.backoff
+        while not self._stop.is_set():
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self._pattern)
+                if delay > self.backoff:
+                    logger.info("%s resubscribed to Redis", self.name)
+                self.connected.set()
+                delay = self.backoff
+                for item in pubsub.listen():
+                    if self._stop.is_set():
+                        break
+                    self._dispatch(item)
+            except Exception:
+                logger.warning(
+                    "%s lost its Redis subscription; retrying in %.1fs", self.name, delay, exc_info=True
+                )
+            finally:
+                self.connected.clear()
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, self.max_backoff)
+
+    def _dispatch(self, item: Dict) -> None:
+        try:
+            self._on_message(item['channel'].decode(), item['data'].decode())
+        except Exception:
+            logger.exception("%s failed to handle a message", self.name)
+
+    def stop(self) -> None:
+        """Stop resubscribing; the thread exits after its current message."""
+        self._stop.set()
+
+
+class RedisBackend:
+    """
+    Cross-worker fan-out backend using Redis pub/sub.
+    Every worker publishes to Redis and a listener thread feeds its local hub,
+    so viewers connected to any worker see clicks recorded on every worker.
+    """
+
+    CHANNEL_PREFIX = 'links:clicks:'
+
+    def __init__(self, hub: ClickStreamHub, url: str):
+        """
+        Initialize RedisBackend and start its listener thread.
+
+        Args:
+            hub: Local hub receiving messages from Redis
+            url: Redis connection URL
+        """
+        import redis
+
+        self.hub = hub
+        self._client = redis.Redis.from_url(url)
+        self._listener = RedisPatternListener(
+            self._client, self.CHANNEL_PREFIX + '*', self._deliver, name='click-stream-redis',
+        )
+
+    def publish(self, channel: str, message: str) -> None:
+        """Publish a message to every worker through Redis."""
+        try:
+            self._client.publish(self.CHANNEL_PREFIX + channel, message)
+        except Exception:
+            logger.warning("Click stream publish failed", exc_info=True)
+
+    def _deliver(self, channel: str, message: str) -> None:
+        self.hub.dispatch(channel[len(self.CHANNEL_PREFIX):], message)
+
+
+class ClickBroker:
+    """
+    Entry point used by ClickService and the stream view.
+    Encodes each event once and hands it to the configured backend.
+    """
+
+    def __init__(self, backend=None, hub: ClickStreamHub = None):
+        """
+        Initialize ClickBroker.
+
+        Args:
+            backend: Fan-out backend (defaults to LocalBackend)
+            hub: Local hub (defaults to a new hub)
+        """
+        self.hub = hub or ClickStreamHub()
+        self.backend = backend or LocalBackend(self.hub)
+
+    def publish(self, slug: str, event: Dict) -> None:
+        """
+        Publish a click event for a slug.
+
+        Args:
+            slug: The link slug
+            event: JSON-serializable event payload
+        """
+        self.backend.publish(slug, json.dumps(event))
+
+    def subscribe(self, slug: str, max_size: int = None) -> Subscription:
+        """
+        Subscribe the current event loop to a slug's click events.
+
+        Args:
+            slug: The link slug
+            max_size: Queue bound (defaults to LINKS_CLICK_STREAM_QUEUE_SIZE)
+
+        Returns:
+            New Subscription
+        """
+        if max_size is None:
+            max_size = getattr(settings, 'LINKS_CLICK_STREAM_QUEUE_SIZE', 100)
+        return self.hub.subscribe(slug, max_size)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription."""
+        self.hub.unsubscribe(subscription)
+
+
+_default_broker = None
+_default_broker_lock = threading.Lock()
+
+
+def get_click_broker() -> ClickBroker:
+    """
+    Get the process-wide click broker, building it on first use.
+    The backend is chosen by LINKS_CLICK_STREAM_BACKEND ('local' or 'redis').
+
+    Returns:
+        ClickBroker instance
+    """
+    global _default_broker
+    if _default_broker is None:
+        with _default_broker_lock:
+            if _default_broker is None:
+                hub = ClickStreamHub()
+                backend = None
+                if getattr(settings, 'LINKS_CLICK_STREAM_BACKEND', 'local') == 'redis':
+                    backend = RedisBackend(hub, settings.LINKS_CLICK_STREAM_REDIS_URL)
+                _default_broker = ClickBroker(backend=backend, hub=hub)
+    return _default_broker
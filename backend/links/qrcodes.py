@@ -0,0 +1,259 @@
+"""
+QR code rendering with a content-addressed on-disk cache.
+Follows Single Responsibility Principle by keeping image generation and file caching out of views.
+
+Every rendering is addressed by a SHA-256 over the encoded text and the
+render options, which also serves as its strong ETag: the same inputs
+always produce the same bytes, so a conditional request can be answered
+without touching the disk and a hit is served straight from the file.
+Files live under LINKS_QR_CACHE_DIR in two-character fan-out directories
+and are written atomically. Hits refresh the file's mtime (at most once a
+minute), and when the directory outgrows LINKS_QR_CACHE_MAX_BYTES the
+least recently used files are deleted down to 90% of the cap.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional
+
+from django.conf import settings
+
+from .cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+try:
+    import segno
+except ImportError:  # pragma: no cover - optional dependency
+    segno = None
+
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+ERROR_LEVELS = ('L', 'M', 'Q', 'H')
+
+# Part of every cache key; bump when rendering output changes
+RENDER_VERSION = 1
+
+
+class QRCodeOptions(NamedTuple):
+    """Everything that determines a rendered QR code."""
+    data: str
+    fmt: str = 'png'
+    size: int = 256  # target width in pixels, rounded down to whole modules
+    error: str = 'M'
+    border: int = 4  # quiet zone in modules
+
+    @property
+    def key(self) -> str:
+        """Content address of the rendering (also its ETag)."""
+        encoded = '\0'.join(
+            str(part) for part in (RENDER_VERSION, self.fmt, self.size, self.error, self.border, self.data)
+        )
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def render_qr_code(options: QRCodeOptions) -> bytes:
+    """
+    Render a QR code.
+
+    Args:
+        options: Text and render options
+
+    Returns:
+        PNG or SVG bytes
+
+    Raises:
+        RuntimeError: If segno is not installed
+    """
+    if segno is None:
+        raise RuntimeError("QR code rendering requires the segno package")
+    qr = segno.make_qr(options.data, error=options.error, boost_error=False)
+    modules = qr.symbol_size(scale=1, border=options.border)[0]
+    buffer = BytesIO()
+    qr.save(buffer, kind=options.fmt, scale=max(1, options.size // modules), border=options.border)
+    return buffer.getvalue()
+
+
+class QRCodeCache:
+    """
+    Size-capped, content-addressed file cache of rendered QR codes.
+    Safe to share between threads and between processes using the same directory.
+    """
+
+    # Seconds between mtime refreshes of a hot file
+    TOUCH_INTERVAL = 60
+    # Renders attempted when eviction keeps deleting the file before it is opened
+    OPEN_ATTEMPTS = 3
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize QRCodeCache.
+
+        Args:
+            directory: Directory holding the cached files
+            max_bytes: Total size above which least recently used files are evicted
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._size = None  # estimated bytes on disk, measured in the background after the first write
+        self._evictor = None  # background thread measuring and evicting, while one runs
+
+    def path_for(self, options: QRCodeOptions) -> Path:
+        """Cache file path for a rendering."""
+        key = options.key
+        return self.directory / key[:2] / f"{key}.{options.fmt}"
+
+    def get_or_render(self, options: QRCodeOptions) -> Path:
+        """
+        Return the cached file for a rendering, rendering it on a miss.
+        Concurrent misses for the same rendering share one render.
+
+        Args:
+            options: Text and render options
+
+        Returns:
+            Path of the file holding the rendering
+        """
+        path = self.path_for(options)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return self._flight.do(options.key, lambda: self._render(options, path))
+        now = time.time()
+        if now - mtime > self.TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                return self._flight.do(options.key, lambda: self._render(options, path))
+        return path
+
+    def open_rendering(self, options: QRCodeOptions) -> BinaryIO:
+        """
+        Open the cached file for a rendering, rendering it on a miss.
+        An eviction in any process may delete the file between get_or_render()
+        and opening it; the rendering is then redone, and if it keeps losing
+        that race the bytes are served from memory.
+
+        Args:
+            options: Text and render options
+
+        Returns:
+            Binary file object positioned at the start of the rendering
+        """
+        for _ in range(self.OPEN_ATTEMPTS):
+            try:
+                return open(self.get_or_render(options), 'rb')
+            except FileNotFoundError:
+                continue
+        return BytesIO(render_qr_code(options))
+
+    def _render(self, options: QRCodeOptions, path: Path) -> Path:
+        if path.exists():
+            return path
+        content = render_qr_code(options)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(content)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(content)
+            start = (self._size is None or self._size > self.max_bytes) and self._evictor is None
+            if start:
+                self._evictor = threading.Thread(target=self._evict_in_background, name='links-qr-evict', daemon=True)
+                evictor = self._evictor
+        if start:
+            evictor.start()
+        return path
+
+    def _evict_in_background(self) -> None:
+        try:
+            self.evict()
+        except Exception:
+            logger.exception("QR code cache eviction failed")
+        finally:
+            with self._lock:
+                self._evictor = None
+
+    def evict(self) -> int:
+        """
+        Delete least recently used files until the cache is at 90% of its cap.
+
+        Returns:
+            Number of files deleted
+        """
+        files, total = self._scan()
+        target = self.max_bytes * 0.9
+        deleted = 0
+        if total > self.max_bytes:
+            files.sort(key=lambda entry: entry[0])
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                deleted += 1
+        with self._lock:
+            self._size = total
+        return deleted
+
+    def _scan(self):
+        """List (mtime, size, path) for every cached file, with their total size."""
+        files = []
+        total = 0
+        if not self.directory.is_dir():
+            return files, total
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return files, total
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_qr_code_cache() -> Optional[QRCodeCache]:
+    """
+    Get the process-wide QR code cache configured by LINKS_QR_* settings.
+
+    Returns:
+        QRCodeCache instance, or None when LINKS_QR_CACHE_DIR is unset
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                directory = getattr(settings, 'LINKS_QR_CACHE_DIR', None)
+                if not directory:
+                    return None
+                _default_cache = QRCodeCache(
+                    directory,
+                    max_bytes=getattr(settings, 'LINKS_QR_CACHE_MAX_BYTES', 256 * 1024 * 1024),
+                )
+    return _default_cache
@@ -0,0 +1,41 @@
+"""
+Renderers for the links app.
+Follows Single Responsibility Principle by isolating response encoding.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson when it is installed.
+    Falls back to DRF's stdlib JSON renderer otherwise, and for
+    requests that ask for indented output.
+    """
+    
+    _default = staticmethod(encoders.JSONEncoder().default)
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render data into compact UTF-8 JSON bytes.
+        
+        Args:
+            data: Data to render
+            accepted_media_type: Negotiated media type
+            renderer_context: DRF renderer context
+            
+        Returns:
+            Encoded JSON bytes
+        """
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Datetimes go through DRF's encoder so their format is unchanged
+        return orjson.dumps(data, default=self._default, option=orjson.OPT_PASSTHROUGH_DATETIME)
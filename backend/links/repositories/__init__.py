@@ -5,6 +5,9 @@ Follows Dependency Inversion Principle by abstracting data access.
 
 from .link_repository import LinkRepository
 from .click_repository import ClickRepository
+from .routing_rule_repository import RoutingRuleRepository
+from .campaign_repository import CampaignRepository
+from .domain_repository import DomainRepository
 
-__all__ = ['LinkRepository', 'ClickRepository']
+__all__ = ['LinkRepository', 'ClickRepository', 'RoutingRuleRepository', 'CampaignRepository', 'DomainRepository']
 
@@ -0,0 +1,123 @@
+"""
+Repository for Campaign model data access.
+Follows Single Responsibility Principle by isolating data access logic.
+Campaigns and their daily counters live on the default database only.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+from ..models import Campaign, CampaignDailyStats, Link
+from ..sharding import get_shard_aliases
+
+
+COUNTER_FIELDS = ('click_count', 'bot_click_count', 'raw_click_count')
+
+
+class CampaignRepository:
+    """
+    Repository for Campaign data access operations.
+    Encapsulates all database operations related to Campaign and CampaignDailyStats models.
+    """
+    
+    @staticmethod
+    def get_or_create(name: str) -> Campaign:
+        """
+        Retrieve a campaign by name, creating it if needed.
+        
+        Args:
+            name: Campaign name (slug)
+            
+        Returns:
+            Campaign instance
+        """
+        campaign, _ = Campaign.objects.using(DEFAULT_DB_ALIAS).get_or_create(name=name)
+        return campaign
+    
+    @staticmethod
+    def get_by_name(name: str) -> Optional[Campaign]:
+        """
+        Retrieve a campaign by name.
+        
+        Args:
+            name: Campaign name
+            
+        Returns:
+            Campaign instance or None if not found
+        """
+        try:
+            return Campaign.objects.using(DEFAULT_DB_ALIAS).get(name=name)
+        except Campaign.DoesNotExist:
+            return None
+    
+    @staticmethod
+    def get_all():
+        """
+        Retrieve all campaigns ordered by name.
+        
+        Returns:
+            QuerySet of campaigns
+        """
+        return Campaign.objects.using(DEFAULT_DB_ALIAS).order_by('name')
+    
+    @staticmethod
+    def increment_counters(campaign_id: int, day: date, *fields: str, amount: int = 1) -> None:
+        """
+        Atomically add to a campaign's totals and to its bucket for one day.
+        The bucket row is created on the first click of the day.
+        
+        Args:
+            campaign_id: Primary key of the campaign
+            day: UTC day of the clicks
+            fields: Counter field names to increment
+            amount: Number to add to each counter
+        """
+        increments = {field: F(field) + amount for field in fields}
+        Campaign.objects.using(DEFAULT_DB_ALIAS).filter(pk=campaign_id).update(**increments)
+        
+        buckets = CampaignDailyStats.objects.using(DEFAULT_DB_ALIAS)
+        if buckets.filter(campaign_id=campaign_id, day=day).update(**increments):
+            return
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                buckets.create(campaign_id=campaign_id, day=day, **{field: amount for field in fields})
+        except IntegrityError:
+            # Another click created today's bucket first
+            buckets.filter(campaign_id=campaign_id, day=day).update(**increments)
+    
+    @staticmethod
+    def get_daily_rows(campaign: Campaign, start: date, end: date) -> List[Dict]:
+        """
+        Retrieve a campaign's daily buckets in a date range.
+        
+        Args:
+            campaign: The Campaign instance
+            start: First day (inclusive)
+            end: Last day (inclusive)
+            
+        Returns:
+            List of {'day', 'click_count', 'bot_click_count', 'raw_click_count'} rows, oldest first
+        """
+        return list(
+            CampaignDailyStats.objects.using(DEFAULT_DB_ALIAS)
+            .filter(campaign=campaign, day__gte=start, day__lte=end)
+            .order_by('day')
+            .values('day', *COUNTER_FIELDS)
+        )
+    
+    @staticmethod
+    def count_links(campaign: Campaign) -> int:
+        """
+        Count the links assigned to a campaign on every shard.
+        
+        Args:
+            campaign: The Campaign instance
+            
+        Returns:
+            Number of member links (one indexed COUNT per shard)
+        """
+        return sum(
+            Link.objects.using(alias).filter(campaign_id=campaign.pk).count()
+            for alias in get_shard_aliases()
+        )
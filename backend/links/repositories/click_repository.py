@@ -3,8 +3,17 @@ Repository for Click model data access.
 Follows Single Responsibility Principle by isolating data access logic.
 """
 
-from django.db.models import QuerySet
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+from django.db.models import Count, Max, QuerySet
+from django.db.models.functions import Trunc
 from ..models import Link, Click
+from ..sharding import shard_for_slug
+
+
+def _clicks_for(link: Link) -> QuerySet:
+    """Clicks manager routed to the shard holding the link."""
+    return Click.objects.using(shard_for_slug(link.slug))
 
 
 class ClickRepository:
@@ -14,7 +23,15 @@ class ClickRepository:
     """
     
     @staticmethod
-    def create(link: Link, ip_address: str, user_agent: str, referrer: str = '') -> Click:
+    def create(
+        link: Link,
+        ip_address: str,
+        user_agent: str,
+        referrer: str = '',
+        is_bot: bool = False,
+        country: str = '',
+        asn: Optional[int] = None,
+    ) -> Click:
         """
         Create a new click record in the database.
         
@@ -23,15 +40,21 @@ class ClickRepository:
             ip_address: Client IP address
             user_agent: User agent string
             referrer: Referrer URL (optional, defaults to empty string)
+            is_bot: Whether the click came from a bot or crawler
+            country: ISO country code resolved from the IP (optional)
+            asn: Autonomous system number resolved from the IP (optional)
             
         Returns:
             Created Click instance
         """
-        return Click.objects.create(
+        return _clicks_for(link).create(
             short_url=link,
             ip_address=ip_address,
             user_agent=user_agent,
-            referrer=referrer
+            referrer=referrer,
+            is_bot=is_bot,
+            country=country,
+            asn=asn,
         )
     
     @staticmethod
@@ -45,18 +68,221 @@ class ClickRepository:
         Returns:
             QuerySet of clicks ordered by timestamp (newest first)
         """
-        return Click.objects.filter(short_url=link).order_by('-timestamp')
+        return _clicks_for(link).filter(short_url=link).order_by('-timestamp')
     
     @staticmethod
-    def count_by_link(link: Link) -> int:
+    def get_detail_rows_by_link(link: Link, exclude_bots: bool = False, after_id: int = 0) -> QuerySet:
+        """
+        Retrieve click detail rows for a link without building model instances.
+        
+        Args:
+            link: The Link instance
+            exclude_bots: Skip clicks flagged as bots (served by the is_bot index)
+            after_id: Only clicks with a higher primary key
+            
+        Returns:
+            QuerySet of (timestamp, ip_address, user_agent, referrer) tuples
+            ordered by timestamp (newest first)
+        """
+        clicks = _clicks_for(link).filter(short_url=link)
+        if after_id:
+            clicks = clicks.filter(pk__gt=after_id)
+        if exclude_bots:
+            clicks = clicks.filter(is_bot=False)
+        return clicks.order_by('-timestamp').values_list(
+            'timestamp', 'ip_address', 'user_agent', 'referrer'
+        )
+    
+    @staticmethod
+    def count_by_link(link: Link, exclude_bots: bool = False) -> int:
         """
         Count clicks for a specific link.
         
         Args:
             link: The Link instance
+            exclude_bots: Skip clicks flagged as bots
             
         Returns:
             Number of clicks
         """
-        return Click.objects.filter(short_url=link).count()
+        clicks = _clicks_for(link).filter(short_url=link)
+        if exclude_bots:
+            clicks = clicks.filter(is_bot=False)
+        return clicks.count()
+    
+    @staticmethod
+    def summarize_by_links(links: Iterable[Link], exclude_bots: bool = False) -> Dict[str, Dict]:
+        """
+        Aggregate click totals for many links in one grouped query per shard.
+        
+        Args:
+            links: Link instances to summarize
+            exclude_bots: Skip clicks flagged as bots
+            
+        Returns:
+            Mapping of slug to a dict with 'total_clicks' and 'last_click_at'.
+            Links without clicks are absent from the mapping.
+        """
+        slugs_by_shard = {}
+        for link in links:
+            slugs_by_shard.setdefault(shard_for_slug(link.slug), {})[link.pk] = link.slug
+        
+        summaries = {}
+        for alias, slug_by_id in slugs_by_shard.items():
+            clicks = Click.objects.using(alias).filter(short_url__in=list(slug_by_id))
+            if exclude_bots:
+                clicks = clicks.filter(is_bot=False)
+            rows = (
+                clicks.values('short_url')
+                .annotate(total_clicks=Count('id'), last_click_at=Max('timestamp'))
+                .order_by()
+            )
+            for row in rows:
+                summaries[slug_by_id[row['short_url']]] = {
+                    'total_clicks': row['total_clicks'],
+                    'last_click_at': row['last_click_at'],
+                }
+        return summaries
+    
+    @staticmethod
+    def breakdown_by_link(link: Link, field: str, exclude_bots: bool = False, after_id: int = 0) -> List[Dict]:
+        """
+        Count a link's clicks grouped by one column.
+        
+        Args:
+            link: The Link instance
+            field: Column to group by (e.g. 'country' or 'asn')
+            exclude_bots: Skip clicks flagged as bots
+            after_id: Only count clicks with a higher primary key
+            
+        Returns:
+            List of {field: value, 'clicks': n} dicts, most clicks first
+        """
+        clicks = _clicks_for(link).filter(short_url=link)
+        if after_id:
+            clicks = clicks.filter(pk__gt=after_id)
+        if exclude_bots:
+            clicks = clicks.filter(is_bot=False)
+        return list(
+            clicks.values(field).annotate(clicks=Count('id')).order_by('-clicks', field)
+        )
 
+    
+    @staticmethod
+    def timeseries_by_link(
+        link: Link,
+        unit: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        exclude_bots: bool = False,
+        after_id: int = 0,
+    ) -> Dict[datetime, int]:
+        """
+        Count a link's clicks per UTC minute, hour or day.
+        
+        Args:
+            link: The Link instance
+            unit: 'minute', 'hour' or 'day'
+            start: Inclusive lower bound (optional)
+            end: Exclusive upper bound (optional)
+            exclude_bots: Skip clicks flagged as bots
+            after_id: Only count clicks with a higher primary key
+            
+        Returns:
+            Mapping of bucket start to click count
+        """
+        clicks = _clicks_for(link).filter(short_url=link)
+        if after_id:
+            clicks = clicks.filter(pk__gt=after_id)
+        if start is not None:
+            clicks = clicks.filter(timestamp__gte=start)
+        if end is not None:
+            clicks = clicks.filter(timestamp__lt=end)
+        if exclude_bots:
+            clicks = clicks.filter(is_bot=False)
+        rows = (
+            clicks.annotate(bucket=Trunc('timestamp', unit, tzinfo=dt_timezone.utc))
+            .values('bucket')
+            .annotate(clicks=Count('id'))
+            .order_by('bucket')
+        )
+        return {row['bucket']: row['clicks'] for row in rows}
+    
+    @staticmethod
+    def get_rows_after(alias: str, after_id: int, limit: int) -> List[tuple]:
+        """
+        Retrieve clicks in primary-key order for compaction into columnar segments.
+        
+        Args:
+            alias: Database alias of the shard
+            after_id: Only clicks with a higher primary key
+            limit: Maximum number of rows
+            
+        Returns:
+            List of (id, link_id, timestamp, ip_address, user_agent, referrer,
+            country, asn, is_bot) tuples
+        """
+        return list(
+            Click.objects.using(alias)
+            .filter(pk__gt=after_id)
+            .order_by('pk')
+            .values_list(
+                'pk', 'short_url_id', 'timestamp', 'ip_address', 'user_agent',
+                'referrer', 'country', 'asn', 'is_bot',
+            )[:limit]
+        )
+    
+    @staticmethod
+    def get_rows_between(alias: str, first_id: int, last_id: int) -> List[tuple]:
+        """
+        Retrieve the clicks of a primary-key range, to rewrite a columnar segment.
+        
+        Args:
+            alias: Database alias of the shard
+            first_id: Lowest primary key (inclusive)
+            last_id: Highest primary key (inclusive)
+            
+        Returns:
+            List of tuples as returned by get_rows_after
+        """
+        return list(
+            Click.objects.using(alias)
+            .filter(pk__gte=first_id, pk__lte=last_id)
+            .order_by('pk')
+            .values_list(
+                'pk', 'short_url_id', 'timestamp', 'ip_address', 'user_agent',
+                'referrer', 'country', 'asn', 'is_bot',
+            )
+        )
+    
+    @staticmethod
+    def get_rows_for_link_ids(alias: str, link_ids: List[int], limit: int) -> List[Dict]:
+        """
+        Retrieve a batch of click rows belonging to the given links on one shard.
+        
+        Args:
+            alias: Database alias of the shard
+            link_ids: Primary keys of the links
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of click rows as dictionaries
+        """
+        return list(
+            Click.objects.using(alias).filter(short_url_id__in=link_ids).values()[:limit]
+        )
+    
+    @staticmethod
+    def delete_by_ids(alias: str, ids: List[int]) -> int:
+        """
+        Delete clicks by primary key on one shard.
+        
+        Args:
+            alias: Database alias of the shard
+            ids: Primary keys of the clicks
+            
+        Returns:
+            Number of clicks deleted
+        """
+        deleted, _ = Click.objects.using(alias).filter(pk__in=ids).delete()
+        return deleted
@@ -0,0 +1,56 @@
+"""
+Repository for Domain model data access.
+Follows Single Responsibility Principle by isolating data access logic.
+Domains live on the default database only.
+"""
+
+from typing import List, Optional, Tuple
+from django.db import DEFAULT_DB_ALIAS
+from ..models import Domain
+
+
+class DomainRepository:
+    """
+    Repository for Domain data access operations.
+    Encapsulates all database operations related to the Domain model.
+    """
+    
+    @staticmethod
+    def get_rows() -> List[Tuple[int, str]]:
+        """
+        Retrieve every domain as (id, host) pairs.
+        
+        Returns:
+            List of (id, host) tuples
+        """
+        return list(Domain.objects.using(DEFAULT_DB_ALIAS).values_list('id', 'host'))
+    
+    @staticmethod
+    def get_by_host(host: str) -> Optional[Domain]:
+        """
+        Retrieve a domain by host.
+        
+        Args:
+            host: Normalized host name
+            
+        Returns:
+            Domain instance or None if not found
+        """
+        try:
+            return Domain.objects.using(DEFAULT_DB_ALIAS).get(host=host)
+        except Domain.DoesNotExist:
+            return None
+    
+    @staticmethod
+    def get_or_create(host: str) -> Domain:
+        """
+        Retrieve a domain by host, creating it if needed.
+        
+        Args:
+            host: Normalized host name
+            
+        Returns:
+            Domain instance
+        """
+        domain, _ = Domain.objects.using(DEFAULT_DB_ALIAS).get_or_create(host=host)
+        return domain
@@ -1,11 +1,22 @@
 """
 Repository for Link model data access.
 Follows Single Responsibility Principle by isolating data access logic.
+Every query is routed to the shard that owns the slug (see links.sharding).
 """
 
-from typing import Optional
-from django.db.models import QuerySet
-from ..models import Link
+from operator import attrgetter, itemgetter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from django.db.models import F
+from ..models import PRIMARY_DOMAIN_ID, Link
+from ..sharding import (
+    FanOutQuery,
+    bucket_for_slug,
+    get_shard_aliases,
+    group_by_shard,
+    is_sharded,
+    shard_for_slug,
+)
 
 
 class LinkRepository:
@@ -15,57 +26,171 @@ class LinkRepository:
     """
     
     @staticmethod
-    def create(original_url: str, slug: str) -> Link:
+    def create(
+        original_url: str,
+        slug: str,
+        expires_at: Optional[datetime] = None,
+        max_clicks: Optional[int] = None,
+        campaign_id: Optional[int] = None,
+        domain_id: int = PRIMARY_DOMAIN_ID,
+    ) -> Link:
         """
         Create a new link in the database.
         
         Args:
             original_url: The original URL
-            slug: The unique slug for the link
+            slug: The slug for the link, unique within its domain
+            expires_at: When the link stops redirecting (optional)
+            max_clicks: Human clicks after which the link stops redirecting (optional)
+            campaign_id: Primary key of the link's campaign (optional)
+            domain_id: Primary key of the link's domain (defaults to the primary domain)
             
         Returns:
             Created Link instance
         """
-        return Link.objects.create(original_url=original_url, slug=slug)
+        return Link.objects.using(shard_for_slug(slug)).create(
+            original_url=original_url,
+            slug=slug,
+            bucket=bucket_for_slug(slug),
+            expires_at=expires_at,
+            max_clicks=max_clicks,
+            campaign_id=campaign_id,
+            domain_id=domain_id,
+        )
     
     @staticmethod
-    def get_by_slug(slug: str) -> Optional[Link]:
+    def get_by_slug(slug: str, domain_id: int = PRIMARY_DOMAIN_ID) -> Optional[Link]:
         """
         Retrieve a link by its slug.
         
         Args:
             slug: The link slug
+            domain_id: Domain whose keyspace the slug belongs to
             
         Returns:
             Link instance or None if not found
         """
         try:
-            return Link.objects.get(slug=slug)
+            return Link.objects.using(shard_for_slug(slug)).get(domain_id=domain_id, slug=slug)
         except Link.DoesNotExist:
             return None
     
     @staticmethod
-    def get_all() -> QuerySet:
+    def get_by_slugs(slugs: Iterable[str], domain_id: int = PRIMARY_DOMAIN_ID) -> List[Link]:
+        """
+        Retrieve every link of a domain whose slug is in the given collection.
+        
+        Args:
+            slugs: The link slugs
+            domain_id: Domain whose keyspace the slugs belong to
+            
+        Returns:
+            List of matching links (one slug__in query per shard involved)
+        """
+        return [
+            link
+            for alias, shard_slugs in group_by_shard(slugs).items()
+            for link in Link.objects.using(alias).filter(domain_id=domain_id, slug__in=shard_slugs)
+        ]
+    
+    @staticmethod
+    def get_all():
         """
         Retrieve all links ordered by creation date.
         
         Returns:
-            QuerySet of all links
+            QuerySet of all links, or a FanOutQuery merging every shard
         """
-        return Link.objects.all().order_by('-created_at')
+        if not is_sharded():
+            return Link.objects.all().order_by('-created_at')
+        return FanOutQuery(
+            [Link.objects.using(alias).order_by('-created_at') for alias in get_shard_aliases()],
+            key=attrgetter('created_at'),
+            reverse=True,
+        )
     
     @staticmethod
-    def slug_exists(slug: str) -> bool:
+    def get_all_rows(*fields: str):
+        """
+        Retrieve all links as plain dictionaries, newest first.
+        
+        Args:
+            fields: Field names to select (must include created_at when sharded)
+            
+        Returns:
+            Values QuerySet of all links, or a FanOutQuery merging every shard
+        """
+        if not is_sharded():
+            return Link.objects.order_by('-created_at').values(*fields)
+        return FanOutQuery(
+            [Link.objects.using(alias).order_by('-created_at').values(*fields) for alias in get_shard_aliases()],
+            key=itemgetter('created_at'),
+            reverse=True,
+        )
+    
+    @staticmethod
+    def get_most_clicked(limit: int) -> List[Link]:
+        """
+        Retrieve the most clicked links across all shards.
+        
+        Args:
+            limit: Maximum number of links to return
+            
+        Returns:
+            List of links ordered by click count (highest first)
+        """
+        return FanOutQuery(
+            [Link.objects.using(alias).order_by('-click_count') for alias in get_shard_aliases()],
+            key=attrgetter('click_count'),
+            reverse=True,
+        )[:limit]
+    
+    @staticmethod
+    def slug_exists(slug: str, domain_id: int = PRIMARY_DOMAIN_ID) -> bool:
         """
         Check if a slug already exists.
         
         Args:
             slug: The slug to check
+            domain_id: Domain whose keyspace is checked
             
         Returns:
             True if slug exists, False otherwise
         """
-        return Link.objects.filter(slug=slug).exists()
+        return Link.objects.using(shard_for_slug(slug)).filter(domain_id=domain_id, slug=slug).exists()
+    
+    @staticmethod
+    def get_click_version(link: Link) -> Optional[int]:
+        """
+        Read a counter that changes whenever a click row is added for a link.
+        Click rows and the counters they bump are written in one transaction,
+        so a version is never visible before its click.
+        
+        Args:
+            link: The Link instance
+        
+        Returns:
+            click_count + bot_click_count as stored, or None if the link is gone
+        """
+        return Link.objects.using(shard_for_slug(link.slug)).filter(pk=link.pk).values_list(
+            F('click_count') + F('bot_click_count'), flat=True
+        ).first()
+    
+    @staticmethod
+    def get_click_count(link: Link) -> Optional[int]:
+        """
+        Read a link's stored click_count. Inside the transaction that just
+        incremented it, this is the value that increment produced.
+        
+        Args:
+            link: The Link instance
+        
+        Returns:
+            click_count as stored, or None if the link is gone
+        """
+        return Link.objects.using(shard_for_slug(link.slug)).filter(pk=link.pk).values_list(
+            'click_count', flat=True
+        ).first()
     
     @staticmethod
     def update_click_count(link: Link, count: int) -> None:
@@ -78,4 +203,142 @@ class LinkRepository:
         """
         link.click_count = count
         link.save(update_fields=['click_count'])
-
+    
+    @staticmethod
+    def increment_click_count(link: Link, amount: int = 1, field: str = 'click_count') -> None:
+        """
+        Atomically increment a click counter for a link in the database.
+        
+        Args:
+            link: The Link instance
+            amount: Number of clicks to add
+            field: Counter to increment ('click_count' or 'bot_click_count')
+        """
+        LinkRepository.increment_counters(link, field, amount=amount)
+    
+    @staticmethod
+    def increment_counters(link: Link, *fields: str, amount: int = 1) -> None:
+        """
+        Atomically increment one or more counters for a link in a single UPDATE.
+        Uses F() expressions so concurrent clicks and stale (cached)
+        instances never overwrite each other's increments.
+        
+        Args:
+            link: The Link instance
+            fields: Counter field names to increment
+            amount: Number to add to each counter
+        """
+        Link.objects.using(shard_for_slug(link.slug)).filter(pk=link.pk).update(
+            **{field: F(field) + amount for field in fields}
+        )
+        for field in fields:
+            setattr(link, field, getattr(link, field) + amount)
+    
+    @staticmethod
+    def increment_counters_within_limit(link: Link, *fields: str) -> bool:
+        """
+        Increment counters by one only while click_count is below max_clicks.
+        The limit is checked inside the same UPDATE, so concurrent workers
+        holding stale cached instances can never overshoot it.
+        
+        Args:
+            link: The Link instance (must have max_clicks set)
+            fields: Counter field names to increment
+            
+        Returns:
+            True if the counters were incremented, False if the limit was reached
+        """
+        updated = Link.objects.using(shard_for_slug(link.slug)).filter(
+            pk=link.pk, click_count__lt=F('max_clicks')
+        ).update(**{field: F(field) + 1 for field in fields})
+        if not updated:
+            # Let later checks on this (cached) instance fail without a query
+            link.click_count = max(link.click_count, link.max_clicks)
+            return False
+        for field in fields:
+            setattr(link, field, getattr(link, field) + 1)
+        return True
+    
+    @staticmethod
+    def get_expired_rows(alias: str, now: datetime, limit: int) -> List[Dict]:
+        """
+        Retrieve a batch of expired or exhausted links on one shard.
+        Both lookups are served by the partial expires_at / max_clicks indexes.
+        
+        Args:
+            alias: Database alias of the shard
+            now: Links with expires_at at or before this time are expired
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of link rows as dictionaries
+        """
+        links = Link.objects.using(alias)
+        rows = list(links.filter(expires_at__lte=now).order_by('expires_at').values()[:limit])
+        if len(rows) < limit:
+            seen = {row['id'] for row in rows}
+            exhausted = links.filter(
+                max_clicks__isnull=False, click_count__gte=F('max_clicks')
+            ).values()[:limit - len(rows)]
+            rows.extend(row for row in exhausted if row['id'] not in seen)
+        return rows
+    
+    @staticmethod
+    def delete_by_ids(alias: str, ids: List[int]) -> int:
+        """
+        Delete links by primary key on one shard.
+        Their clicks must already be gone; the cascade only removes routing rules.
+        
+        Args:
+            alias: Database alias of the shard
+            ids: Primary keys of the links
+            
+        Returns:
+            Number of links deleted
+        """
+        deleted, _ = Link.objects.using(alias).filter(pk__in=ids).delete()
+        return deleted
+    
+    @staticmethod
+    def get_rows_due_for_check(alias: str, checked_before: datetime, limit: int) -> List[Dict]:
+        """
+        Retrieve links never checked or last checked before a cutoff, oldest first.
+        Both lookups are served by the last_checked_at index.
+        
+        Args:
+            alias: Database alias of the shard
+            checked_before: Links checked at or after this time are skipped
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of {'id', 'slug', 'original_url'} dictionaries
+        """
+        links = Link.objects.using(alias)
+        fields = ('id', 'slug', 'original_url')
+        rows = list(links.filter(last_checked_at__isnull=True).values(*fields)[:limit])
+        if len(rows) < limit:
+            rows.extend(
+                links.filter(last_checked_at__lt=checked_before)
+                .order_by('last_checked_at')
+                .values(*fields)[:limit - len(rows)]
+            )
+        return rows
+    
+    @staticmethod
+    def set_health(alias: str, ids: List[int], status: str, code: Optional[int], checked_at: datetime) -> int:
+        """
+        Record a health check result for several links in one UPDATE.
+        
+        Args:
+            alias: Database alias of the shard
+            ids: Primary keys of the links
+            status: Health status ('ok', 'broken', 'unreachable' or 'blocked')
+            code: Final HTTP status code, if any
+            checked_at: Time of the check
+            
+        Returns:
+            Number of links updated
+        """
+        return Link.objects.using(alias).filter(pk__in=ids).update(
+            health_status=status, health_code=code, last_checked_at=checked_at,
+        )
@@ -0,0 +1,75 @@
+"""
+Repository for RoutingRule model data access.
+Follows Single Responsibility Principle by isolating data access logic.
+Rules live on the shard of the link they belong to.
+"""
+
+from typing import Dict, Iterable, List
+from django.db import transaction
+from django.db.models import F
+from ..models import Link, RoutingRule
+from ..sharding import shard_for_slug
+
+
+RULE_FIELDS = ('id', 'priority', 'device', 'country', 'referrer', 'destination', 'weight')
+
+
+class RoutingRuleRepository:
+    """
+    Repository for RoutingRule data access operations.
+    Encapsulates all database operations related to RoutingRule model.
+    """
+    
+    @staticmethod
+    def get_rows_for_link(link: Link) -> List[Dict]:
+        """
+        Retrieve a link's rules as plain dictionaries in evaluation order.
+        
+        Args:
+            link: The Link instance
+            
+        Returns:
+            List of rule rows with the RULE_FIELDS keys
+        """
+        return list(
+            RoutingRule.objects.using(shard_for_slug(link.slug))
+            .filter(link_id=link.pk)
+            .order_by('priority', 'id')
+            .values(*RULE_FIELDS)
+        )
+    
+    @staticmethod
+    def replace_for_link(link: Link, rules: Iterable[Dict]) -> int:
+        """
+        Replace every rule of a link and bump its routing_version in one transaction.
+        
+        Args:
+            link: The Link instance
+            rules: Dictionaries of RoutingRule field values (without link)
+            
+        Returns:
+            The link's new routing_version
+        """
+        alias = shard_for_slug(link.slug)
+        with transaction.atomic(using=alias):
+            RoutingRule.objects.using(alias).filter(link_id=link.pk).delete()
+            RoutingRule.objects.using(alias).bulk_create(
+                [RoutingRule(link_id=link.pk, **rule) for rule in rules]
+            )
+            return RoutingRuleRepository.bump_version(link)
+    
+    @staticmethod
+    def bump_version(link: Link) -> int:
+        """
+        Atomically increment a link's routing_version and refresh it on the instance.
+        
+        Args:
+            link: The Link instance
+            
+        Returns:
+            The new routing_version
+        """
+        links = Link.objects.using(shard_for_slug(link.slug)).filter(pk=link.pk)
+        links.update(routing_version=F('routing_version') + 1)
+        link.routing_version = links.values_list('routing_version', flat=True).get()
+        return link.routing_version
@@ -0,0 +1,35 @@
+"""
+Database router for sharded link storage.
+Follows Single Responsibility Principle by keeping database selection
+rules in one place; repositories pick the shard explicitly with using().
+"""
+
+from .sharding import get_shard_aliases
+
+
+# Models whose tables exist on every shard; the rest live on 'default' only
+SHARDED_MODELS = {'link', 'click', 'routingrule'}
+
+
+class ShardRouter:
+    """
+    Router that keeps related rows on the shard they were loaded from and
+    only creates link, click and routing rule tables on non-default shards.
+    """
+    
+    def _instance_db(self, hints):
+        instance = hints.get('instance')
+        if instance is not None:
+            return instance._state.db
+        return None
+    
+    def db_for_read(self, model, **hints):
+        return self._instance_db(hints)
+    
+    def db_for_write(self, model, **hints):
+        return self._instance_db(hints)
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != 'default' and db in get_shard_aliases():
+            return app_label == 'links' and (model_name is None or model_name in SHARDED_MODELS)
+        return None
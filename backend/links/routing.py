@@ -0,0 +1,328 @@
+"""
+Per-link routing rules compiled into cached decision tables.
+Follows Single Responsibility Principle by keeping destination selection out of views and services.
+
+A link's rules are compiled once into an ordered list of branches. Rules
+sharing a priority and the same device/country/referrer condition form one
+branch, and the branch's destinations are drawn with Walker's alias method,
+so a weighted A/B split costs one random number and one table lookup
+however many variants it has. The first branch whose conditions match the
+request wins; when none matches the link's original URL is used.
+
+Request traits are computed lazily and only when some branch needs them:
+device classes come from precompiled, memoized user-agent matchers,
+countries from the GeoIP index and referrer hosts from a per-branch
+compiled suffix pattern.
+"""
+
+import random
+import re
+from functools import cached_property, lru_cache
+from typing import Callable, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from .bot_detection import BotClassifier, get_bot_classifier
+from .cache import LRUCache, SingleFlight
+from .utils import get_client_ip
+
+
+MOBILE = 'mobile'
+TABLET = 'tablet'
+DESKTOP = 'desktop'
+BOT = 'bot'
+DEVICES = (MOBILE, TABLET, DESKTOP, BOT)
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table for O(1) weighted sampling.
+    """
+
+    __slots__ = ('size', 'probabilities', 'aliases')
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        Build the table in O(n).
+
+        Args:
+            weights: Non-negative weights, at least one of them positive
+
+        Raises:
+            ValueError: If there are no positive weights
+        """
+        total = float(sum(weights))
+        if not weights or total <= 0 or min(weights) < 0:
+            raise ValueError("Alias table needs non-negative weights with a positive sum")
+        size = len(weights)
+        scaled = [weight * size / total for weight in weights]
+        probabilities = [1.0] * size
+        aliases = list(range(size))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            probabilities[low] = scaled[low]
+            aliases[low] = high
+            scaled[high] += scaled[low] - 1.0
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Whatever remains is 1.0 up to rounding error
+        self.size = size
+        self.probabilities = probabilities
+        self.aliases = aliases
+
+    def sample(self, rand: Callable[[], float] = random.random) -> int:
+        """
+        Draw an index with probability proportional to its weight.
+
+        Args:
+            rand: Uniform [0, 1) source
+
+        Returns:
+            Index into the weights the table was built from
+        """
+        scaled = rand() * self.size
+        index = min(int(scaled), self.size - 1)
+        return index if scaled - index < self.probabilities[index] else self.aliases[index]
+
+
+# Checked after the bot classifier, in this order
+_TABLET_PATTERN = re.compile(r'ipad|tablet|kindle|silk/|playbook|android(?!.*mobile)', re.IGNORECASE)
+_MOBILE_PATTERN = re.compile(
+    r'mobi|iphone|ipod|android|windows phone|iemobile|blackberry|bb10|opera mini|webos', re.IGNORECASE
+)
+
+
+class DeviceClassifier:
+    """
+    Classifies user agents as mobile, tablet, desktop or bot with precompiled matchers.
+    """
+
+    def __init__(self, bot_classifier: BotClassifier = None, cache_size: int = 4096):
+        """
+        Initialize DeviceClassifier.
+
+        Args:
+            bot_classifier: Classifier deciding the bot class (defaults to the process-wide one)
+            cache_size: Number of distinct user agents to memoize
+        """
+        self._bot_classifier = bot_classifier or get_bot_classifier()
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, user_agent: str) -> str:
+        if self._bot_classifier.is_bot(user_agent):
+            return BOT
+        if _TABLET_PATTERN.search(user_agent):
+            return TABLET
+        if _MOBILE_PATTERN.search(user_agent):
+            return MOBILE
+        return DESKTOP
+
+
+_default_device_classifier = None
+
+
+def get_device_classifier() -> DeviceClassifier:
+    """
+    Get the process-wide device classifier.
+
+    Returns:
+        DeviceClassifier instance
+    """
+    global _default_device_classifier
+    if _default_device_classifier is None:
+        _default_device_classifier = DeviceClassifier(
+            cache_size=getattr(settings, 'LINKS_BOT_UA_CACHE_SIZE', 4096)
+        )
+    return _default_device_classifier
+
+
+def normalize_referrer_host(value: str) -> str:
+    """
+    Reduce a referrer rule value or URL to a bare lower-case host.
+
+    Args:
+        value: Host ("twitter.com") or URL ("https://t.co/...")
+
+    Returns:
+        Host name without scheme, port, path or leading "www."
+    """
+    value = value.strip().lower()
+    if '//' not in value:
+        value = '//' + value
+    host = urlsplit(value).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+class RequestTraits:
+    """
+    Lazily computed request attributes that routing conditions test.
+    """
+
+    def __init__(self, request, device_classifier: DeviceClassifier, geoip=None):
+        """
+        Initialize RequestTraits.
+
+        Args:
+            request: The HTTP request being redirected
+            device_classifier: Classifier for the user agent
+            geoip: GeoIPIndex, or None when no database is configured
+        """
+        self._request = request
+        self._device_classifier = device_classifier
+        self._geoip = geoip
+
+    @cached_property
+    def device(self) -> str:
+        return self._device_classifier.classify(self._request.META.get('HTTP_USER_AGENT', ''))
+
+    @cached_property
+    def country(self) -> str:
+        if self._geoip is None:
+            return ''
+        info = self._geoip.lookup(get_client_ip(self._request))
+        return info.country if info is not None else ''
+
+    @cached_property
+    def referrer_host(self) -> str:
+        referrer = self._request.META.get('HTTP_REFERER', '')
+        if not referrer:
+            return ''
+        try:
+            return urlsplit(referrer).hostname or ''
+        except ValueError:
+            return ''
+
+
+class Branch(NamedTuple):
+    """Destinations sharing one condition, drawn by weight."""
+    device: str
+    country: str
+    referrer: Optional['re.Pattern']
+    destinations: tuple
+    table: AliasTable
+
+    def matches(self, traits: RequestTraits) -> bool:
+        if self.device and traits.device != self.device:
+            return False
+        if self.country and traits.country != self.country:
+            return False
+        if self.referrer is not None and not self.referrer.search(traits.referrer_host):
+            return False
+        return True
+
+
+class CompiledRoutes:
+    """
+    Decision structure for one link at one routing_version.
+    """
+
+    __slots__ = ('version', 'branches')
+
+    def __init__(self, version: int, branches: List[Branch]):
+        self.version = version
+        self.branches = branches
+
+    def choose(self, traits: RequestTraits, rand: Callable[[], float] = random.random) -> Optional[str]:
+        """
+        Pick the destination for a request.
+
+        Args:
+            traits: Request traits, evaluated on demand
+            rand: Uniform [0, 1) source for weighted branches
+
+        Returns:
+            Destination URL, or None to fall back to the link's original URL
+        """
+        for branch in self.branches:
+            if branch.matches(traits):
+                if branch.table.size == 1:
+                    return branch.destinations[0]
+                return branch.destinations[branch.table.sample(rand)]
+        return None
+
+
+def compile_routes(version: int, rules: Iterable[Mapping]) -> CompiledRoutes:
+    """
+    Compile rule rows into ordered branches.
+
+    Args:
+        version: The link's routing_version the rules were read at
+        rules: Rows with priority, device, country, referrer, destination and weight
+
+    Returns:
+        CompiledRoutes (with no branches when there are no usable rules)
+    """
+    groups = {}
+    for rule in sorted(rules, key=lambda rule: (rule['priority'], rule.get('id') or 0)):
+        if rule['weight'] <= 0:
+            continue
+        key = (rule['priority'], rule['device'], rule['country'].upper(), normalize_referrer_host(rule['referrer']))
+        groups.setdefault(key, []).append(rule)
+
+    branches = []
+    for (_, device, country, referrer), members in groups.items():
+        pattern = re.compile(r'(?:^|\.)' + re.escape(referrer) + r'$') if referrer else None
+        branches.append(Branch(
+            device=device,
+            country=country,
+            referrer=pattern,
+            destinations=tuple(rule['destination'] for rule in members),
+            table=AliasTable([rule['weight'] for rule in members]),
+        ))
+    return CompiledRoutes(version, branches)
+
+
+class RouteCache:
+    """
+    Per-process cache of compiled routes keyed by Link.cache_key.
+    Entries compiled for an older routing_version are recompiled on access,
+    and concurrent misses for a link share one load.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize RouteCache.
+
+        Args:
+            max_size: Maximum number of links whose routes are kept
+        """
+        self._lru = LRUCache(max_size)
+        self._flight = SingleFlight()
+
+    def get_or_compile(self, link, loader: Callable[[object], Iterable[Mapping]]) -> CompiledRoutes:
+        """
+        Return the compiled routes for a link's current routing_version.
+
+        Args:
+            link: Link instance
+            loader: Callable returning the link's rule rows
+
+        Returns:
+            CompiledRoutes instance
+        """
+        key = link.cache_key
+        compiled = self._lru.get(key)
+        if compiled is not None and compiled.version == link.routing_version:
+            return compiled
+
+        version = link.routing_version
+
+        def load():
+            fresh = compile_routes(version, loader(link))
+            self._lru.set(key, fresh)
+            return fresh
+
+        return self._flight.do((key, version), load)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a link's compiled routes, given its cache_key."""
+        self._lru.delete(key)
+
+    def clear(self) -> None:
+        """Drop every compiled route."""
+        self._lru.clear()
+
+    def __len__(self) -> int:
+        return len(self._lru)
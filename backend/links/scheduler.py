@@ -0,0 +1,286 @@
+"""
+In-process periodic job scheduler.
+Follows Single Responsibility Principle by keeping background maintenance out of request handling.
+
+The run_scheduler command runs a Scheduler in a dedicated process; web
+workers start one as well only when LINKS_SCHEDULER_ENABLED is set. A
+ticker thread offers due jobs to a small thread pool. Processes coordinate
+through one ScheduledJob lease row per job in the default database. A run
+starts only after a conditional UPDATE claims the row (due and not leased),
+so each occurrence runs on exactly one process without a broker, and the
+lease of a crashed owner simply expires. A process that loses a claim reads
+when the job is next due or its lease ends and does not try again before
+then, so idle schedulers cost no writes. The row also records last-run
+duration, lag and errors.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ScheduledJob
+
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    """A registered periodic job."""
+    name: str
+    interval: float  # seconds between runs
+    fn: Callable[[], object]
+    lease: float  # seconds a run may take before another worker can take over
+
+
+class Scheduler:
+    """
+    Runs registered jobs periodically, at most once per interval across all workers.
+    """
+
+    def __init__(self, max_workers: int = None, tick: float = None, owner: str = None,
+                 using: str = DEFAULT_DB_ALIAS):
+        """
+        Initialize Scheduler.
+
+        Args:
+            max_workers: Threads running jobs (defaults to LINKS_SCHEDULER_WORKERS)
+            tick: Seconds between checks for due jobs (defaults to LINKS_SCHEDULER_TICK)
+            owner: Identifier written to leases (defaults to host, pid and a random suffix)
+            using: Database alias holding the lease rows
+        """
+        self.max_workers = max_workers or getattr(settings, 'LINKS_SCHEDULER_WORKERS', 2)
+        self.tick = tick or getattr(settings, 'LINKS_SCHEDULER_TICK', 5.0)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.using = using
+        self._jobs: Dict[str, Job] = {}
+        self._running = set()
+        self._ensured = set()
+        self._not_before: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def register(self, name: str, interval: float, fn: Callable[[], object], lease: float = None) -> Job:
+        """
+        Register a periodic job.
+
+        Args:
+            name: Unique job name (also the lease row key)
+            interval: Seconds between the starts of consecutive runs
+            fn: Callable executed with no arguments
+            lease: Maximum expected run time in seconds (defaults to max(interval, 60))
+
+        Returns:
+            The registered Job
+        """
+        job = Job(name, float(interval), fn, float(lease or max(interval, 60)))
+        self._jobs[name] = job
+        return job
+
+    @property
+    def jobs(self) -> List[Job]:
+        """Registered jobs in registration order."""
+        return list(self._jobs.values())
+
+    def start(self) -> None:
+        """Start the ticker thread and worker pool (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='links-scheduler')
+            self._thread = threading.Thread(target=self._loop, name='links-scheduler-tick', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Stop scheduling new runs.
+
+        Args:
+            wait: Block until running jobs finish
+        """
+        with self._lock:
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def run_pending(self) -> None:
+        """Offer every job that is not already running here to the worker pool."""
+        now = timezone.now()
+        for job in self.jobs:
+            not_before = self._not_before.get(job.name)
+            if not_before is not None and now < not_before:
+                continue
+            with self._lock:
+                if job.name in self._running or self._executor is None:
+                    continue
+                self._running.add(job.name)
+                self._executor.submit(self._run_in_pool, job)
+
+    def run_job(self, name: str) -> bool:
+        """
+        Run a job in the calling thread if it is due and no other worker holds it.
+
+        Args:
+            name: Registered job name
+
+        Returns:
+            True if this call ran the job
+        """
+        job = self._jobs[name]
+        due_at = self._claim(job)
+        if due_at is None:
+            return False
+
+        started = timezone.now()
+        clock = time.monotonic()
+        error = ''
+        try:
+            job.fn()
+        except Exception as exc:
+            logger.exception("Scheduled job %s failed", job.name)
+            error = f"{type(exc).__name__}: {exc}"
+        duration = time.monotonic() - clock
+
+        next_run_at = started + timedelta(seconds=job.interval)
+        ScheduledJob.objects.using(self.using).filter(name=job.name, owner=self.owner).update(
+            owner='',
+            locked_until=None,
+            next_run_at=next_run_at,
+            last_finished_at=timezone.now(),
+            last_duration=duration,
+            last_lag=max(0.0, (started - due_at).total_seconds()),
+            last_error=error,
+            run_count=F('run_count') + 1,
+        )
+        self._not_before[job.name] = next_run_at
+        return True
+
+    def status(self) -> List[Dict]:
+        """
+        Describe every registered job with the stats of its last run.
+
+        Returns:
+            One dictionary per job
+        """
+        rows = {
+            row.name: row
+            for row in ScheduledJob.objects.using(self.using).filter(name__in=list(self._jobs))
+        }
+        now = timezone.now()
+        result = []
+        for job in self.jobs:
+            row = rows.get(job.name)
+            leased = row is not None and row.locked_until is not None and row.locked_until > now
+            result.append({
+                'name': job.name,
+                'interval': job.interval,
+                'running': leased,
+                'owner': row.owner if leased else None,
+                'next_run_at': row.next_run_at if row else None,
+                'last_started_at': row.last_started_at if row else None,
+                'last_duration': row.last_duration if row else None,
+                'last_lag': row.last_lag if row else None,
+                'last_error': row.last_error if row else '',
+                'run_count': row.run_count if row else 0,
+            })
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+
+    def _run_in_pool(self, job: Job) -> None:
+        close_old_connections()
+        try:
+            self.run_job(job.name)
+        except DatabaseError:
+            logger.warning("Scheduler could not reach the database for job %s", job.name, exc_info=True)
+        finally:
+            with self._lock:
+                self._running.discard(job.name)
+            close_old_connections()
+
+    def _claim(self, job: Job):
+        """Take the lease if the job is due; returns the due time or None."""
+        not_before = self._not_before.get(job.name)
+        if not_before is not None and timezone.now() < not_before:
+            return None
+        jobs = ScheduledJob.objects.using(self.using)
+        if job.name not in self._ensured:
+            jobs.get_or_create(name=job.name, defaults={'next_run_at': timezone.now()})
+            self._ensured.add(job.name)
+
+        now = timezone.now()
+        claimed = jobs.filter(name=job.name, next_run_at__lte=now).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+        ).update(
+            owner=self.owner,
+            locked_until=now + timedelta(seconds=job.lease),
+            last_started_at=now,
+        )
+        if not claimed:
+            # Not due, or another process holds it: wait for whichever comes later
+            row = jobs.values_list('next_run_at', 'locked_until').filter(name=job.name).first()
+            if row is not None:
+                self._not_before[job.name] = max(value for value in row if value is not None)
+            return None
+        return jobs.values_list('next_run_at', flat=True).get(name=job.name)
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Get the process-wide scheduler with the default jobs registered.
+
+    Returns:
+        Scheduler instance (not started)
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                from .jobs import register_default_jobs
+
+                scheduler = Scheduler()
+                register_default_jobs(scheduler)
+                _default_scheduler = scheduler
+    return _default_scheduler
+
+
+def start_scheduler_on_start() -> Optional[Scheduler]:
+    """
+    Start the process-wide scheduler when a worker process boots.
+    Controlled by the LINKS_SCHEDULER_ENABLED setting (off by default; the
+    run_scheduler command runs the jobs in a dedicated process instead).
+
+    Returns:
+        The started scheduler, or None when disabled
+    """
+    if not getattr(settings, 'LINKS_SCHEDULER_ENABLED', False):
+        return None
+    scheduler = get_scheduler()
+    scheduler.start()
+    return scheduler
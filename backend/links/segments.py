@@ -0,0 +1,497 @@
+"""
+Columnar click segments and a vectorized analytics engine.
+Follows Single Responsibility Principle by keeping bulk analytics storage
+separate from the transactional Click table.
+
+Clicks are periodically compacted (per shard, in primary-key order) into
+immutable segment directories under LINKS_SEGMENT_DIR/<alias>/. Each
+segment holds one .npy file per column, sorted by (link_id, timestamp):
+
+    link_id     int64   link primary key on the shard
+    timestamp   int64   microseconds since the Unix epoch (UTC)
+    ip          S16     packed IPv6 address (IPv4 stored IPv4-mapped)
+    user_agent  uint32  index into the segment's user-agent dictionary
+    referrer    uint32  index into the segment's referrer dictionary
+    country     uint16  index into the segment's country dictionary
+    asn         uint32  autonomous system number (0 = unknown)
+    is_bot      bool
+
+plus meta.json with the row count, click-id range and the dictionaries.
+Segments are never modified in place. When clicks they cover are updated
+or deleted (GeoIP backfill, expiry sweeps, shard moves), the segment is
+rewritten from the database as a new generation of the same id range
+(seg-<min>-<max>-g<n>); readers pick the newest generation, and the one it
+replaced is kept until the next rewrite for queries still reading it.
+Segments are opened with numpy.load(mmap_mode='r'), so only the pages a
+query touches are read. A per-link query binary-searches the sorted
+link_id column and then the timestamps inside that run, so its cost grows
+with the link's own clicks rather than with the size of the table.
+
+Clicks newer than the last segment (the "tail") stay in the database; the
+engine answers for segments only and callers add the tail via the ORM.
+NumPy is an optional dependency: without it the engine is unavailable and
+analytics fall back to the ORM.
+"""
+
+import heapq
+import ipaddress
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+FORMAT_VERSION = 1
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+GROUPABLE = ('user_agent', 'referrer', 'country', 'asn')
+_DICTIONARY_COLUMNS = ('user_agent', 'referrer', 'country')
+# 'seg-' and two 12-digit ids; a rewrite appends '-g' and its generation
+_RANGE_LENGTH = len('seg-') + 12 + 1 + 12
+
+
+def to_micros(value: datetime) -> int:
+    """Microseconds since the Unix epoch for an aware datetime."""
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value: int) -> datetime:
+    """Aware UTC datetime for microseconds since the Unix epoch."""
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def pack_ip(value) -> bytes:
+    """16-byte packed form of an IPv4 or IPv6 address."""
+    address = ipaddress.ip_address(str(value))
+    if address.version == 4:
+        return b'\0' * 10 + b'\xff\xff' + address.packed
+    return address.packed
+
+
+def unpack_ip(value: bytes) -> str:
+    """Address string for a 16-byte packed address."""
+    address = ipaddress.IPv6Address(value.ljust(16, b'\0'))
+    return str(address.ipv4_mapped or address)
+
+
+class Segment:
+    """
+    One immutable, memory-mapped segment.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open a segment directory.
+
+        Args:
+            path: Directory written by write_segment
+        """
+        self.path = path
+        with open(path / 'meta.json', encoding='utf-8') as handle:
+            self.meta = json.load(handle)
+        self.rows = self.meta['rows']
+        self.min_id = self.meta['min_id']
+        self.max_id = self.meta['max_id']
+        self.dictionaries = self.meta['dictionaries']
+        self._columns = {}
+
+    def column(self, name: str):
+        """Memory-mapped array for a column, opened on first use."""
+        array = self._columns.get(name)
+        if array is None:
+            array = self._columns[name] = np.load(self.path / f"{name}.npy", mmap_mode='r')
+        return array
+
+    def link_range(self, link_id: int) -> Tuple[int, int]:
+        """Row range [start, stop) holding the link's clicks."""
+        link_ids = self.column('link_id')
+        return (
+            int(np.searchsorted(link_ids, link_id, side='left')),
+            int(np.searchsorted(link_ids, link_id, side='right')),
+        )
+
+    def holds_any(self, link_ids) -> bool:
+        """Whether the segment has clicks of any of the given link primary keys."""
+        if not self.rows or not len(link_ids):
+            return False
+        link_ids = np.asarray(link_ids, dtype=np.int64)
+        column = self.column('link_id')
+        return bool(
+            (np.searchsorted(column, link_ids, side='right') > np.searchsorted(column, link_ids, side='left')).any()
+        )
+
+    def select(self, link_id: int, start: int = None, end: int = None, exclude_bots: bool = False):
+        """
+        Locate a link's rows, optionally inside a time range.
+
+        Args:
+            link_id: Link primary key
+            start: Inclusive lower bound in epoch microseconds
+            end: Exclusive upper bound in epoch microseconds
+            exclude_bots: Drop rows flagged as bots
+
+        Returns:
+            Tuple of (slice, mask) where mask is None or a boolean array over the slice
+        """
+        first, last = self.link_range(link_id)
+        if first < last and (start is not None or end is not None):
+            # Timestamps are sorted inside a link's run
+            timestamps = self.column('timestamp')[first:last]
+            low = int(np.searchsorted(timestamps, start, side='left')) if start is not None else 0
+            high = int(np.searchsorted(timestamps, end, side='left')) if end is not None else len(timestamps)
+            first, last = first + low, first + high
+        rows = slice(first, max(first, last))
+        mask = None
+        if exclude_bots and rows.stop > rows.start:
+            mask = ~self.column('is_bot')[rows]
+        return rows, mask
+
+
+def write_segment(directory: Path, clicks: List[tuple], id_range: Tuple[int, int] = None,
+                  generation: int = 0) -> Optional[Path]:
+    """
+    Write clicks as a new segment, atomically.
+
+    Args:
+        directory: Shard directory to create the segment in
+        clicks: Rows of (id, link_id, timestamp, ip_address, user_agent,
+            referrer, country, asn, is_bot)
+        id_range: Click-id range the segment covers (defaults to that of the
+            clicks); given for rewrites, which may have fewer or no clicks left
+        generation: Rewrite generation of the id range
+
+    Returns:
+        Path of the new segment, or None if there were no clicks and no id range
+    """
+    if not clicks and id_range is None:
+        return None
+
+    dictionaries = {name: {} for name in _DICTIONARY_COLUMNS}
+
+    def code(name, value):
+        values = dictionaries[name]
+        return values.setdefault(value or '', len(values))
+
+    ids = np.fromiter((row[0] for row in clicks), dtype=np.int64, count=len(clicks))
+    columns = {
+        'link_id': np.fromiter((row[1] for row in clicks), dtype=np.int64, count=len(clicks)),
+        'timestamp': np.fromiter((to_micros(row[2]) for row in clicks), dtype=np.int64, count=len(clicks)),
+        'ip': np.array([pack_ip(row[3]) for row in clicks], dtype='S16'),
+        'user_agent': np.fromiter((code('user_agent', row[4]) for row in clicks), dtype=np.uint32, count=len(clicks)),
+        'referrer': np.fromiter((code('referrer', row[5]) for row in clicks), dtype=np.uint32, count=len(clicks)),
+        'country': np.fromiter((code('country', row[6]) for row in clicks), dtype=np.uint16, count=len(clicks)),
+        'asn': np.fromiter((row[7] or 0 for row in clicks), dtype=np.uint32, count=len(clicks)),
+        'is_bot': np.fromiter((bool(row[8]) for row in clicks), dtype=np.bool_, count=len(clicks)),
+    }
+    order = np.lexsort((columns['timestamp'], columns['link_id']))
+
+    min_id, max_id = id_range or (int(ids.min()), int(ids.max()))
+    name = f"seg-{min_id:012d}-{max_id:012d}"
+    if generation:
+        name += f"-g{generation:06d}"
+    directory.mkdir(parents=True, exist_ok=True)
+    staging = directory / f".{name}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+    for column, values in columns.items():
+        np.save(staging / f"{column}.npy", values[order])
+    with open(staging / 'meta.json', 'w', encoding='utf-8') as handle:
+        json.dump({
+            'version': FORMAT_VERSION,
+            'rows': len(clicks),
+            'min_id': min_id,
+            'max_id': max_id,
+            'dictionaries': {
+                column: [value for value, _ in sorted(values.items(), key=lambda item: item[1])]
+                for column, values in dictionaries.items()
+            },
+        }, handle)
+    target = directory / name
+    os.rename(staging, target)
+    return target
+
+
+class SegmentStore:
+    """
+    Directory of segments per shard alias, with cached open segments.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize SegmentStore.
+
+        Args:
+            directory: Root directory (one subdirectory per shard alias)
+        """
+        self.directory = Path(directory)
+        self._segments: Dict[str, Dict[str, Segment]] = {}
+        self._lock = threading.Lock()
+
+    def segments(self, alias: str) -> List[Segment]:
+        """
+        Open segments for a shard, oldest first.
+
+        Args:
+            alias: Database alias
+
+        Returns:
+            List of Segment instances
+        """
+        path = self.directory / alias
+        try:
+            names = sorted(entry.name for entry in os.scandir(path) if entry.name.startswith('seg-'))
+        except FileNotFoundError:
+            return []
+        # Sorted names put the newest generation of an id range last
+        names = list({name[:_RANGE_LENGTH]: name for name in names}.values())
+        with self._lock:
+            cached = self._segments.setdefault(alias, {})
+            for stale in set(cached) - set(names):
+                del cached[stale]
+            for name in names:
+                if name not in cached:
+                    cached[name] = Segment(path / name)
+            return [cached[name] for name in names]
+
+    def watermark(self, alias: str) -> int:
+        """Highest click id already compacted on a shard (0 if none)."""
+        segments = self.segments(alias)
+        return segments[-1].max_id if segments else 0
+
+    def append(self, alias: str, clicks: List[tuple]) -> Optional[Segment]:
+        """
+        Compact clicks into a new segment for a shard.
+
+        Args:
+            alias: Database alias
+            clicks: Rows as described in write_segment, with ids above the watermark
+
+        Returns:
+            The new Segment, or None if there were no clicks
+        """
+        path = write_segment(self.directory / alias, clicks)
+        return Segment(path) if path else None
+
+    def rewrite(self, alias: str, segment: Segment, clicks: List[tuple]) -> Segment:
+        """
+        Replace a segment with the current clicks of its id range.
+        The new generation takes over atomically; the one it replaces is
+        kept for queries that already opened it, and older ones are deleted.
+
+        Args:
+            alias: Database alias
+            segment: Segment to replace
+            clicks: Rows as described in write_segment, with ids inside the segment's range
+
+        Returns:
+            The new Segment
+        """
+        directory = self.directory / alias
+        prefix = segment.path.name[:_RANGE_LENGTH]
+        generations = sorted(entry.name for entry in os.scandir(directory) if entry.name.startswith(prefix))
+        # Continue after the newest generation on disk, which may postdate `segment`
+        latest = generations[-1]
+        generation = int(latest[_RANGE_LENGTH + 2:]) if len(latest) > _RANGE_LENGTH else 0
+        path = write_segment(
+            directory, clicks, id_range=(segment.min_id, segment.max_id), generation=generation + 1
+        )
+        for name in generations[:-1]:
+            shutil.rmtree(directory / name, ignore_errors=True)
+        return Segment(path)
+
+    def drop(self, alias: str) -> None:
+        """Delete every segment of a shard (e.g. before a rebuild)."""
+        with self._lock:
+            self._segments.pop(alias, None)
+        shutil.rmtree(self.directory / alias, ignore_errors=True)
+
+
+class ColumnarEngine:
+    """
+    Vectorized per-link analytics over a snapshot of one shard's segments.
+    Results cover compacted clicks only; clicks above the snapshot's
+    watermark must be added from the database.
+    """
+
+    def __init__(self, store: SegmentStore):
+        """
+        Initialize ColumnarEngine.
+
+        Args:
+            store: SegmentStore to read from
+        """
+        self.store = store
+
+    def snapshot(self, alias: str) -> Tuple[List[Segment], int]:
+        """
+        Segments of a shard and the highest click id they cover.
+
+        Args:
+            alias: Database alias
+
+        Returns:
+            Tuple of (segments, watermark)
+        """
+        segments = self.store.segments(alias)
+        return segments, (segments[-1].max_id if segments else 0)
+
+    def count(self, segments: List[Segment], link_id: int, start: datetime = None,
+              end: datetime = None, exclude_bots: bool = False) -> int:
+        """
+        Count a link's clicks, optionally inside a time range.
+
+        Args:
+            segments: Segments from snapshot()
+            link_id: Link primary key
+            start: Inclusive lower bound
+            end: Exclusive upper bound
+            exclude_bots: Leave out clicks flagged as bots
+
+        Returns:
+            Number of matching clicks
+        """
+        total = 0
+        for segment, rows, mask in self._selections(segments, link_id, start, end, exclude_bots):
+            total += int(mask.sum()) if mask is not None else rows.stop - rows.start
+        return total
+
+    def histogram(self, segments: List[Segment], link_id: int, interval: int, start: datetime = None,
+                  end: datetime = None, exclude_bots: bool = False) -> Dict[int, int]:
+        """
+        Count a link's clicks per fixed-width time bucket.
+
+        Args:
+            segments: Segments from snapshot()
+            link_id: Link primary key
+            interval: Bucket width in seconds (buckets are aligned to the epoch)
+            start: Inclusive lower bound
+            end: Exclusive upper bound
+            exclude_bots: Leave out clicks flagged as bots
+
+        Returns:
+            Mapping of bucket start (epoch seconds) to click count
+        """
+        width = interval * 1_000_000
+        counts: Dict[int, int] = {}
+        for segment, rows, mask in self._selections(segments, link_id, start, end, exclude_bots):
+            timestamps = segment.column('timestamp')[rows]
+            if mask is not None:
+                timestamps = timestamps[mask]
+            buckets, bucket_counts = np.unique(timestamps // width, return_counts=True)
+            for bucket, bucket_count in zip(buckets.tolist(), bucket_counts.tolist()):
+                key = bucket * interval
+                counts[key] = counts.get(key, 0) + bucket_count
+        return counts
+
+    def rows(self, segments: List[Segment], link_id: int, exclude_bots: bool = False) -> List[tuple]:
+        """
+        List a link's clicks, newest first.
+
+        Args:
+            segments: Segments from snapshot()
+            link_id: Link primary key
+            exclude_bots: Leave out clicks flagged as bots
+
+        Returns:
+            List of (timestamp, ip_address, user_agent, referrer) tuples, with
+            '' for a missing referrer
+        """
+        runs = []
+        for segment, rows, mask in self._selections(segments, link_id, None, None, exclude_bots):
+            columns = [segment.column(name)[rows] for name in ('timestamp', 'ip', 'user_agent', 'referrer')]
+            if mask is not None:
+                columns = [values[mask] for values in columns]
+            agents, referrers = segment.dictionaries['user_agent'], segment.dictionaries['referrer']
+            timestamps, ips, agent_codes, referrer_codes = (values[::-1].tolist() for values in columns)
+            runs.append([
+                (from_micros(timestamp), unpack_ip(ip), agents[agent], referrers[referrer])
+                for timestamp, ip, agent, referrer in zip(timestamps, ips, agent_codes, referrer_codes)
+            ])
+        return list(heapq.merge(*runs, key=itemgetter(0), reverse=True))
+
+    def group_by(self, segments: List[Segment], link_id: int, column: str, start: datetime = None,
+                 end: datetime = None, exclude_bots: bool = False) -> Dict:
+        """
+        Count a link's clicks per distinct value of a column.
+
+        Args:
+            segments: Segments from snapshot()
+            link_id: Link primary key
+            column: One of GROUPABLE
+            start: Inclusive lower bound
+            end: Exclusive upper bound
+            exclude_bots: Leave out clicks flagged as bots
+
+        Returns:
+            Mapping of value to click count ('' for missing strings, None for unknown ASN)
+        """
+        if column not in GROUPABLE:
+            raise ValueError(f"Cannot group by {column!r}")
+        counts: Dict = {}
+        for segment, rows, mask in self._selections(segments, link_id, start, end, exclude_bots):
+            values = segment.column(column)[rows]
+            if mask is not None:
+                values = values[mask]
+            codes, code_counts = np.unique(values, return_counts=True)
+            dictionary = segment.dictionaries.get(column)
+            for value, value_count in zip(codes.tolist(), code_counts.tolist()):
+                if dictionary is not None:
+                    value = dictionary[value]
+                elif column == 'asn':
+                    value = value or None
+                counts[value] = counts.get(value, 0) + value_count
+        return counts
+
+    @staticmethod
+    def _selections(segments, link_id, start, end, exclude_bots):
+        start = to_micros(start) if start is not None else None
+        end = to_micros(end) if end is not None else None
+        for segment in segments:
+            rows, mask = segment.select(link_id, start, end, exclude_bots)
+            if rows.stop > rows.start:
+                yield segment, rows, mask
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_segment_store() -> Optional[SegmentStore]:
+    """
+    Get the process-wide segment store under LINKS_SEGMENT_DIR.
+
+    Returns:
+        SegmentStore, or None when NumPy is missing or no directory is configured
+    """
+    global _default_store
+    if np is None:
+        return None
+    directory = getattr(settings, 'LINKS_SEGMENT_DIR', None)
+    if not directory:
+        return None
+    if _default_store is None or _default_store.directory != Path(directory):
+        with _default_store_lock:
+            if _default_store is None or _default_store.directory != Path(directory):
+                _default_store = SegmentStore(directory)
+    return _default_store
+
+
+def get_columnar_engine() -> Optional[ColumnarEngine]:
+    """
+    Get an engine over the process-wide segment store.
+
+    Returns:
+        ColumnarEngine, or None when columnar analytics are unavailable
+    """
+    store = get_segment_store()
+    return ColumnarEngine(store) if store is not None else None
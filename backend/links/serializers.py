@@ -3,8 +3,26 @@ Serializers for the links app.
 Follows Single Responsibility Principle by separating serialization logic.
 """
 
+from typing import Dict
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Link
+from .exceptions import InvalidURLError
+from .models import Campaign, Link, RoutingRule
+from .routing import normalize_referrer_host
+from .services import container
+from .utils import format_datetime
+from .validators import URLValidator
+
+
+# Link columns rendered by LinkSerializer and serialize_link_row
+LINK_ROW_FIELDS = [
+    'original_url', 'slug', 'created_at', 'click_count', 'expires_at', 'max_clicks',
+    'health_status', 'last_checked_at', 'campaign_id', 'domain_id',
+]
+
+# Resolved when create() runs, honouring container.override()
+_link_service = container.proxy('link')
 
 
 class LinkSerializer(serializers.ModelSerializer):
@@ -12,11 +30,17 @@ class LinkSerializer(serializers.ModelSerializer):
     Serializer for Link model.
     Handles serialization and validation of link data.
     """
+    campaign = serializers.SlugField(max_length=50, write_only=True, required=False, allow_null=True)
+    # Host of a registered domain; defaults to the host the request was made on
+    domain = serializers.CharField(max_length=253, write_only=True, required=False, allow_null=True)
     
     class Meta:
         model = Link
-        fields = ['original_url', 'slug', 'created_at', 'click_count']
-        read_only_fields = ['slug', 'created_at', 'click_count']
+        fields = LINK_ROW_FIELDS + ['campaign', 'domain']
+        read_only_fields = [
+            'slug', 'created_at', 'click_count', 'health_status', 'last_checked_at', 'campaign_id', 'domain_id',
+        ]
+        extra_kwargs = {'max_clicks': {'min_value': 1}}
     
     def validate_original_url(self, value: str) -> str:
         """
@@ -35,14 +59,173 @@ class LinkSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("URL cannot be empty")
         return value.strip()
     
+    def validate_expires_at(self, value):
+        """
+        Validate the expiry time.
+        
+        Args:
+            value: Datetime after which the link stops redirecting
+            
+        Returns:
+            Validated datetime
+            
+        Raises:
+            serializers.ValidationError: If the time is not in the future
+        """
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError("Expiry time must be in the future")
+        return value
+    
     def create(self, validated_data):
         """
         Create a new link using the service layer.
         Follows Dependency Inversion Principle by using service instead of direct model access.
         """
-        from .services import get_default_services
-        link_service, _, _ = get_default_services()
-        return link_service.create_link(validated_data['original_url'])
+        domain = validated_data.get('domain')
+        request = self.context.get('request')
+        if not domain and request is not None:
+            # Links created through a branded host belong to that host's domain
+            host = request.get_host()
+            if _link_service.domain_resolver.lookup(host) is not None:
+                domain = host
+        return _link_service.create_link(
+            validated_data['original_url'],
+            expires_at=validated_data.get('expires_at'),
+            max_clicks=validated_data.get('max_clicks'),
+            campaign=validated_data.get('campaign'),
+            domain=domain,
+        )
+
+
+class RoutingRuleSerializer(serializers.ModelSerializer):
+    """
+    Serializer for one routing rule of a link.
+    Blank conditions match every request.
+    """
+    
+    class Meta:
+        model = RoutingRule
+        fields = ['id', 'priority', 'device', 'country', 'referrer', 'destination', 'weight']
+        read_only_fields = ['id']
+        extra_kwargs = {'weight': {'min_value': 1}}
+    
+    def validate_country(self, value: str) -> str:
+        """
+        Validate an ISO 3166 alpha-2 country code.
+        
+        Args:
+            value: Country code, possibly lower-case or blank
+            
+        Returns:
+            Upper-case code or an empty string
+            
+        Raises:
+            serializers.ValidationError: If the code is not two letters
+        """
+        value = value.strip().upper()
+        if value and (len(value) != 2 or not value.isalpha()):
+            raise serializers.ValidationError("Country must be a two-letter ISO code")
+        return value
+    
+    def validate_referrer(self, value: str) -> str:
+        """
+        Validate a referrer condition.
+        
+        Args:
+            value: Host or URL of the referring site
+            
+        Returns:
+            Normalized host or an empty string
+            
+        Raises:
+            serializers.ValidationError: If no host can be extracted
+        """
+        if not value.strip():
+            return ''
+        host = normalize_referrer_host(value)
+        if not host:
+            raise serializers.ValidationError("Referrer must be a host name such as twitter.com")
+        return host
+
+
+class RoutingRulesSerializer(serializers.Serializer):
+    """
+    Serializer for replacing the full rule set of a link.
+    """
+    rules = RoutingRuleSerializer(many=True)
+    
+    def validate_rules(self, value):
+        """
+        Validate the number of rules.
+        
+        Args:
+            value: List of validated rule dictionaries
+            
+        Returns:
+            The same list
+            
+        Raises:
+            serializers.ValidationError: If more than LINKS_ROUTING_MAX_RULES are given
+        """
+        limit = getattr(settings, 'LINKS_ROUTING_MAX_RULES', 50)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"A link can have at most {limit} routing rules")
+        return value
+
+
+class LinkImportRowSerializer(serializers.Serializer):
+    """
+    Serializer validating one row of an export file before it is imported.
+    Unlike LinkSerializer it accepts the slug, click totals and past
+    creation and expiry times, which are carried over as exported.
+    """
+    slug = serializers.SlugField(max_length=Link._meta.get_field('slug').max_length)
+    original_url = serializers.CharField(max_length=Link._meta.get_field('original_url').max_length)
+    created_at = serializers.DateTimeField(required=False, allow_null=True)
+    click_count = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    bot_click_count = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    raw_click_count = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    expires_at = serializers.DateTimeField(required=False, allow_null=True)
+    max_clicks = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    campaign = serializers.SlugField(max_length=50, required=False, allow_null=True)
+    domain = serializers.CharField(max_length=253, required=False, allow_null=True)
+    
+    def validate_original_url(self, value: str) -> str:
+        """
+        Validate and normalize the URL as link creation does.
+        
+        Raises:
+            serializers.ValidationError: If URL is invalid
+        """
+        try:
+            return URLValidator.validate(value)
+        except InvalidURLError as exc:
+            raise serializers.ValidationError(exc.detail)
+
+
+def serialize_link_row(row: Dict) -> Dict:
+    """
+    Fast-path equivalent of LinkSerializer for a `.values()` row.
+    Produces the same keys, order and formatting without a serializer instance.
+    
+    Args:
+        row: Dictionary with the LinkSerializer fields
+        
+    Returns:
+        Dictionary ready for rendering
+    """
+    return {
+        'original_url': row['original_url'],
+        'slug': row['slug'],
+        'created_at': format_datetime(row['created_at']),
+        'click_count': row['click_count'],
+        'expires_at': format_datetime(row['expires_at']),
+        'max_clicks': row['max_clicks'],
+        'health_status': row['health_status'],
+        'last_checked_at': format_datetime(row['last_checked_at']),
+        'campaign_id': row['campaign_id'],
+        'domain_id': row['domain_id'],
+    }
 
 
 class ClickDetailSerializer(serializers.Serializer):
@@ -63,3 +246,109 @@ class AnalyticsSerializer(serializers.Serializer):
     original_url = serializers.URLField()
     total_clicks = serializers.IntegerField()
     clicks = ClickDetailSerializer(many=True)
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Serializer for analytics query parameters.
+    """
+    exclude_bots = serializers.BooleanField(default=False)
+
+
+class TimeseriesQuerySerializer(AnalyticsQuerySerializer):
+    """
+    Serializer for click timeseries query parameters.
+    """
+    interval = serializers.ChoiceField(choices=['minute', 'hour', 'day'], default='hour')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        """
+        Validate the time range.
+        
+        Raises:
+            serializers.ValidationError: If start is not before end
+        """
+        if 'start' in attrs and 'end' in attrs and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError("start must be before end")
+        return attrs
+
+
+class CampaignSerializer(serializers.ModelSerializer):
+    """
+    Serializer for campaign totals.
+    """
+    
+    class Meta:
+        model = Campaign
+        fields = ['id', 'name', 'created_at', 'click_count', 'bot_click_count', 'raw_click_count']
+        read_only_fields = fields
+
+
+class CampaignStatsQuerySerializer(serializers.Serializer):
+    """
+    Serializer for campaign report query parameters (UTC days, inclusive).
+    """
+    MAX_DAYS = 366
+    
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        """
+        Validate the day range.
+        
+        Raises:
+            serializers.ValidationError: If start is after end or the range exceeds MAX_DAYS
+        """
+        start = attrs.get('start')
+        end = attrs.get('end') or timezone.now().date()
+        if start:
+            if start > end:
+                raise serializers.ValidationError("start must not be after end")
+            if (end - start).days >= self.MAX_DAYS:
+                raise serializers.ValidationError(f"A report can cover at most {self.MAX_DAYS} days")
+        return attrs
+
+
+class QRCodeQuerySerializer(serializers.Serializer):
+    """
+    Serializer for QR code query parameters.
+    """
+    size = serializers.IntegerField(min_value=64, max_value=2048, default=256)
+    format = serializers.ChoiceField(choices=['png', 'svg'], default='png')
+    ecc = serializers.ChoiceField(choices=['L', 'M', 'Q', 'H'], default='M')
+    border = serializers.IntegerField(min_value=0, max_value=16, default=4)
+    
+    def to_internal_value(self, data):
+        """Accept lower-case error correction levels and format names in any case."""
+        data = data.copy()
+        for field, convert in (('ecc', str.upper), ('format', str.lower)):
+            if isinstance(data.get(field), str):
+                data[field] = convert(data[field])
+        return super().to_internal_value(data)
+
+
+class BatchAnalyticsRequestSerializer(serializers.Serializer):
+    """
+    Serializer for batch analytics requests.
+    """
+    MAX_SLUGS = 500
+    
+    slugs = serializers.ListField(
+        child=serializers.SlugField(max_length=10),
+        allow_empty=False,
+        max_length=MAX_SLUGS,
+    )
+    exclude_bots = serializers.BooleanField(default=False)
+
+
+class AnalyticsSummarySerializer(serializers.Serializer):
+    """
+    Serializer for per-link summary analytics.
+    """
+    slug = serializers.CharField()
+    original_url = serializers.URLField()
+    total_clicks = serializers.IntegerField()
+    last_click_at = serializers.DateTimeField(allow_null=True)
@@ -1,22 +1,102 @@
 """
 Service layer for business logic.
 Follows Single Responsibility Principle by separating business logic from views.
+
+Default instances live in a lazy ServiceContainer: each is built on first
+use, so importing this package (or the views) constructs nothing.
 """
 
-from .link_service import LinkService, _default_service as default_link_service
-from .click_service import ClickService, _default_service as default_click_service
-from .analytics_service import AnalyticsService, _default_service as default_analytics_service
+from ..container import ServiceContainer
+from .link_service import LinkService
+from .click_service import ClickService
+from .analytics_service import AnalyticsService
+from .routing_service import RoutingService
+from .campaign_service import CampaignService
+
+__all__ = ['LinkService', 'ClickService', 'AnalyticsService', 'RoutingService', 'CampaignService', 'container']
+
+# Process-wide service providers; override per request or test with container.override()
+container = ServiceContainer()
+container.register('link', lambda services: LinkService(analytics_service=services.get('analytics')))
+container.register('campaign', lambda services: CampaignService())
+container.register('click', lambda services: ClickService(campaign_service=services.get('campaign')))
+container.register('analytics', lambda services: AnalyticsService())
+# Shares the link service's redirect cache so rule edits evict cached links
+container.register('routing', lambda services: RoutingService(redirect_cache=services.get('link').cache))
+
+# Names this package exported before services were built lazily
+_LEGACY_DEFAULTS = {
+    'default_link_service': 'link',
+    'default_click_service': 'click',
+    'default_analytics_service': 'analytics',
+    'default_routing_service': 'routing',
+    'default_campaign_service': 'campaign',
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY_DEFAULTS:
+        return container.get(_LEGACY_DEFAULTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ['LinkService', 'ClickService', 'AnalyticsService']
 
 # Export default instances for backward compatibility
 def get_default_services():
     """
-    Get default service instances.
+    Get default service instances, building them on first use.
     Useful for views that don't need dependency injection.
     
     Returns:
         Tuple of (LinkService, ClickService, AnalyticsService)
     """
-    return default_link_service, default_click_service, default_analytics_service
+    return container.get('link'), container.get('click'), container.get('analytics')
+
+
+def get_routing_service():
+    """
+    Get the default routing service, which shares the link service's redirect cache.
+    
+    Returns:
+        RoutingService instance
+    """
+    return container.get('routing')
+
+
+def get_campaign_service():
+    """
+    Get the default campaign service.
+    
+    Returns:
+        CampaignService instance
+    """
+    return container.get('campaign')
+
+
+def invalidate_cached_link(key):
+    """
+    Drop a link from the caches of the default services built in this process.
+    Subscribed to links.invalidation, so it runs for changes made by any worker.
+    
+    Args:
+        key: The link's cache_key
+    """
+    if container.is_built('link'):
+        container.get('link').cache.invalidate(key)
+    if container.is_built('routing'):
+        container.get('routing').route_cache.invalidate(key)
+
+
+def warm_up_on_start():
+    """
+    Warm the redirect cache when a worker process starts (see links.startup).
+    Controlled by the LINKS_WARMUP_ON_START setting.
+    
+    Returns:
+        Number of links preloaded
+    """
+    from django.conf import settings
+    
+    if not getattr(settings, 'LINKS_WARMUP_ON_START', True):
+        return 0
+    return container.get('link').warm_up_cache()
 
@@ -3,9 +3,24 @@ Analytics service for handling analytics business logic.
 Follows Single Responsibility Principle and Dependency Inversion Principle.
 """
 
-from typing import Dict
+import heapq
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+from ..cache import StaleWhileRevalidateCache
 from ..models import Link
-from ..repositories import ClickRepository
+from ..repositories import ClickRepository, LinkRepository
+from ..sharding import get_shard_aliases, shard_for_slug
+from ..utils import format_datetime
+
+if TYPE_CHECKING:
+    from ..segments import ColumnarEngine
+
+
+# Bucket widths accepted by get_timeseries
+INTERVAL_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
 
 
 class AnalyticsService:
@@ -16,46 +31,296 @@ class AnalyticsService:
     Follows Single Responsibility Principle by delegating click retrieval to ClickRepository.
     """
     
-    def __init__(self, click_repository: ClickRepository = None):
+    def __init__(
+        self,
+        click_repository: ClickRepository = None,
+        engine: 'ColumnarEngine' = None,
+        link_repository: LinkRepository = None,
+        result_cache: StaleWhileRevalidateCache = None,
+    ):
         """
-        Initialize AnalyticsService with optional repository dependency.
+        Initialize AnalyticsService with optional repository, engine and cache dependencies.
         
         Args:
             click_repository: ClickRepository instance (defaults to new instance)
+            engine: ColumnarEngine over compacted clicks (defaults to one over
+                LINKS_SEGMENT_DIR when NumPy is installed)
+            link_repository: LinkRepository reading the click versions of links
+            result_cache: Cache of click details per link (defaults to one
+                configured by the LINKS_ANALYTICS_CACHE_* settings)
         """
         self.click_repository = click_repository or ClickRepository()
+        self.link_repository = link_repository or LinkRepository()
+        self._engine = engine
+        self.result_cache = result_cache if result_cache is not None else StaleWhileRevalidateCache(
+            max_size=getattr(settings, 'LINKS_ANALYTICS_CACHE_SIZE', 1000),
+            max_stale=getattr(settings, 'LINKS_ANALYTICS_CACHE_MAX_STALE', 60),
+            workers=getattr(settings, 'LINKS_ANALYTICS_REFRESH_WORKERS', 2),
+            cacheable=self._fits_result_cache,
+        )
     
-    def get_analytics_data(self, link: Link) -> Dict:
+    @staticmethod
+    def _fits_result_cache(result: Tuple[int, List[Dict]]) -> bool:
+        """Whether click details are small enough to keep (see LINKS_ANALYTICS_CACHE_MAX_ROWS)."""
+        return len(result[1]) <= getattr(settings, 'LINKS_ANALYTICS_CACHE_MAX_ROWS', 10000)
+    
+    @property
+    def engine(self) -> Optional['ColumnarEngine']:
+        """Columnar engine, or None when columnar analytics are unavailable."""
+        if self._engine is None:
+            # NumPy is imported on first analytics use rather than at boot
+            from ..segments import ColumnarEngine, get_segment_store
+            
+            store = get_segment_store()
+            if store is not None:
+                self._engine = ColumnarEngine(store)
+        return self._engine
+    
+    def _snapshot(self, link: Link):
+        """Segments holding the link's compacted clicks and their watermark."""
+        engine = self.engine
+        if engine is None:
+            return None, [], 0
+        segments, watermark = engine.snapshot(shard_for_slug(link.slug))
+        return engine, segments, watermark
+    
+    def get_analytics_data(self, link: Link, exclude_bots: bool = False) -> Dict:
         """
         Get analytics data for a link.
+        Click details are cached per link and filter, tagged with the link's
+        click version: a hit costs one primary-key read, and after new clicks
+        the previous details are served while they are recomputed in the
+        background (for at most LINKS_ANALYTICS_CACHE_MAX_STALE seconds).
+        Links with more than LINKS_ANALYTICS_CACHE_MAX_ROWS clicks are not
+        cached, which bounds the cache's memory by rows as well as entries.
+        Compacted clicks are read from columnar segments, newer ones from the database.
         
         Args:
             link: The Link instance
+            exclude_bots: Leave out clicks flagged as bots
             
         Returns:
             Dictionary containing analytics data
         """
-        clicks = self.click_repository.get_by_link(link)
-        total_clicks = self.click_repository.count_by_link(link)
+        # The pk tells apart a deleted link and a new one that reuses its slug
+        key = (link.cache_key, link.pk, exclude_bots)
+        total_clicks, click_details = self.result_cache.get(
+            key,
+            self.link_repository.get_click_version(link),
+            lambda: self._get_click_details(link, exclude_bots),
+            lambda: self.link_repository.get_click_version(link),
+        )
+        
+        return {
+            "slug": link.slug,
+            "original_url": link.original_url,
+            "total_clicks": total_clicks,
+            "clicks": click_details,
+        }
+    
+    def _get_click_details(self, link: Link, exclude_bots: bool) -> Tuple[int, List[Dict]]:
+        """Count and list a link's clicks, newest first."""
+        engine, segments, watermark = self._snapshot(link)
+        rows = list(self.click_repository.get_detail_rows_by_link(
+            link, exclude_bots=exclude_bots, after_id=watermark
+        ))
+        if segments:
+            # Both sides are newest first
+            rows = list(heapq.merge(
+                rows, engine.rows(segments, link.pk, exclude_bots=exclude_bots), key=itemgetter(0), reverse=True
+            ))
+        total_clicks = len(rows)
         
         click_details = [
             {
-                "timestamp": click.timestamp.isoformat(),
-                "ip_address": str(click.ip_address),
-                "user_agent": click.user_agent,
-                "referrer": click.referrer or None,
+                "timestamp": format_datetime(timestamp),
+                "ip_address": str(ip_address),
+                "user_agent": user_agent,
+                "referrer": referrer or None,
             }
-            for click in clicks
+            for timestamp, ip_address, user_agent, referrer in rows
         ]
+        return total_clicks, click_details
+    
+    def get_geo_breakdown(self, link: Link, exclude_bots: bool = False) -> Dict:
+        """
+        Get per-country and per-ASN click counts for a link.
+        
+        Args:
+            link: The Link instance
+            exclude_bots: Leave out clicks flagged as bots
+            
+        Returns:
+            Dictionary with 'countries' and 'asns' breakdown lists
+        """
+        engine, segments, watermark = self._snapshot(link)
+        
+        breakdowns = {}
+        for field in ('country', 'asn'):
+            counts = {}
+            if segments:
+                counts = engine.group_by(segments, link.pk, field, exclude_bots=exclude_bots)
+            for row in self.click_repository.breakdown_by_link(
+                link, field, exclude_bots=exclude_bots, after_id=watermark
+            ):
+                counts[row[field]] = counts.get(row[field], 0) + row['clicks']
+            breakdowns[field] = sorted(
+                counts.items(), key=lambda item: (-item[1], item[0] is None, item[0] if item[0] is not None else 0)
+            )
         
         return {
             "slug": link.slug,
-            "original_url": link.original_url,
-            "total_clicks": total_clicks,
-            "clicks": click_details,
+            "countries": [
+                {"country": country or None, "clicks": clicks} for country, clicks in breakdowns['country']
+            ],
+            "asns": [
+                {"asn": asn, "clicks": clicks} for asn, clicks in breakdowns['asn']
+            ],
         }
-
-
-# Default service instance for backward compatibility
-_default_service = AnalyticsService()
+    
+    def get_timeseries(
+        self,
+        link: Link,
+        interval: str = 'hour',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        exclude_bots: bool = False,
+    ) -> Dict:
+        """
+        Get a link's click counts per UTC minute, hour or day.
+        Compacted clicks are counted from columnar segments, newer ones from the database.
+        
+        Args:
+            link: The Link instance
+            interval: One of INTERVAL_SECONDS
+            start: Inclusive lower bound (optional)
+            end: Exclusive upper bound (optional)
+            exclude_bots: Leave out clicks flagged as bots
+            
+        Returns:
+            Dictionary with the non-empty buckets in chronological order
+        """
+        from ..segments import from_micros, to_micros
+        
+        engine, segments, watermark = self._snapshot(link)
+        counts = {}
+        if segments:
+            counts = engine.histogram(
+                segments, link.pk, INTERVAL_SECONDS[interval], start, end, exclude_bots
+            )
+        for bucket, clicks in self.click_repository.timeseries_by_link(
+            link, interval, start, end, exclude_bots=exclude_bots, after_id=watermark
+        ).items():
+            key = to_micros(bucket) // 1_000_000
+            counts[key] = counts.get(key, 0) + clicks
+        
+        return {
+            "slug": link.slug,
+            "interval": interval,
+            "buckets": [
+                {"start": format_datetime(from_micros(key * 1_000_000)), "clicks": counts[key]}
+                for key in sorted(counts)
+            ],
+        }
+    
+    def compact_clicks(self, segment_rows: int = None, delay: float = None) -> int:
+        """
+        Move clicks into columnar segments, shard by shard, in primary-key order.
+        Clicks younger than the delay are left for a later run, because a
+        transaction holding a lower id may not have committed yet.
+        
+        Args:
+            segment_rows: Maximum rows per segment (defaults to LINKS_SEGMENT_ROWS)
+            delay: Seconds a click must age first (defaults to LINKS_SEGMENT_COMPACTION_DELAY)
+            
+        Returns:
+            Number of clicks compacted (0 when columnar analytics are unavailable)
+        """
+        engine = self.engine
+        if engine is None:
+            return 0
+        if segment_rows is None:
+            segment_rows = getattr(settings, 'LINKS_SEGMENT_ROWS', 250000)
+        if delay is None:
+            delay = getattr(settings, 'LINKS_SEGMENT_COMPACTION_DELAY', 300)
+        cutoff = timezone.now() - timedelta(seconds=delay)
+        
+        compacted = 0
+        for alias in get_shard_aliases():
+            while True:
+                _, watermark = engine.snapshot(alias)
+                rows = self.click_repository.get_rows_after(alias, watermark, segment_rows)
+                ready = 0
+                for row in rows:
+                    if row[2] >= cutoff:
+                        break
+                    ready += 1
+                if not ready:
+                    break
+                engine.store.append(alias, rows[:ready])
+                compacted += ready
+                if ready < segment_rows:
+                    break
+        return compacted
+    
+    def recompact_clicks(
+        self,
+        alias: str,
+        link_ids: Iterable[int] = (),
+        click_ranges: Iterable[Tuple[int, int]] = (),
+    ) -> int:
+        """
+        Rewrite a shard's segments that hold any of the given links or clicks
+        from the current database rows. Segments are immutable, so clicks
+        updated or deleted after compaction (GeoIP backfill, expiry sweeps,
+        shard moves) reach columnar analytics only through a rewrite.
+        
+        Args:
+            alias: Database alias of the shard
+            link_ids: Primary keys of links whose clicks changed or were deleted
+            click_ranges: Inclusive (first_id, last_id) ranges of changed click ids
+            
+        Returns:
+            Number of segments rewritten (0 when columnar analytics are unavailable)
+        """
+        engine = self.engine
+        if engine is None:
+            return 0
+        link_ids = sorted(set(link_ids))
+        click_ranges = list(click_ranges)
+        
+        rewritten = 0
+        segments, _ = engine.snapshot(alias)
+        for segment in segments:
+            overlaps = any(first <= segment.max_id and last >= segment.min_id for first, last in click_ranges)
+            if overlaps or segment.holds_any(link_ids):
+                rows = self.click_repository.get_rows_between(alias, segment.min_id, segment.max_id)
+                engine.store.rewrite(alias, segment, rows)
+                rewritten += 1
+        return rewritten
+    
+    def get_batch_summary(self, links: Iterable[Link], exclude_bots: bool = False) -> List[Dict]:
+        """
+        Get summary analytics for many links with a constant number of queries.
+        
+        Args:
+            links: Link instances to summarize
+            exclude_bots: Leave out clicks flagged as bots
+            
+        Returns:
+            List of summary dictionaries, one per link, in input order
+        """
+        links = list(links)
+        totals = self.click_repository.summarize_by_links(links, exclude_bots=exclude_bots)
+        
+        summaries = []
+        for link in links:
+            stats = totals.get(link.slug, {})
+            summaries.append({
+                "slug": link.slug,
+                "original_url": link.original_url,
+                "total_clicks": stats.get('total_clicks', 0),
+                "last_click_at": format_datetime(stats.get('last_click_at')),
+            })
+        return summaries
 
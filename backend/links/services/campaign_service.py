@@ -0,0 +1,122 @@
+"""
+Campaign service for grouping links and reporting their clicks.
+Follows Single Responsibility Principle and Dependency Inversion Principle.
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Optional
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from ..models import Campaign, Link
+from ..repositories import CampaignRepository
+from ..repositories.campaign_repository import COUNTER_FIELDS
+from ..utils import format_datetime
+
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignService:
+    """
+    Service for campaign business logic.
+    Counters are maintained incrementally from the click path, so a
+    report reads one totals row and one row per day in range.
+    """
+    
+    def __init__(self, repository: CampaignRepository = None):
+        """
+        Initialize CampaignService with an optional repository dependency.
+        
+        Args:
+            repository: CampaignRepository instance (defaults to new instance)
+        """
+        self.repository = repository or CampaignRepository()
+    
+    def get_or_create_campaign(self, name: str) -> Campaign:
+        """
+        Get a campaign by name, creating it on first use.
+        
+        Args:
+            name: Campaign name (slug)
+            
+        Returns:
+            Campaign instance
+        """
+        return self.repository.get_or_create(name)
+    
+    def get_campaign(self, name: str) -> Optional[Campaign]:
+        """
+        Get a campaign by name.
+        
+        Args:
+            name: Campaign name
+            
+        Returns:
+            Campaign instance or None if not found
+        """
+        return self.repository.get_by_name(name)
+    
+    def get_all_campaigns(self):
+        """
+        Get all campaigns.
+        
+        Returns:
+            QuerySet of campaigns ordered by name
+        """
+        return self.repository.get_all()
+    
+    def record_clicks(self, link: Link, *fields: str, when: datetime = None) -> None:
+        """
+        Add a click to the counters of the link's campaign, if it has one.
+        Failures are logged rather than raised: the click itself is already
+        recorded and must not fail because of a reporting side table.
+        
+        Args:
+            link: The Link instance that was clicked
+            fields: Counter field names to increment
+            when: Time of the click (defaults to now)
+        """
+        if link.campaign_id is None:
+            return
+        day = (when or timezone.now()).astimezone(dt_timezone.utc).date()
+        try:
+            self.repository.increment_counters(link.campaign_id, day, *fields)
+        except DatabaseError:
+            logger.warning("Could not update counters of campaign %s", link.campaign_id, exc_info=True)
+    
+    def get_campaign_stats(self, campaign: Campaign, start: date = None, end: date = None) -> Dict:
+        """
+        Build a campaign report with totals and one entry per day.
+        
+        Args:
+            campaign: The Campaign instance
+            start: First UTC day (defaults to LINKS_CAMPAIGN_DEFAULT_DAYS before end)
+            end: Last UTC day (defaults to today)
+            
+        Returns:
+            Dictionary with name, totals, link_count and daily buckets
+            (days without clicks are included with zero counts)
+        """
+        end = end or timezone.now().astimezone(dt_timezone.utc).date()
+        start = start or end - timedelta(days=getattr(settings, 'LINKS_CAMPAIGN_DEFAULT_DAYS', 30) - 1)
+        
+        rows = {row['day']: row for row in self.repository.get_daily_rows(campaign, start, end)}
+        zero = {field: 0 for field in COUNTER_FIELDS}
+        daily = []
+        day = start
+        while day <= end:
+            counts = rows.get(day, zero)
+            daily.append({'day': day.isoformat(), **{field: counts[field] for field in COUNTER_FIELDS}})
+            day += timedelta(days=1)
+        
+        return {
+            'name': campaign.name,
+            'created_at': format_datetime(campaign.created_at),
+            'link_count': self.repository.count_links(campaign),
+            'click_count': campaign.click_count,
+            'bot_click_count': campaign.bot_click_count,
+            'raw_click_count': campaign.raw_click_count,
+            'daily': daily,
+        }
@@ -3,11 +3,20 @@ Click service for handling click tracking business logic.
 Follows Single Responsibility Principle and Dependency Inversion Principle.
 """
 
+from typing import Optional
 from django.db import transaction
 from django.http import HttpRequest
+from ..anomaly import RateAnomalyDetector, get_anomaly_detector
+from ..bot_detection import BotClassifier, get_bot_classifier
+from ..dedup import build_click_deduplicator
+from ..exceptions import LinkExpiredError
+from ..geoip import GeoIPIndex, get_geoip_index
 from ..models import Link, Click
+from ..pubsub import ClickBroker, get_click_broker
 from ..repositories import ClickRepository, LinkRepository
-from ..utils import get_client_ip
+from ..sharding import shard_for_slug
+from ..utils import format_datetime, get_client_ip
+from .campaign_service import CampaignService
 
 
 class ClickService:
@@ -17,43 +26,173 @@ class ClickService:
     Follows Dependency Inversion Principle by depending on repository abstractions.
     """
     
-    def __init__(self, click_repository: ClickRepository = None, link_repository: LinkRepository = None):
+    def __init__(
+        self,
+        click_repository: ClickRepository = None,
+        link_repository: LinkRepository = None,
+        broker: ClickBroker = None,
+        bot_classifier: BotClassifier = None,
+        geoip: GeoIPIndex = None,
+        deduplicator=None,
+        campaign_service: CampaignService = None,
+        anomaly_detector: RateAnomalyDetector = None,
+    ):
         """
-        Initialize ClickService with optional repository dependencies.
+        Initialize ClickService with optional repository and enrichment dependencies.
         
         Args:
             click_repository: ClickRepository instance (defaults to new instance)
             link_repository: LinkRepository instance (defaults to new instance)
+            broker: ClickBroker for live click events (defaults to the process-wide broker)
+            bot_classifier: BotClassifier for user agents (defaults to the process-wide classifier)
+            geoip: GeoIPIndex for IP enrichment (defaults to LINKS_GEOIP_DATABASE, if configured)
+            deduplicator: Repeat-click detector (defaults to one built from LINKS_CLICK_DEDUP_* settings)
+            campaign_service: CampaignService maintaining campaign counters (defaults to new instance)
+            anomaly_detector: Click-rate spike detector (defaults to the process-wide detector, if enabled)
         """
         self.click_repository = click_repository or ClickRepository()
         self.link_repository = link_repository or LinkRepository()
+        self._broker = broker
+        self._bot_classifier = bot_classifier
+        self._geoip = geoip
+        self._deduplicator = deduplicator
+        self._deduplicator_resolved = deduplicator is not None
+        self.campaign_service = campaign_service or CampaignService()
+        self._anomaly_detector = anomaly_detector
+        self._anomaly_detector_resolved = anomaly_detector is not None
     
-    def record_click(self, link: Link, request: HttpRequest) -> Click:
+    @property
+    def broker(self) -> ClickBroker:
+        """Live click event broker, resolved on first use."""
+        if self._broker is None:
+            self._broker = get_click_broker()
+        return self._broker
+    
+    @property
+    def bot_classifier(self) -> BotClassifier:
+        """User-agent bot classifier, resolved on first use."""
+        if self._bot_classifier is None:
+            self._bot_classifier = get_bot_classifier()
+        return self._bot_classifier
+    
+    @property
+    def geoip(self):
+        """IP enrichment index, or None when no database is configured."""
+        if self._geoip is None:
+            self._geoip = get_geoip_index()
+        return self._geoip
+    
+    @property
+    def deduplicator(self):
+        """Repeat-click detector, or None when deduplication is disabled."""
+        if not self._deduplicator_resolved:
+            self._deduplicator = build_click_deduplicator()
+            self._deduplicator_resolved = True
+        return self._deduplicator
+    
+    @property
+    def anomaly_detector(self) -> Optional[RateAnomalyDetector]:
+        """Click-rate spike detector, or None when detection is disabled."""
+        if not self._anomaly_detector_resolved:
+            self._anomaly_detector = get_anomaly_detector()
+            self._anomaly_detector_resolved = True
+        return self._anomaly_detector
+    
+    def record_click(self, link: Link, request: HttpRequest) -> Optional[Click]:
         """
         Record a click for a link and increment the click count.
+        Clicks from bots and crawlers are flagged and counted in
+        bot_click_count instead of click_count. Repeats of the same
+        IP and user agent inside the dedup window only bump raw_click_count.
+        Every attempt, repeats included, feeds the click-rate anomaly detector.
+        The same counters of the link's campaign, if any, are updated
+        after the click commits.
+        Human clicks on a link with max_clicks are admitted atomically
+        against the limit.
         
         Args:
             link: The Link instance that was clicked
             request: The HTTP request object
             
         Returns:
-            Created Click instance
+            Created Click instance, or None if the click was a suppressed repeat
+            
+        Raises:
+            LinkExpiredError: If the link reached max_clicks before this click
         """
-        with transaction.atomic():
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        ip_address = get_client_ip(request)
+        
+        # Distinguishes equal slugs on different domains
+        key = link.cache_key
+        detector = self.anomaly_detector
+        deduplicator = self.deduplicator
+        if deduplicator is not None and deduplicator.is_repeat(key, ip_address, user_agent):
+            if detector is not None:
+                detector.observe(key, repeat=True)
+            self.link_repository.increment_counters(link, 'raw_click_count')
+            self.campaign_service.record_clicks(link, 'raw_click_count')
+            return None
+        
+        is_bot = self.bot_classifier.is_bot(user_agent)
+        geo = self.geoip.lookup(ip_address) if self.geoip is not None else None
+        if detector is not None:
+            detector.observe(key, is_bot=is_bot)
+        
+        shard = shard_for_slug(link.slug)
+        counters = ('bot_click_count' if is_bot else 'click_count', 'raw_click_count')
+        with transaction.atomic(using=shard):
             # Increment click count atomically
-            link.click_count += 1
-            self.link_repository.update_click_count(link, link.click_count)
+            if is_bot or link.max_clicks is None:
+                self.link_repository.increment_counters(link, *counters)
+            elif not self.link_repository.increment_counters_within_limit(link, *counters):
+                raise LinkExpiredError()
             
             # Create click record
             click = self.click_repository.create(
                 link=link,
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                referrer=request.META.get('HTTP_REFERER', '')
+                ip_address=ip_address,
+                user_agent=user_agent,
+                referrer=request.META.get('HTTP_REFERER', ''),
+                is_bot=is_bot,
+                country=geo.country if geo else '',
+                asn=geo.asn if geo else None,
             )
+            
+            # Campaign counters live on the default database; only count committed clicks
+            if link.campaign_id is not None:
+                transaction.on_commit(
+                    lambda: self.campaign_service.record_clicks(link, *counters, when=click.timestamp),
+                    using=shard,
+                )
+            
+            # Read the total this click produced; the cached instance's counter is per worker
+            total_clicks = self.link_repository.get_click_count(link)
+            
+            # Notify live dashboards once the click is durable
+            transaction.on_commit(lambda: self.publish_click(link, click, total_clicks), using=shard)
         
         return click
     
+    def publish_click(self, link: Link, click: Click, total_clicks: Optional[int]) -> None:
+        """
+        Publish a recorded click to live stream subscribers.
+        
+        Args:
+            link: The Link instance that was clicked
+            click: The recorded Click instance
+            total_clicks: The link's click_count right after this click
+        """
+        self.broker.publish(link.cache_key, {
+            "timestamp": format_datetime(click.timestamp),
+            "ip_address": str(click.ip_address),
+            "user_agent": click.user_agent,
+            "referrer": click.referrer or None,
+            "is_bot": click.is_bot,
+            "country": click.country or None,
+            "total_clicks": total_clicks,
+        })
+    
     def get_clicks_for_link(self, link: Link):
         """
         Retrieve all clicks for a specific link.
@@ -66,7 +205,3 @@ class ClickService:
         """
         return self.click_repository.get_by_link(link)
 
-
-# Default service instance for backward compatibility
-_default_service = ClickService()
-
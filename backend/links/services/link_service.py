@@ -3,14 +3,29 @@ Link service for handling link-related business logic.
 Follows Single Responsibility Principle and Dependency Inversion Principle.
 """
 
-from typing import Optional
-from django.db import transaction
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+from django.conf import settings
+from django.db import DatabaseError, transaction
 from django.core.exceptions import ValidationError
-from ..models import Link
-from ..repositories import LinkRepository
+from django.utils import timezone
+from ..cache import RedirectCache
+from ..domains import DomainResolver, get_domain_resolver
+from ..models import PRIMARY_DOMAIN_ID, Link, link_cache_key
+from ..repositories import CampaignRepository, ClickRepository, LinkRepository
+from ..sharding import get_shard_aliases, shard_for_slug
 from ..utils import generate_unique_slug
-from ..exceptions import InvalidURLError
+from ..exceptions import InvalidURLError, UnknownDomainError
 from ..validators import URLValidator
+from .analytics_service import AnalyticsService
+
+if TYPE_CHECKING:
+    from ..health import HealthChecker
+
+
+logger = logging.getLogger(__name__)
 
 
 class LinkService:
@@ -20,53 +35,129 @@ class LinkService:
     Follows Dependency Inversion Principle by depending on repository abstraction.
     """
     
-    def __init__(self, repository: LinkRepository = None):
+    def __init__(
+        self,
+        repository: LinkRepository = None,
+        cache: RedirectCache = None,
+        click_repository: ClickRepository = None,
+        campaign_repository: CampaignRepository = None,
+        domain_resolver: DomainResolver = None,
+        analytics_service: AnalyticsService = None,
+    ):
         """
-        Initialize LinkService with optional repository dependency.
+        Initialize LinkService with optional repository and cache dependencies.
         
         Args:
             repository: LinkRepository instance (defaults to new instance)
+            cache: RedirectCache instance (defaults to one configured by LINKS_REDIRECT_CACHE_SIZE and _TTL)
+            click_repository: ClickRepository used when sweeping expired links
+            campaign_repository: CampaignRepository resolving campaign names on creation
+            domain_resolver: DomainResolver for branded hosts (defaults to the process-wide resolver)
+            analytics_service: AnalyticsService whose segments drop swept clicks (defaults to new instance)
         """
         self.repository = repository or LinkRepository()
+        self.click_repository = click_repository or ClickRepository()
+        self.campaign_repository = campaign_repository or CampaignRepository()
+        self.cache = cache if cache is not None else RedirectCache(
+            getattr(settings, 'LINKS_REDIRECT_CACHE_SIZE', 10000),
+            ttl=getattr(settings, 'LINKS_REDIRECT_CACHE_TTL', 60),
+        )
+        self._domain_resolver = domain_resolver
+        self._analytics_service = analytics_service
+    
+    @property
+    def domain_resolver(self) -> DomainResolver:
+        """Host to domain resolver, resolved on first use."""
+        if self._domain_resolver is None:
+            self._domain_resolver = get_domain_resolver()
+        return self._domain_resolver
     
-    def create_link(self, original_url: str) -> Link:
+    @property
+    def analytics_service(self) -> AnalyticsService:
+        """Analytics service, resolved on first use."""
+        if self._analytics_service is None:
+            self._analytics_service = AnalyticsService()
+        return self._analytics_service
+    
+    def create_link(
+        self,
+        original_url: str,
+        expires_at: Optional[datetime] = None,
+        max_clicks: Optional[int] = None,
+        campaign: Optional[str] = None,
+        domain: Optional[str] = None,
+    ) -> Link:
         """
         Create a new shortened link.
+        The slug is drawn from the domain's own keyspace.
         
         Args:
             original_url: The original URL to shorten
+            expires_at: When the link stops redirecting (optional)
+            max_clicks: Human clicks after which the link stops redirecting (optional)
+            campaign: Name of the campaign to add the link to, created if needed (optional)
+            domain: Host of a registered domain to serve the link on (defaults to the primary domain)
             
         Returns:
             Created Link instance
             
         Raises:
             InvalidURLError: If URL validation fails
+            UnknownDomainError: If the domain is not registered
         """
         # Validate and normalize URL
         normalized_url = URLValidator.validate(original_url)
+        domain_id = PRIMARY_DOMAIN_ID
+        if domain:
+            domain_id = self.domain_resolver.lookup(domain)
+            if domain_id is None:
+                raise UnknownDomainError()
+        campaign_id = self.campaign_repository.get_or_create(campaign).pk if campaign else None
         
         try:
-            with transaction.atomic():
-                slug = generate_unique_slug(repository=self.repository)
+            slug = generate_unique_slug(repository=self.repository, domain_id=domain_id)
+            with transaction.atomic(using=shard_for_slug(slug)):
                 link = self.repository.create(
                     original_url=normalized_url,
-                    slug=slug
+                    slug=slug,
+                    expires_at=expires_at,
+                    max_clicks=max_clicks,
+                    campaign_id=campaign_id,
+                    domain_id=domain_id,
                 )
             return link
         except ValidationError as e:
             raise InvalidURLError(f"Invalid URL: {str(e)}")
     
-    def get_link_by_slug(self, slug: str) -> Optional[Link]:
+    def get_link_by_slug(self, slug: str, domain_id: int = PRIMARY_DOMAIN_ID) -> Optional[Link]:
         """
         Retrieve a link by its slug.
+        Served from the redirect cache; concurrent misses share one query.
         
         Args:
             slug: The link slug
+            domain_id: Domain whose keyspace the slug belongs to
             
         Returns:
             Link instance or None if not found
         """
-        return self.repository.get_by_slug(slug)
+        return self.cache.get_or_load(
+            link_cache_key(domain_id, slug),
+            lambda key: self.repository.get_by_slug(slug, domain_id),
+        )
+    
+    def get_links_by_slugs(self, slugs: Iterable[str], domain_id: int = PRIMARY_DOMAIN_ID) -> List[Link]:
+        """
+        Retrieve many links by slug in a single query.
+        
+        Args:
+            slugs: The link slugs
+            domain_id: Domain whose keyspace the slugs belong to
+            
+        Returns:
+            List of found Link instances (missing slugs are omitted)
+        """
+        return list(self.repository.get_by_slugs(slugs, domain_id))
     
     def get_all_links(self):
         """
@@ -76,8 +167,161 @@ class LinkService:
             QuerySet of all links
         """
         return self.repository.get_all()
-
-
-# Default service instance for backward compatibility
-_default_service = LinkService()
+    
+    def get_all_link_rows(self, *fields: str):
+        """
+        Retrieve all links as dictionaries ordered by creation date.
+        
+        Args:
+            fields: Field names to select
+            
+        Returns:
+            Values QuerySet of all links
+        """
+        return self.repository.get_all_rows(*fields)
+    
+    def sweep_expired_links(
+        self,
+        batch_size: int = None,
+        archive: Callable[[str, List[Dict]], None] = None,
+        now: datetime = None,
+    ) -> int:
+        """
+        Delete expired and exhausted links together with their clicks.
+        Works shard by shard in small batches, each delete in its own short
+        statement, so no long-running transaction or lock is ever held.
+        Columnar segments holding the deleted clicks are rewritten once per shard.
+        
+        Args:
+            batch_size: Rows per select/delete (defaults to LINKS_EXPIRY_SWEEP_BATCH_SIZE)
+            archive: Optional callable receiving ('link' or 'click', rows) before each delete
+            now: Reference time (defaults to the current time)
+            
+        Returns:
+            Number of links deleted
+        """
+        if batch_size is None:
+            batch_size = getattr(settings, 'LINKS_EXPIRY_SWEEP_BATCH_SIZE', 500)
+        now = now or timezone.now()
+        
+        deleted = 0
+        for alias in get_shard_aliases():
+            deleted_ids = []
+            while True:
+                links = self.repository.get_expired_rows(alias, now, batch_size)
+                if not links:
+                    break
+                link_ids = [row['id'] for row in links]
+                
+                while True:
+                    clicks = self.click_repository.get_rows_for_link_ids(alias, link_ids, batch_size)
+                    if not clicks:
+                        break
+                    if archive is not None:
+                        archive('click', clicks)
+                    self.click_repository.delete_by_ids(alias, [row['id'] for row in clicks])
+                
+                if archive is not None:
+                    archive('link', links)
+                self.repository.delete_by_ids(alias, link_ids)
+                for row in links:
+                    self.cache.invalidate(link_cache_key(row['domain_id'], row['slug']))
+                deleted += len(links)
+                deleted_ids.extend(link_ids)
+            if deleted_ids:
+                self.analytics_service.recompact_clicks(alias, link_ids=deleted_ids)
+        return deleted
+    
+    def check_link_health(
+        self,
+        checker: 'HealthChecker' = None,
+        batch_size: int = None,
+        max_links: int = None,
+        ttl: float = None,
+        now: datetime = None,
+    ) -> Dict[str, int]:
+        """
+        Probe the destinations of links that are unchecked or older than the TTL.
+        Each shard is processed in batches. Every batch probes its distinct
+        URLs concurrently, then stores results with one UPDATE per outcome.
+        
+        Args:
+            checker: HealthChecker to probe with (defaults to the process-wide checker)
+            batch_size: Links per select/probe/update round (defaults to LINKS_HEALTH_CHECK_BATCH_SIZE)
+            max_links: Stop after this many links (defaults to LINKS_HEALTH_CHECK_MAX_LINKS; 0 = no limit)
+            ttl: Seconds before a link is checked again (defaults to the checker's TTL)
+            now: Reference time (defaults to the current time)
+            
+        Returns:
+            Dictionary of health status -> number of links checked
+            
+        Raises:
+            RuntimeError: If no checker is given and aiohttp is not installed
+        """
+        # aiohttp is imported only by processes that actually run checks
+        from ..health import get_health_checker
+        
+        checker = checker or get_health_checker()
+        if checker is None:
+            raise RuntimeError("Link health checks require the aiohttp package")
+        if batch_size is None:
+            batch_size = getattr(settings, 'LINKS_HEALTH_CHECK_BATCH_SIZE', 500)
+        if max_links is None:
+            max_links = getattr(settings, 'LINKS_HEALTH_CHECK_MAX_LINKS', 5000)
+        ttl = checker.ttl if ttl is None else ttl
+        now = now or timezone.now()
+        checked_before = now - timedelta(seconds=ttl)
+        
+        counts = {}
+        remaining = max_links or None
+        for alias in get_shard_aliases():
+            while remaining is None or remaining > 0:
+                limit = batch_size if remaining is None else min(batch_size, remaining)
+                rows = self.repository.get_rows_due_for_check(alias, checked_before, limit)
+                if not rows:
+                    break
+                results = checker.check(row['original_url'] for row in rows)
+                checked_at = timezone.now()
+                
+                outcomes = {}
+                for row in rows:
+                    result = results[row['original_url']]
+                    outcomes.setdefault((result.status, result.code), []).append(row['id'])
+                for (status, code), ids in outcomes.items():
+                    self.repository.set_health(alias, ids, status, code, checked_at)
+                    counts[status] = counts.get(status, 0) + len(ids)
+                
+                if remaining is not None:
+                    remaining -= len(rows)
+        return counts
+    
+    def warm_up_cache(self, limit: int = None, time_budget: float = None) -> int:
+        """
+        Preload the most clicked links into the redirect cache.
+        Stops when the limit, the time budget or the cache capacity is reached.
+        
+        Args:
+            limit: Maximum number of links to load (defaults to LINKS_WARMUP_LIMIT)
+            time_budget: Maximum seconds to spend (defaults to LINKS_WARMUP_TIME_BUDGET)
+            
+        Returns:
+            Number of links loaded
+        """
+        if limit is None:
+            limit = getattr(settings, 'LINKS_WARMUP_LIMIT', 1000)
+        if time_budget is None:
+            time_budget = getattr(settings, 'LINKS_WARMUP_TIME_BUDGET', 2.0)
+        
+        deadline = time.monotonic() + time_budget
+        loaded = 0
+        try:
+            for link in self.repository.get_most_clicked(limit):
+                if self.cache.is_full() or time.monotonic() > deadline:
+                    break
+                self.cache.set(link.cache_key, link)
+                loaded += 1
+        except DatabaseError:
+            logger.warning("Redirect cache warm-up failed", exc_info=True)
+        
+        return loaded
 
@@ -0,0 +1,133 @@
+"""
+Routing service for choosing a link's destination per request.
+Follows Single Responsibility Principle and Dependency Inversion Principle.
+"""
+
+from typing import Dict, Iterable, List
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest
+from ..cache import RedirectCache
+from ..geoip import GeoIPIndex, get_geoip_index
+from ..invalidation import get_invalidation_bus
+from ..models import Link
+from ..repositories import RoutingRuleRepository
+from ..routing import DeviceClassifier, RequestTraits, RouteCache, get_device_classifier
+from ..sharding import shard_for_slug
+
+
+class RoutingService:
+    """
+    Service for per-link routing rules.
+    Compiles each link's rules once per routing_version and evaluates
+    them on the redirect path without touching the database.
+    """
+    
+    def __init__(
+        self,
+        repository: RoutingRuleRepository = None,
+        route_cache: RouteCache = None,
+        redirect_cache: RedirectCache = None,
+        device_classifier: DeviceClassifier = None,
+        geoip: GeoIPIndex = None,
+    ):
+        """
+        Initialize RoutingService with optional repository, cache and enrichment dependencies.
+        
+        Args:
+            repository: RoutingRuleRepository instance (defaults to new instance)
+            route_cache: RouteCache for compiled rules (defaults to one sized by LINKS_ROUTING_CACHE_SIZE)
+            redirect_cache: Redirect cache to invalidate when rules change (optional)
+            device_classifier: DeviceClassifier for user agents (defaults to the process-wide classifier)
+            geoip: GeoIPIndex for country conditions (defaults to LINKS_GEOIP_DATABASE, if configured)
+        """
+        self.repository = repository or RoutingRuleRepository()
+        self.route_cache = route_cache if route_cache is not None else RouteCache(
+            getattr(settings, 'LINKS_ROUTING_CACHE_SIZE', 10000)
+        )
+        self.redirect_cache = redirect_cache
+        self._device_classifier = device_classifier
+        self._geoip = geoip
+    
+    @property
+    def device_classifier(self) -> DeviceClassifier:
+        """User-agent device classifier, resolved on first use."""
+        if self._device_classifier is None:
+            self._device_classifier = get_device_classifier()
+        return self._device_classifier
+    
+    @property
+    def geoip(self):
+        """IP enrichment index, or None when no database is configured."""
+        if self._geoip is None:
+            self._geoip = get_geoip_index()
+        return self._geoip
+    
+    def resolve_destination(self, link: Link, request: HttpRequest) -> str:
+        """
+        Choose where a redirect for this request should go.
+        Links that never had rules return immediately; others use the
+        compiled routes for their current routing_version.
+        
+        Args:
+            link: The Link being redirected
+            request: The HTTP request object
+        
+        Returns:
+            Destination URL (the link's original URL when no rule matches)
+        """
+        if not link.routing_version:
+            return link.original_url
+        routes = self.route_cache.get_or_compile(link, self.repository.get_rows_for_link)
+        if not routes.branches:
+            return link.original_url
+        traits = RequestTraits(request, self.device_classifier, self.geoip)
+        return routes.choose(traits) or link.original_url
+    
+    def get_rules(self, link: Link) -> List[Dict]:
+        """
+        Get a link's rules in evaluation order.
+        
+        Args:
+            link: The Link instance
+        
+        Returns:
+            List of rule rows
+        """
+        return self.repository.get_rows_for_link(link)
+    
+    def replace_rules(self, link: Link, rules: Iterable[Dict]) -> List[Dict]:
+        """
+        Replace every rule of a link; takes effect on the next redirect served by any worker.
+        
+        Args:
+            link: The Link instance
+            rules: Validated rule field dictionaries
+        
+        Returns:
+            The stored rules in evaluation order
+        """
+        self.repository.replace_for_link(link, list(rules))
+        self.rules_changed(link, bump=False)
+        return self.get_rules(link)
+    
+    def rules_changed(self, link: Link, bump: bool = True) -> None:
+        """
+        Invalidate compiled routes after a link's rules were edited.
+        Other workers hold cached Link instances with the old routing_version,
+        so the change is also published on the invalidation bus once committed.
+        
+        Args:
+            link: The Link instance
+            bump: Also increment routing_version (for edits made outside replace_rules)
+        """
+        if bump:
+            self.repository.bump_version(link)
+        self.route_cache.invalidate(link.cache_key)
+        if self.redirect_cache is not None:
+            # Cached instances would still carry the old routing_version
+            self.redirect_cache.invalidate(link.cache_key)
+        key = link.cache_key
+        transaction.on_commit(
+            lambda: get_invalidation_bus().publish(key), using=shard_for_slug(link.slug)
+        )
@@ -0,0 +1,164 @@
+"""
+Horizontal sharding of links and clicks by slug hash.
+Follows Single Responsibility Principle by centralizing shard placement.
+
+Every slug hashes to one of NUM_BUCKETS stable virtual buckets, and
+contiguous bucket ranges are assigned to database aliases by the shard map.
+A link and all of its clicks live on the shard that owns its bucket, so the
+shard of any row can be derived from the slug alone. Rebalancing moves
+whole bucket ranges between aliases without rehashing anything else.
+"""
+
+import heapq
+import itertools
+import zlib
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+
+
+NUM_BUCKETS = 1024
+
+
+def bucket_for_slug(slug: str) -> int:
+    """
+    Map a slug to its virtual bucket.
+    Uses CRC32 so the result is stable across processes and releases.
+
+    Args:
+        slug: The link slug
+
+    Returns:
+        Bucket number in [0, NUM_BUCKETS)
+    """
+    return zlib.crc32(slug.encode('utf-8')) % NUM_BUCKETS
+
+
+def get_shard_aliases() -> List[str]:
+    """
+    Get the database aliases holding link data.
+
+    Returns:
+        List of aliases from LINKS_SHARDS (defaults to ['default'])
+    """
+    return list(getattr(settings, 'LINKS_SHARDS', None) or ['default'])
+
+
+def get_shard_map() -> List[Tuple[int, int, str]]:
+    """
+    Get the bucket range -> alias assignment.
+    Uses LINKS_SHARD_MAP when set, otherwise splits buckets evenly.
+
+    Returns:
+        List of inclusive (first_bucket, last_bucket, alias) ranges
+    """
+    configured = getattr(settings, 'LINKS_SHARD_MAP', None)
+    if configured:
+        return [(int(first), int(last), alias) for first, last, alias in configured]
+
+    aliases = get_shard_aliases()
+    size = NUM_BUCKETS // len(aliases)
+    ranges = []
+    for index, alias in enumerate(aliases):
+        first = index * size
+        last = NUM_BUCKETS - 1 if index == len(aliases) - 1 else first + size - 1
+        ranges.append((first, last, alias))
+    return ranges
+
+
+def shard_for_bucket(bucket: int) -> str:
+    """
+    Get the alias owning a bucket.
+
+    Args:
+        bucket: Bucket number
+
+    Returns:
+        Database alias
+    """
+    for first, last, alias in get_shard_map():
+        if first <= bucket <= last:
+            return alias
+    raise ValueError(f"Bucket {bucket} is not assigned to any shard")
+
+
+def shard_for_slug(slug: str) -> str:
+    """
+    Get the alias holding a slug's link and clicks.
+
+    Args:
+        slug: The link slug
+
+    Returns:
+        Database alias
+    """
+    if len(get_shard_aliases()) == 1 and not getattr(settings, 'LINKS_SHARD_MAP', None):
+        return get_shard_aliases()[0]
+    return shard_for_bucket(bucket_for_slug(slug))
+
+
+def group_by_shard(slugs: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Group slugs by the alias that holds them.
+
+    Args:
+        slugs: Link slugs
+
+    Returns:
+        Mapping of alias to its slugs
+    """
+    groups: Dict[str, List[str]] = {}
+    for slug in slugs:
+        groups.setdefault(shard_for_slug(slug), []).append(slug)
+    return groups
+
+
+def is_sharded() -> bool:
+    """Return True when link data is spread over more than one alias."""
+    return len(get_shard_aliases()) > 1
+
+
+class FanOutQuery:
+    """
+    Ordered, sliceable view over the same query run on every shard.
+    Slicing fetches at most `stop` rows per shard and k-way merges them,
+    which is what Django's Paginator needs for `count()` and page slices.
+    """
+
+    def __init__(self, querysets: Sequence, key: Callable, reverse: bool = False):
+        """
+        Initialize FanOutQuery.
+
+        Args:
+            querysets: One queryset per shard, each already ordered by key
+            key: Callable extracting the ordering value from a row
+            reverse: True when querysets are ordered descending
+        """
+        self.querysets = list(querysets)
+        self.key = key
+        self.reverse = reverse
+
+    def count(self) -> int:
+        """Total number of rows across all shards."""
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self):
+        return heapq.merge(
+            *(queryset.iterator() for queryset in self.querysets),
+            key=self.key,
+            reverse=self.reverse,
+        )
+
+    def __getitem__(self, item):
+        if isinstance(item, int):
+            return self[item:item + 1][0]
+        start, stop = item.start or 0, item.stop
+        parts = [
+            list(queryset if stop is None else queryset[:stop])
+            for queryset in self.querysets
+        ]
+        merged = heapq.merge(*parts, key=self.key, reverse=self.reverse)
+        return list(itertools.islice(merged, start, stop))
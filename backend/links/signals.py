@@ -0,0 +1,34 @@
+"""
+Model signal handlers for the links app.
+Follows Single Responsibility Principle by keeping cache invalidation out of models and admin.
+
+Edits and deletes of a Link (from the admin, a shell or a sweep) drop the
+link from every worker's caches once the change is committed, so no worker
+keeps redirecting to an old destination or to a deleted or expired link.
+Counter updates go through QuerySet.update() and send no signal.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .invalidation import get_invalidation_bus
+from .models import Link
+
+
+def _publish_on_commit(link: Link, using: str) -> None:
+    key = link.cache_key
+    transaction.on_commit(lambda: get_invalidation_bus().publish(key), using=using)
+
+
+@receiver(post_save, sender=Link, dispatch_uid='links-link-saved')
+def link_saved(sender, instance, created, using, **kwargs):
+    """Invalidate a changed link; new links cannot be cached anywhere yet."""
+    if not created:
+        _publish_on_commit(instance, using)
+
+
+@receiver(post_delete, sender=Link, dispatch_uid='links-link-deleted')
+def link_deleted(sender, instance, using, **kwargs):
+    """Invalidate a deleted link."""
+    _publish_on_commit(instance, using)
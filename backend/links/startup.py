@@ -0,0 +1,70 @@
+"""
+Per-process start-up of a serving worker.
+Follows Single Responsibility Principle by keeping worker lifecycle out of the WSGI/ASGI entry points.
+
+Nothing here runs when config.wsgi or config.asgi is imported. Servers
+such as `gunicorn --preload` import the application in a master process
+and fork workers from it. Work done at import time would open database
+connections that every child inherits, and would start threads that do not
+survive the fork. Instead, each process runs its start-up once, on the
+first request it receives, in a background thread, so that request is not
+delayed by the cache warm-up:
+
+- the redirect cache is warmed (LINKS_WARMUP_ON_START)
+- the job scheduler is started (LINKS_SCHEDULER_ENABLED, off by default
+  in favour of the run_scheduler command)
+- the cache invalidation listener is started (LINKS_CACHE_INVALIDATION_BACKEND)
+"""
+
+import logging
+import os
+import threading
+
+from django.core.signals import request_started
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_started_pid = None
+_lock = threading.Lock()
+
+
+def start_worker(**kwargs) -> bool:
+    """
+    Start this process's background work unless it already started.
+    Connected to request_started by start_worker_on_first_request().
+
+    Returns:
+        True if this call started it
+    """
+    global _started_pid
+    pid = os.getpid()
+    if _started_pid == pid:
+        return False
+    with _lock:
+        if _started_pid == pid:
+            return False
+        _started_pid = pid
+    threading.Thread(target=_run, name='links-worker-startup', daemon=True).start()
+    return True
+
+
+def _run() -> None:
+    from .invalidation import get_invalidation_bus
+    from .scheduler import start_scheduler_on_start
+    from .services import warm_up_on_start
+
+    try:
+        get_invalidation_bus()
+        warm_up_on_start()
+        start_scheduler_on_start()
+    except Exception:
+        logger.exception("Worker start-up failed")
+    finally:
+        # Connections are per thread; this one's work is done
+        connections.close_all()
+
+
+def start_worker_on_first_request() -> None:
+    """Run start_worker() in each process when it receives its first request."""
+    request_started.connect(start_worker, dispatch_uid='links-start-worker')
@@ -1,3 +1,1216 @@
-from django.test import TestCase
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections, transaction
+from django.db.models import F
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import checks, health, profiling, qrcodes, transfer
+from .anomaly import RateAnomalyDetector
+from .bot_detection import BotClassifier
+from .cache import RedirectCache, StaleWhileRevalidateCache
+from .dedup import CacheClickDeduplicator, MemoryClickDeduplicator
+from .idempotency import IdempotencyStore
+from .domains import get_domain_resolver
+from .geoip import GeoInfo, GeoIPIndex
+from .models import PRIMARY_DOMAIN_ID, Campaign, CampaignDailyStats, Click, Domain, Link, ScheduledJob, link_cache_key
+from .repositories import ClickRepository, LinkRepository
+from .routing import RequestTraits
+from .scheduler import Scheduler, start_scheduler_on_start
+from .services import container
+from .services.analytics_service import AnalyticsService
+from .services.click_service import ClickService
+from .services.routing_service import RoutingService
+from .sharding import NUM_BUCKETS, bucket_for_slug, get_shard_aliases, shard_for_slug
+from .throttling import AdaptiveConcurrencyLimiter, TokenBucketThrottle
+from .utils import get_client_ip
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RedirectCacheTests(TestCase):
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = RedirectCache(ttl=10, clock=clock)
+        loads = []
+        loader = lambda slug: loads.append(slug) or slug.upper()
+
+        self.assertEqual(cache.get_or_load('abc', loader), 'ABC')
+        clock.now = 9
+        self.assertEqual(cache.get_or_load('abc', loader), 'ABC')
+        self.assertEqual(len(loads), 1)
+        clock.now = 10
+        cache.get_or_load('abc', loader)
+        self.assertEqual(len(loads), 2)
+
+    def test_misses_are_not_cached(self):
+        cache = RedirectCache()
+        self.assertIsNone(cache.get_or_load('abc', lambda slug: None))
+        self.assertEqual(cache.get_or_load('abc', lambda slug: 'found'), 'found')
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        cache = RedirectCache()
+
+        def loader(slug):
+            # The row changes while the old version is being read
+            cache.invalidate(slug)
+            return 'old'
+
+        self.assertEqual(cache.get_or_load('abc', loader), 'old')
+        self.assertNotIn('abc', cache)
+
+
+class LinkInvalidationTests(TestCase):
+    def setUp(self):
+        self.link = Link.objects.create(slug='abc', original_url='https://example.com/old')
+        self.service = container.get('link')
+        self.service.cache.clear()
+        self.service.get_link_by_slug('abc')
+        self.assertIn('abc', self.service.cache)
+
+    def test_edit_drops_the_cached_link(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            link = Link.objects.get(pk=self.link.pk)
+            link.original_url = 'https://example.com/new'
+            link.save()
+        self.assertNotIn('abc', self.service.cache)
+        self.assertEqual(self.service.get_link_by_slug('abc').original_url, 'https://example.com/new')
+
+    def test_delete_drops_the_cached_link(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Link.objects.get(pk=self.link.pk).delete()
+        self.assertIsNone(self.service.get_link_by_slug('abc'))
+        self.assertEqual(self.client.get('/abc/').status_code, 404)
+
+    def test_nothing_is_dropped_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            link = Link.objects.get(pk=self.link.pk)
+            link.original_url = 'https://example.com/new'
+            link.save()
+            self.assertIn('abc', self.service.cache)
+
+
+@skipUnless('shard_1' in get_shard_aliases(), "needs LINKS_SHARDS=default,shard_1")
+class RebalanceShardsTests(TransactionTestCase):
+    databases = '__all__'
+    everything = f'0-{NUM_BUCKETS - 1}'
+
+    def click(self, alias, link, is_bot=False):
+        Click.objects.using(alias).create(short_url=link, ip_address='10.0.0.1', user_agent='ua', is_bot=is_bot)
+        field = 'bot_click_count' if is_bot else 'click_count'
+        Link.objects.using(alias).filter(pk=link.pk).update(
+            **{field: F(field) + 1, 'raw_click_count': F('raw_click_count') + 1}
+        )
+
+    def test_stragglers_are_copied_before_the_source_is_deleted(self):
+        with override_settings(LINKS_SHARD_MAP=[(0, NUM_BUCKETS - 1, 'default')]):
+            source = Link.objects.using('default').create(
+                slug='moved', original_url='https://example.com/', bucket=bucket_for_slug('moved'),
+            )
+            self.click('default', source)
+            self.click('default', source)
+            call_command('rebalance_shards', buckets=self.everything, target='shard_1', settle=0, stdout=io.StringIO())
+
+            # Recorded on the old owner after the copy, before the map switch
+            self.click('default', source)
+            self.click('default', source, is_bot=True)
+
+        with override_settings(LINKS_SHARD_MAP=[(0, NUM_BUCKETS - 1, 'shard_1')]):
+            moved = Link.objects.using('shard_1').get(slug='moved')
+            # Recorded on the new owner after the switch
+            self.click('shard_1', moved)
+            call_command('rebalance_shards', buckets=self.everything, target='shard_1', delete_source=True, stdout=io.StringIO())
+
+        moved.refresh_from_db()
+        self.assertEqual(Click.objects.using('shard_1').filter(short_url=moved).count(), 5)
+        self.assertEqual((moved.click_count, moved.bot_click_count, moved.raw_click_count), (4, 1, 5))
+        self.assertFalse(Link.objects.using('default').exists())
+        self.assertFalse(Click.objects.using('default').exists())
+
+    def test_repeated_copies_do_not_duplicate(self):
+        source = Link.objects.using('default').create(
+            slug='twice', original_url='https://example.com/', bucket=bucket_for_slug('twice'),
+        )
+        self.click('default', source)
+        call_command('rebalance_shards', buckets=self.everything, target='shard_1', settle=0, stdout=io.StringIO())
+        call_command('rebalance_shards', buckets=self.everything, target='shard_1', settle=0, stdout=io.StringIO())
+
+        moved = Link.objects.using('shard_1').get(slug='twice')
+        self.assertEqual(Click.objects.using('shard_1').filter(short_url=moved).count(), 1)
+        self.assertEqual(moved.click_count, 1)
+
+
+class BotClassifierTests(TestCase):
+    def setUp(self):
+        self.classifier = BotClassifier()
+
+    def test_crawlers_and_preview_fetchers_are_bots(self):
+        for user_agent in (
+            'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+            'Mozilla/5.0 (compatible; SomeNewBot; +https://example.com/bot)',
+            'Pinterestbot/1.0 (+http://www.pinterest.com/bot.html)',
+            'WhatsApp/2.23.20.0 A',
+            'facebookexternalhit/1.1',
+            'curl/8.4.0',
+        ):
+            self.assertTrue(self.classifier.is_bot(user_agent), user_agent)
+
+    def test_devices_and_in_app_browsers_are_not_bots(self):
+        for user_agent in (
+            'Mozilla/5.0 (Linux; Android 10; CUBOT X30) AppleWebKit/537.36 (KHTML, like Gecko) '
+            'Chrome/120.0 Mobile Safari/537.36',
+            'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 '
+            '(KHTML, like Gecko) Mobile/15E148 [Pinterest/iOS]',
+            'Mozilla/5.0 (Linux; Android 13) AppleWebKit/537.36 (KHTML, like Gecko) '
+            'Chrome/120.0 Mobile Safari/537.36 WhatsApp/2.23.20.0',
+        ):
+            self.assertFalse(self.classifier.is_bot(user_agent), user_agent)
+
+    def test_empty_user_agent_is_opt_in(self):
+        self.assertFalse(self.classifier.is_bot(''))
+        self.assertTrue(BotClassifier(empty_is_bot=True).is_bot(''))
+
+
+class ClientIPTests(TestCase):
+    def request(self, forwarded_for):
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR=forwarded_for)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(get_client_ip(self.request('1.2.3.4')), '10.0.0.2')
+
+    @override_settings(LINKS_TRUSTED_PROXY_COUNT=1)
+    def test_client_is_the_hop_added_by_the_trusted_proxy(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 203.0.113.7')), '203.0.113.7')
+
+    @override_settings(LINKS_TRUSTED_PROXY_COUNT=2)
+    def test_hops_are_counted_from_the_right(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 203.0.113.7, 10.0.0.9')), '203.0.113.7')
+
+
+class TokenBucketThrottleTests(TestCase):
+    class View:
+        throttle_scope = 'tests-spoofing'
+
+    @override_settings(LINKS_RATE_LIMITS={'tests-spoofing': {'rate': 0.001, 'burst': 2}})
+    def test_rotating_forwarded_for_does_not_reset_the_bucket(self):
+        allowed = [
+            TokenBucketThrottle().allow_request(
+                RequestFactory().get('/', REMOTE_ADDR='10.0.0.3', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}'), self.View(),
+            )
+            for i in range(4)
+        ]
+        self.assertEqual(allowed, [True, True, False, False])
+
+
+class AdaptiveConcurrencyLimiterTests(TestCase):
+    def test_single_threaded_workers_shed_while_latency_exceeds_the_slo(self):
+        draws = iter([0.1, 0.5, 0.9] * 10)
+        limiter = AdaptiveConcurrencyLimiter(slo=0.1, smoothing=1.0, rng=lambda: next(draws))
+        for _ in range(3):
+            self.assertTrue(limiter.try_acquire())
+            limiter.release()
+            limiter.observe(0.05)
+
+        limiter.observe(0.4)  # shed 1 - 0.1 / 0.4 = 75% of requests
+        self.assertTrue(limiter.overloaded())
+        admitted = []
+        for _ in range(3):
+            admitted.append(limiter.try_acquire())
+            if admitted[-1]:
+                limiter.release()
+        self.assertEqual(admitted, [False, False, True])
+
+        limiter.observe(0.05)
+        self.assertFalse(limiter.overloaded())
+        self.assertEqual(limiter.shed_probability(), 0.0)
+
+    def test_some_requests_always_probe_for_recovery(self):
+        limiter = AdaptiveConcurrencyLimiter(slo=0.1, smoothing=1.0, max_shed=0.9, rng=lambda: 0.95)
+        limiter.observe(100.0)
+        self.assertTrue(limiter.try_acquire())
+
+
+def count_links():
+    return sum(Link.objects.using(alias).count() for alias in get_shard_aliases())
+
+
+class IdempotencyTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+
+    def shorten(self, url, key, ip='203.0.113.7'):
+        return self.client.post(
+            '/api/shorten/', {'original_url': url}, content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key, REMOTE_ADDR=ip,
+        )
+
+    def test_retries_replay_the_first_response(self):
+        first = self.shorten('https://example.com/a', 'k1')
+        retry = self.shorten('https://example.com/a', 'k1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json()['slug'], first.json()['slug'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(count_links(), 1)
+
+    def test_key_reused_with_a_different_body_conflicts(self):
+        self.shorten('https://example.com/a', 'k1')
+        self.assertEqual(self.shorten('https://example.com/b', 'k1').status_code, 422)
+        self.assertEqual(count_links(), 1)
+
+    def test_keys_are_scoped_to_the_client(self):
+        mine = self.shorten('https://example.com/a', 'k1', ip='203.0.113.7')
+        theirs = self.shorten('https://example.com/a', 'k1', ip='198.51.100.9')
+        self.assertNotIn('Idempotent-Replayed', theirs)
+        self.assertNotEqual(mine.json()['slug'], theirs.json()['slug'])
+        self.assertEqual(count_links(), 2)
+
+    def test_waiter_takes_over_a_key_released_by_a_failed_owner(self):
+        store = IdempotencyStore(wait_timeout=5.0)
+        owner_started, owner_failed = threading.Event(), threading.Event()
+
+        def fail():
+            owner_started.set()
+            owner_failed.wait()
+            raise RuntimeError('owner crashed')
+
+        def owner():
+            # A separate store stands in for another worker process
+            with self.assertRaises(RuntimeError):
+                IdempotencyStore().execute('k1', 'fp', fail, scope='client')
+
+        thread = threading.Thread(target=owner)
+        thread.start()
+        owner_started.wait()
+        threading.Timer(0.2, owner_failed.set).start()
+        self.assertEqual(store.execute('k1', 'fp', lambda: (201, {'slug': 'x'}), scope='client'), (201, {'slug': 'x'}, False))
+        thread.join()
+
+    def test_a_cache_the_workers_do_not_share_is_reported(self):
+        self.assertEqual([error.id for error in checks.check_idempotency_cache(None)], ['links.W001'])
+
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1',
+        }}
+        with override_settings(CACHES=shared):
+            self.assertEqual(checks.check_idempotency_cache(None), [])
+
+
+class RoutingRulesTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        container.get('link').cache.clear()
+        container.get('routing').route_cache.clear()
+        self.slug = self.client.post(
+            '/api/shorten/', {'original_url': 'https://example.com/'}, content_type='application/json',
+        ).json()['slug']
+        self.staff = User.objects.create_user('staff', is_staff=True)
+
+    def put_rules(self, rules):
+        return self.client.put(
+            f'/api/links/{self.slug}/rules/', {'rules': rules}, content_type='application/json',
+        )
+
+    def test_anonymous_and_non_staff_writes_are_refused(self):
+        rules = [{'destination': 'https://attacker.example.com/'}]
+        self.assertIn(self.put_rules(rules).status_code, (401, 403))
+        self.client.force_login(User.objects.create_user('someone'))
+        self.assertEqual(self.put_rules(rules).status_code, 403)
+        self.assertEqual(self.client.get(f'/api/links/{self.slug}/rules/').json()['rules'], [])
+        self.assertEqual(self.client.get(f'/{self.slug}/')['Location'], 'https://example.com/')
+
+    @override_settings(LINKS_RATE_LIMITS={'shorten': {'rate': 0.001, 'burst': 1}, 'analytics': {'rate': 0.001, 'burst': 10}})
+    def test_reading_rules_does_not_use_the_shorten_quota(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.assertEqual(self.client.get(f'/api/links/{self.slug}/rules/', REMOTE_ADDR='192.0.2.42').status_code, 200)
+        response = self.client.put(
+            f'/api/links/{self.slug}/rules/', {'rules': []}, content_type='application/json', REMOTE_ADDR='192.0.2.42',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_traffic_is_split_by_weight(self):
+        self.client.force_login(self.staff)
+        response = self.put_rules([
+            {'destination': 'https://a.example.com/', 'weight': 1},
+            {'destination': 'https://b.example.com/', 'weight': 3},
+        ])
+        self.assertEqual(response.status_code, 200)
+
+        routing = container.get('routing')
+        link = container.get('link').get_link_by_slug(self.slug)
+        routes = routing.route_cache.get_or_compile(link, routing.repository.get_rows_for_link)
+        traits = RequestTraits(RequestFactory().get('/'), routing.device_classifier)
+        draws = iter(i / 1000 for i in range(1000))
+        chosen = [routes.choose(traits, lambda: next(draws)) for _ in range(1000)]
+        self.assertEqual(chosen.count('https://a.example.com/'), 250)
+        self.assertEqual(chosen.count('https://b.example.com/'), 750)
+
+    def test_rule_changes_reach_workers_holding_the_old_version(self):
+        self.assertEqual(self.client.get(f'/{self.slug}/')['Location'], 'https://example.com/')
+        self.assertIn(self.slug, container.get('link').cache)
+
+        # Another worker's service: its caches are not the ones serving redirects here
+        link = LinkRepository.get_by_slug(self.slug)
+        with self.captureOnCommitCallbacks(using=shard_for_slug(self.slug), execute=True):
+            RoutingService().replace_rules(link, [{'destination': 'https://new.example.com/'}])
+
+        self.assertEqual(self.client.get(f'/{self.slug}/')['Location'], 'https://new.example.com/')
+
+
+@skipUnless(qrcodes.segno, "needs segno")
+class QRCodeCacheTests(TestCase):
+    class EvictingCache(qrcodes.QRCodeCache):
+        """Another process evicts the file right after each of the first `races` lookups."""
+
+        def __init__(self, directory, races):
+            super().__init__(directory)
+            self.races = races
+
+        def get_or_render(self, options):
+            path = super().get_or_render(options)
+            if self.races:
+                self.races -= 1
+                os.unlink(path)
+            return path
+
+    options = qrcodes.QRCodeOptions(data='https://example.com/abc', fmt='svg', size=128, error='M', border=4)
+
+    def test_file_evicted_before_open_is_rendered_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.EvictingCache(directory, races=1).open_rendering(self.options) as handle:
+                self.assertEqual(handle.read(), qrcodes.render_qr_code(self.options))
+
+    def test_persistent_eviction_falls_back_to_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = self.EvictingCache(directory, races=qrcodes.QRCodeCache.OPEN_ATTEMPTS)
+            self.assertEqual(cache.open_rendering(self.options).read(), qrcodes.render_qr_code(self.options))
+
+    def test_requests_never_scan_the_cache_directory(self):
+        scans = []
+
+        class RecordingCache(qrcodes.QRCodeCache):
+            def _scan(self):
+                scans.append(threading.current_thread().name)
+                return super()._scan()
+
+        with tempfile.TemporaryDirectory() as directory:
+            size = len(qrcodes.render_qr_code(self.options))
+            cache = RecordingCache(directory, max_bytes=size * 3)
+            for i in range(8):
+                cache.open_rendering(self.options._replace(data=f'https://example.com/{i}')).close()
+                evictor = cache._evictor
+                if evictor is not None:
+                    evictor.join()
+            files = [name for _, _, names in os.walk(directory) for name in names]
+
+        self.assertTrue(scans)
+        self.assertNotIn(threading.current_thread().name, scans)
+        self.assertLessEqual(len(files), 3)
+
+
+@skipUnless(health.aiohttp, "needs aiohttp")
+class HealthCheckerTests(TestCase):
+    def test_private_and_loopback_targets_are_not_probed(self):
+        urls = ['http://127.0.0.1:9/', 'http://10.1.2.3/', 'http://[::1]:9/', 'http://169.254.169.254/', 'http://localhost:9/']
+        results = health.HealthChecker().check(urls)
+        self.assertEqual({url: result.status for url, result in results.items()}, dict.fromkeys(urls, health.BLOCKED))
+
+    def test_time_queued_for_a_host_slot_does_not_count_against_the_timeout(self):
+        async def slow_origin(reader, writer):
+            await reader.readuntil(b'\r\n\r\n')
+            await asyncio.sleep(0.3)
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def probe_all():
+            server = await asyncio.start_server(slow_origin, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            checker = health.HealthChecker(per_host=1, timeout=0.5, allow_private=True)
+            async with server:
+                return await checker.check_async(f'http://127.0.0.1:{port}/{i}' for i in range(4))
+
+        results = asyncio.run(probe_all())
+        self.assertEqual([result.status for result in results.values()], [health.OK] * 4)
+
+    def test_a_slow_host_does_not_starve_the_others(self):
+        loop_time = []
+
+        def origin(delay, served):
+            async def handle(reader, writer):
+                await reader.readuntil(b'\r\n\r\n')
+                await asyncio.sleep(delay)
+                served.append(asyncio.get_running_loop().time())
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+                writer.close()
+            return handle
+
+        async def probe_all(slow_served, fast_served):
+            slow = await asyncio.start_server(origin(0.3, slow_served), '127.0.0.1', 0)
+            fast = await asyncio.start_server(origin(0, fast_served), '127.0.0.2', 0)
+            slow_port, fast_port = slow.sockets[0].getsockname()[1], fast.sockets[0].getsockname()[1]
+            checker = health.HealthChecker(concurrency=2, per_host=1, timeout=5, allow_private=True)
+            urls = [f'http://127.0.0.1:{slow_port}/{i}' for i in range(5)] + [f'http://127.0.0.2:{fast_port}/']
+            loop_time.append(asyncio.get_running_loop().time())
+            async with slow, fast:
+                return await checker.check_async(urls)
+
+        slow_served, fast_served = [], []
+        results = asyncio.run(probe_all(slow_served, fast_served))
+        self.assertEqual({result.status for result in results.values()}, {health.OK})
+        # Served while the slow host is still working through its queue, not after it
+        self.assertLess(fast_served[0], slow_served[1])
+        self.assertLess(fast_served[0] - loop_time[0], 0.3)
+
+
+class ImportLinksTests(TestCase):
+    databases = '__all__'
+
+    CSV = (
+        'slug,original_url,created_at,click_count,bot_click_count,raw_click_count,expires_at,max_clicks,campaign,domain\n'
+        'good1,https://example.com/1,2020-01-02T03:04:05Z,7,1,9,,,,\n'
+        'bad/slug,https://example.com/2,,,,,,,,\n'
+        'good2,not a url,,,,,,,,\n'
+        'good3,https://example.com/3,,x,,,,,,\n'
+        'good4,https://example.com/4,2021-06-07T08:09:10Z,0,0,0,,,,\n'
+    )
+
+    def import_csv(self, text, **kwargs):
+        errors = []
+        rows = transfer.read_rows(io.BytesIO(text.encode('utf-8')), transfer.CSV)
+        result = transfer.import_links(rows, on_error=lambda number, detail: errors.append((number, sorted(detail))), **kwargs)
+        return result, errors
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        result, errors = self.import_csv(self.CSV, batch_size=2)
+        self.assertEqual(result, {'processed': 5, 'invalid': 3})
+        self.assertEqual(errors, [(2, ['slug']), (3, ['original_url']), (4, ['click_count'])])
+        self.assertEqual(count_links(), 2)
+
+    def test_exported_created_at_is_stored_by_the_insert(self):
+        with CaptureQueriesContext(connections[shard_for_slug('good1')]) as queries:
+            self.import_csv(self.CSV)
+        link = LinkRepository.get_by_slug('good1')
+        self.assertEqual(link.created_at.isoformat(), '2020-01-02T03:04:05+00:00')
+        self.assertEqual((link.click_count, link.bot_click_count, link.raw_click_count), (7, 1, 9))
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+    def test_links_inserted_concurrently_are_skipped_instead_of_aborting_the_batch(self):
+        Link.objects.using(shard_for_slug('good1')).create(slug='good1', original_url='https://example.com/other')
+        result, _ = self.import_csv(self.CSV)
+        self.assertEqual(result['processed'], 5)
+        self.assertEqual(count_links(), 2)
+        self.assertEqual(LinkRepository.get_by_slug('good1').original_url, 'https://example.com/other')
+
+    def test_update_overwrites_existing_links_and_drops_them_from_the_cache(self):
+        self.import_csv(self.CSV)
+        service = container.get('link')
+        self.assertEqual(service.get_link_by_slug('good1').original_url, 'https://example.com/1')
+
+        changed = self.CSV.replace('https://example.com/1,2020-01-02T03:04:05Z', 'https://example.com/new,2019-01-01T00:00:00Z')
+        with self.captureOnCommitCallbacks(using=shard_for_slug('good1'), execute=True):
+            self.import_csv(changed, on_conflict=transfer.UPDATE)
+
+        self.assertEqual(count_links(), 2)
+        link = service.get_link_by_slug('good1')
+        self.assertEqual(link.original_url, 'https://example.com/new')
+        self.assertEqual(link.created_at.isoformat(), '2019-01-01T00:00:00+00:00')
+
+
+class ManualExecutor:
+    """Holds submitted refreshes until the test runs them."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append((fn, args))
+
+    def run_all(self):
+        jobs, self.jobs = self.jobs, []
+        for fn, args in jobs:
+            fn(*args)
+
+
+class StaleWhileRevalidateCacheTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.executor = ManualExecutor()
+        self.computed = []
+
+    def compute(self, value):
+        return lambda: self.computed.append(value) or value
+
+    def test_outdated_result_is_served_while_it_is_refreshed(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, executor=self.executor, clock=self.clock)
+        self.assertEqual(cache.get('k', 1, self.compute('v1'), lambda: 1), 'v1')
+        self.assertEqual(cache.get('k', 1, self.compute('unused'), lambda: 1), 'v1')
+
+        self.assertEqual(cache.get('k', 2, self.compute('v2'), lambda: 2), 'v1')
+        self.assertEqual(self.computed, ['v1'])
+        self.executor.run_all()
+        self.assertEqual(cache.get('k', 2, self.compute('unused'), lambda: 2), 'v2')
+        self.assertEqual(self.computed, ['v1', 'v2'])
+
+    def test_result_outdated_for_longer_than_max_stale_is_recomputed_by_the_reader(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, executor=self.executor, clock=self.clock)
+        cache.get('k', 1, self.compute('v1'), lambda: 1)
+        cache.get('k', 2, self.compute('v2'), lambda: 2)
+        self.clock.now = 60
+        self.assertEqual(cache.get('k', 2, self.compute('v2'), lambda: 2), 'v2')
+
+    def test_uncacheable_results_are_not_kept_and_replace_older_ones(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, executor=self.executor, cacheable=lambda value: len(value) <= 2)
+        cache.get('k', 1, self.compute('ab'), lambda: 1)
+        self.assertEqual(len(cache), 1)
+        cache.get('k', 2, self.compute('abc'), lambda: 2)
+        self.executor.run_all()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get('k', 2, self.compute('abc'), lambda: 2), 'abc')
+        self.assertEqual(len(cache), 0)
+
+
+class AnalyticsResultCacheTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.link = LinkRepository.create('https://example.com/', 'cached')
+        with self.settings(LINKS_ANALYTICS_CACHE_MAX_STALE=0):
+            self.service = AnalyticsService()
+
+    def click(self):
+        ClickRepository.create(self.link, '203.0.113.7', 'Mozilla/5.0')
+        LinkRepository.increment_counters(self.link, 'click_count', 'raw_click_count')
+
+    def test_new_clicks_outdate_the_cached_details(self):
+        self.click()
+        self.assertEqual(self.service.get_analytics_data(self.link)['total_clicks'], 1)
+        self.click()
+        data = self.service.get_analytics_data(self.link)
+        self.assertEqual((data['total_clicks'], len(data['clicks'])), (2, 2))
+
+    @override_settings(LINKS_ANALYTICS_CACHE_MAX_ROWS=1)
+    def test_details_over_the_row_cap_are_not_cached(self):
+        self.click()
+        self.service.get_analytics_data(self.link)
+        self.assertEqual(len(self.service.result_cache), 1)
+        self.click()
+        self.assertEqual(self.service.get_analytics_data(self.link)['total_clicks'], 2)
+        self.assertEqual(len(self.service.result_cache), 0)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class DomainSlugResolutionTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.brand = Domain.objects.create(host='brand.example.com')
+        get_domain_resolver().invalidate()
+        container.get('link').cache.clear()
+        LinkRepository.create('https://primary.example.com/', 'same')
+        LinkRepository.create('https://brand.example.com/landing', 'same', domain_id=self.brand.pk)
+
+    def test_each_host_resolves_the_slug_in_its_own_keyspace(self):
+        self.assertEqual(self.client.get('/same/', HTTP_HOST='sho.rt')['Location'], 'https://primary.example.com/')
+        self.assertEqual(
+            self.client.get('/same/', HTTP_HOST='Brand.Example.com:443')['Location'], 'https://brand.example.com/landing',
+        )
+        cache = container.get('link').cache
+        self.assertIn(link_cache_key(PRIMARY_DOMAIN_ID, 'same'), cache)
+        self.assertIn(link_cache_key(self.brand.pk, 'same'), cache)
+
+    def test_slug_missing_from_a_domain_is_not_found_there(self):
+        LinkRepository.create('https://primary.example.com/only', 'only')
+        self.assertEqual(self.client.get('/only/', HTTP_HOST='brand.example.com').status_code, 404)
+
+    def test_authenticated_api_callers_select_the_keyspace_with_the_domain_parameter(self):
+        self.client.force_login(User.objects.create_user('analyst'))
+        response = self.client.get('/api/analytics/same/?domain=brand.example.com', HTTP_HOST='sho.rt')
+        self.assertEqual(response.json()['original_url'], 'https://brand.example.com/landing')
+
+    def test_domain_parameter_is_ignored_for_anonymous_requests_and_redirects(self):
+        response = self.client.get('/api/analytics/same/?domain=brand.example.com', HTTP_HOST='sho.rt')
+        self.assertEqual(response.json()['original_url'], 'https://primary.example.com/')
+        self.client.force_login(User.objects.create_user('analyst'))
+        response = self.client.get('/same/?domain=brand.example.com', HTTP_HOST='sho.rt')
+        self.assertEqual(response['Location'], 'https://primary.example.com/')
+
+    def test_links_shortened_on_a_branded_host_belong_to_its_domain(self):
+        response = self.client.post(
+            '/api/shorten/', {'original_url': 'https://example.com/x'}, content_type='application/json',
+            HTTP_HOST='brand.example.com',
+        )
+        self.assertEqual(response.json()['domain_id'], self.brand.pk)
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, slug, event):
+        self.events.append(event)
+
+
+class ClickStreamTests(TestCase):
+    databases = '__all__'
+
+    def test_published_total_is_the_stored_count_not_the_cached_one(self):
+        LinkRepository.create('https://example.com/', 'stream')
+        broker = RecordingBroker()
+        worker_a = ClickService(broker=broker)
+        worker_b = ClickService(broker=broker)
+        # Each worker holds its own cached instance of the link
+        link_a, link_b = LinkRepository.get_by_slug('stream'), LinkRepository.get_by_slug('stream')
+        factory = RequestFactory()
+
+        with self.captureOnCommitCallbacks(using=shard_for_slug('stream'), execute=True):
+            for i in range(2):
+                worker_b.record_click(link_b, factory.get('/', HTTP_USER_AGENT=f'Mozilla/5.0 b{i}'))
+            worker_a.record_click(link_a, factory.get('/', HTTP_USER_AGENT='Mozilla/5.0 a'))
+
+        self.assertEqual([event['total_clicks'] for event in broker.events], [1, 2, 3])
+
+
+class RateAnomalyDetectorTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.detector = RateAnomalyDetector(
+            bucket_seconds=10, half_life=60, threshold=4.0, min_clicks=10,
+            warmup_buckets=3, idle_timeout=600, clock=self.clock,
+        )
+
+    def click_bucket(self, clicks, slug='spike'):
+        anomalies = [self.detector.observe(slug) for _ in range(clicks)]
+        self.clock.now += 10
+        return [anomaly for anomaly in anomalies if anomaly is not None]
+
+    def test_launch_traffic_of_a_new_link_is_not_flagged(self):
+        self.assertEqual(self.click_bucket(50), [])
+        self.assertEqual(self.detector.recent(), [])
+
+    def test_spike_is_flagged_once_per_bucket_after_warm_up(self):
+        for _ in range(5):
+            self.assertEqual(self.click_bucket(2), [])
+        anomalies = self.click_bucket(40)
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual(anomalies[0].clicks, 10)
+        self.assertGreater(anomalies[0].score, 4.0)
+        self.assertEqual(self.detector.recent('spike'), anomalies)
+
+        # The spike raised the average and variance, so repeating it is no longer unusual
+        self.assertEqual(self.click_bucket(40), [])
+
+    def test_baseline_decays_and_idle_links_are_forgotten(self):
+        for _ in range(5):
+            self.click_bucket(20)
+        expected = self.detector.rate('spike')['expected']
+        # Two half-lives without clicks
+        self.clock.now += 120
+        self.assertAlmostEqual(self.detector.rate('spike')['expected'], expected / 4, delta=0.01)
+
+        self.clock.now += 600
+        self.detector.observe('other')
+        self.assertIsNone(self.detector.rate('spike'))
+        self.assertEqual(len(self.detector), 1)
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.runs = []
+        self.crashed, self.standby = Scheduler(owner='crashed'), Scheduler(owner='standby')
+        for scheduler in (self.crashed, self.standby):
+            self.job = scheduler.register('sweep', 60, lambda: self.runs.append(1), lease=0.2)
+
+    def test_an_expired_lease_is_taken_over(self):
+        # The owner claims the run and dies before finishing it
+        self.assertIsNotNone(self.crashed._claim(self.job))
+        self.assertFalse(self.standby.run_job('sweep'))
+
+        time.sleep(0.25)
+        self.assertTrue(self.standby.run_job('sweep'))
+        self.assertEqual(self.runs, [1])
+        job = ScheduledJob.objects.get(name='sweep')
+        self.assertEqual((job.owner, job.locked_until, job.run_count), ('', None, 1))
+
+    def test_a_process_that_lost_the_claim_waits_without_querying(self):
+        self.assertTrue(self.crashed.run_job('sweep'))
+        self.assertFalse(self.standby.run_job('sweep'))
+        with self.assertNumQueries(0):
+            self.assertFalse(self.standby.run_job('sweep'))
+            self.assertFalse(self.crashed.run_job('sweep'))
+
+    def test_web_workers_do_not_start_a_scheduler_by_default(self):
+        self.assertIsNone(start_scheduler_on_start())
+
+
+class ClickDeduplicationTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeats_are_suppressed_within_a_sliding_window(self):
+        clock = FakeClock()
+        deduplicator = MemoryClickDeduplicator(window=10, clock=clock)
+        self.assertFalse(deduplicator.is_repeat('abc', '203.0.113.7', 'ua'))
+        clock.now = 5
+        self.assertTrue(deduplicator.is_repeat('abc', '203.0.113.7', 'ua'))
+        self.assertFalse(deduplicator.is_repeat('abc', '203.0.113.8', 'ua'))
+        self.assertFalse(deduplicator.is_repeat('xyz', '203.0.113.7', 'ua'))
+        clock.now = 16
+        self.assertFalse(deduplicator.is_repeat('abc', '203.0.113.7', 'ua'))
+
+    def test_cache_backend_is_shared_by_every_deduplicator(self):
+        self.assertFalse(CacheClickDeduplicator(10).is_repeat('abc', '203.0.113.7', 'ua'))
+        self.assertTrue(CacheClickDeduplicator(10).is_repeat('abc', '203.0.113.7', 'ua'))
+
+    def test_repeats_only_count_as_raw_clicks(self):
+        link = LinkRepository.create('https://example.com/', 'dedup')
+        service = ClickService(deduplicator=MemoryClickDeduplicator(window=10), broker=RecordingBroker())
+        request = RequestFactory().get('/', HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='203.0.113.7')
+
+        self.assertIsNotNone(service.record_click(link, request))
+        self.assertIsNone(service.record_click(link, request))
+
+        counts = Link.objects.using(shard_for_slug('dedup')).values_list('click_count', 'raw_click_count').get()
+        self.assertEqual(counts, (1, 2))
+        self.assertEqual(Click.objects.using(shard_for_slug('dedup')).count(), 1)
+
+    @override_settings(LINKS_CLICK_DEDUP_BACKEND='cache', LINKS_CLICK_DEDUP_WINDOW=10)
+    def test_a_cache_backend_the_workers_do_not_share_is_reported(self):
+        self.assertEqual([error.id for error in checks.check_click_dedup_cache(None)], ['links.W002'])
+        with override_settings(LINKS_CLICK_DEDUP_BACKEND='memory'):
+            self.assertEqual(checks.check_click_dedup_cache(None), [])
+
+
+class ColumnarAnalyticsTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        segment_dir = override_settings(LINKS_SEGMENT_DIR=self.directory)
+        segment_dir.enable()
+        self.addCleanup(segment_dir.disable)
+        # Default services built by earlier tests hold engines over other directories
+        container.reset()
+        self.addCleanup(container.reset)
+
+    def add_clicks(self, slug, count, expires_at=None):
+        link = LinkRepository.create('https://example.com/', slug, expires_at=expires_at)
+        clicks = Click.objects.using(shard_for_slug(slug))
+        base = timezone.now() - timedelta(days=1)
+        for i in range(count):
+            click = clicks.create(
+                short_url=link, ip_address=f'198.51.100.{i}', user_agent=f'ua{i % 2}', referrer='https://ref/' * (i % 2),
+            )
+            clicks.filter(pk=click.pk).update(timestamp=base + timedelta(minutes=i))
+        return link
+
+    def segments(self, link):
+        service = container.get('analytics')
+        return service.engine.snapshot(shard_for_slug(link.slug))[0]
+
+    def test_click_details_of_compacted_clicks_come_from_segments(self):
+        link = self.add_clicks('details', 4)
+        before = AnalyticsService().get_analytics_data(link)
+        self.assertEqual(container.get('analytics').compact_clicks(delay=0), 4)
+        self.add_clicks('other', 1)
+        clicks = Click.objects.using(shard_for_slug('details'))
+        tail = clicks.create(short_url=link, ip_address='203.0.113.9', user_agent='tail')
+
+        # Only the tail click is still read from the Click table
+        with CaptureQueriesContext(connections[shard_for_slug('details')]) as queries:
+            after = AnalyticsService().get_analytics_data(link)
+        self.assertEqual(len([query for query in queries if 'links_click' in query['sql']]), 1)
+        self.assertEqual(after['total_clicks'], 5)
+        self.assertEqual(after['clicks'][0]['user_agent'], 'tail')
+        self.assertEqual(after['clicks'][1:], before['clicks'])
+
+        tail.delete()
+        self.assertEqual(AnalyticsService().get_analytics_data(link, exclude_bots=True), before)
+
+    def test_backfilled_countries_reach_compacted_clicks(self):
+        link = self.add_clicks('geo', 3)
+        container.get('analytics').compact_clicks(delay=0)
+        database = os.path.join(self.directory, 'geoip.csv')
+        with open(database, 'w') as handle:
+            handle.write('198.51.100.0,198.51.100.1,DE,64500\n')
+
+        call_command('backfill_geoip', database=database, stdout=io.StringIO())
+
+        breakdown = AnalyticsService().get_geo_breakdown(link)
+        self.assertEqual(breakdown['countries'], [{'country': 'DE', 'clicks': 2}, {'country': None, 'clicks': 1}])
+        self.assertEqual(breakdown['asns'], [{'asn': 64500, 'clicks': 2}, {'asn': None, 'clicks': 1}])
+        self.assertEqual(len(os.listdir(os.path.join(self.directory, shard_for_slug('geo')))), 2)
+
+    def test_swept_links_are_removed_from_segments(self):
+        expired = self.add_clicks('gone', 3, expires_at=timezone.now() - timedelta(hours=1))
+        kept = self.add_clicks('kept', 2)
+        engine = container.get('analytics').engine
+        container.get('analytics').compact_clicks(delay=0)
+        self.assertEqual(engine.count(self.segments(expired), expired.pk), 3)
+
+        self.assertEqual(container.get('link').sweep_expired_links(), 1)
+
+        self.assertEqual(engine.count(self.segments(expired), expired.pk), 0)
+        self.assertEqual(engine.count(self.segments(kept), kept.pk), 2)
+        self.assertEqual(AnalyticsService().get_analytics_data(kept)['total_clicks'], 2)
+
+
+def add_click(link, **fields):
+    fields.setdefault('ip_address', '203.0.113.7')
+    return Click.objects.using(shard_for_slug(link.slug)).create(short_url=link, **fields)
+
+
+class BatchAnalyticsTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        for i in range(12):
+            link = LinkRepository.create('https://example.com/', f'batch{i}')
+            for _ in range(i % 3):
+                add_click(link)
+
+    def summarize(self, slugs):
+        captures = [CaptureQueriesContext(connections[alias]) for alias in get_shard_aliases()]
+        for capture in captures:
+            capture.__enter__()
+        try:
+            response = self.client.post('/api/analytics/batch/', {'slugs': slugs}, content_type='application/json')
+        finally:
+            for capture in captures:
+                capture.__exit__(None, None, None)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), sum(len(capture) for capture in captures)
+
+    def test_query_count_does_not_grow_with_the_number_of_slugs(self):
+        slugs = [f'batch{i}' for i in range(12)]
+        # The first request also loads the domain table
+        self.summarize(slugs[:1])
+        one_per_shard = list({shard_for_slug(slug): slug for slug in slugs}.values())
+        _, few_queries = self.summarize(one_per_shard)
+
+        many, many_queries = self.summarize(slugs + ['missing'])
+        self.assertEqual(many_queries, few_queries)
+        self.assertEqual([row['total_clicks'] for row in many['results']], [i % 3 for i in range(12)])
+        self.assertEqual(many['not_found'], ['missing'])
+
+
+class FastRenderingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        container.reset('analytics')
+        self.addCleanup(container.reset, 'analytics')
+        link = LinkRepository.create('https://example.com/path?q=1', 'fast')
+        add_click(link, user_agent='Mozilla/5.0', referrer='https://ref.example/')
+        add_click(link, ip_address='2001:db8::1', user_agent='curl/8.0')
+        LinkRepository.create('https://example.org/', 'fast2')
+
+    def get_both(self, path, method='get', **kwargs):
+        responses = []
+        for fast in (True, False):
+            with override_settings(LINKS_FAST_RENDERING=fast):
+                response = getattr(self.client, method)(path, **kwargs)
+            self.assertEqual(response.status_code, 200, response.content)
+            responses.append(response.json())
+        return responses
+
+    def test_fast_responses_match_the_serializer_output(self):
+        for path in ('/api/links/', '/api/analytics/fast/'):
+            fast, serialized = self.get_both(path)
+            self.assertEqual(fast, serialized, path)
+        fast, serialized = self.get_both(
+            '/api/analytics/batch/', method='post', data={'slugs': ['fast', 'fast2']}, content_type='application/json',
+        )
+        self.assertEqual(fast, serialized)
+        self.assertEqual(fast['results'][0]['total_clicks'], 2)
+
+
+class GeoIPTests(TestCase):
+    databases = '__all__'
+
+    CSV = (
+        'start_ip,end_ip,country,asn\n'
+        '198.51.100.0,198.51.100.127,de,AS64500\n'
+        '3325256832,3325256959,FR,\n'
+        '2001:db8::,2001:db8::ffff,NL,64501\n'
+    )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.database = os.path.join(self.directory, 'geoip.csv')
+        with open(self.database, 'w') as handle:
+            handle.write(self.CSV)
+        self.index = GeoIPIndex.from_csv(self.database)
+
+    def test_addresses_resolve_to_the_range_containing_them(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.lookup('198.51.100.0'), GeoInfo('DE', 64500))
+        self.assertEqual(self.index.lookup('198.51.100.127'), GeoInfo('DE', 64500))
+        # 3325256832 is 198.51.100.128 in integer notation
+        self.assertEqual(self.index.lookup('198.51.100.128'), GeoInfo('FR', None))
+        self.assertEqual(self.index.lookup('198.51.100.255'), GeoInfo('FR', None))
+        self.assertIsNone(self.index.lookup('198.51.101.0'))
+        self.assertEqual(self.index.lookup('2001:db8::abcd'), GeoInfo('NL', 64501))
+        self.assertEqual(self.index.lookup('::ffff:198.51.100.5'), GeoInfo('DE', 64500))
+        self.assertIsNone(self.index.lookup('2001:db9::1'))
+        self.assertIsNone(self.index.lookup('not an address'))
+
+    def test_clicks_are_enriched_when_recorded(self):
+        link = LinkRepository.create('https://example.com/', 'geoclick')
+        service = ClickService(geoip=self.index, broker=RecordingBroker())
+        click = service.record_click(link, RequestFactory().get('/', REMOTE_ADDR='2001:db8::1'))
+        self.assertEqual((click.country, click.asn), ('NL', 64501))
+
+    def test_backfill_tags_untagged_clicks_only_unless_all(self):
+        link = LinkRepository.create('https://example.com/', 'backfill')
+        untagged = add_click(link, ip_address='198.51.100.1')
+        tagged = add_click(link, ip_address='198.51.100.2', country='US')
+        unknown = add_click(link, ip_address='192.0.2.1')
+
+        output = io.StringIO()
+        call_command('backfill_geoip', database=self.database, stdout=output)
+        clicks = Click.objects.using(shard_for_slug('backfill'))
+        self.assertEqual(clicks.values_list('country', 'asn').get(pk=untagged.pk), ('DE', 64500))
+        self.assertEqual(clicks.values_list('country', flat=True).get(pk=tagged.pk), 'US')
+        self.assertEqual(clicks.values_list('country', flat=True).get(pk=unknown.pk), '')
+        self.assertIn('scanned 2 clicks, tagged 1', output.getvalue())
+
+        call_command('backfill_geoip', database=self.database, all=True, stdout=io.StringIO())
+        self.assertEqual(clicks.values_list('country', flat=True).get(pk=tagged.pk), 'DE')
+
+
+class ExpirySweeperTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.expired = LinkRepository.create('https://example.com/', 'expired', expires_at=self.now - timedelta(minutes=1))
+        self.exhausted = LinkRepository.create('https://example.com/', 'exhausted', max_clicks=1)
+        self.live = LinkRepository.create('https://example.com/', 'live', expires_at=self.now + timedelta(days=1), max_clicks=5)
+        for link in (self.expired, self.exhausted, self.live):
+            add_click(link)
+        Link.objects.using(shard_for_slug('exhausted')).filter(slug='exhausted').update(click_count=1)
+
+    def test_expired_and_exhausted_links_are_deleted_in_batches_with_their_clicks(self):
+        archived = []
+        service = container.get('link')
+        deleted = service.sweep_expired_links(
+            batch_size=1, archive=lambda kind, rows: archived.extend((kind, row['id']) for row in rows), now=self.now,
+        )
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(count_links(), 1)
+        self.assertIsNotNone(LinkRepository.get_by_slug('live'))
+        self.assertEqual(
+            sorted(kind for kind, _ in archived), ['click', 'click', 'link', 'link'],
+        )
+        for link in (self.expired, self.exhausted):
+            self.assertFalse(Click.objects.using(shard_for_slug(link.slug)).filter(short_url_id=link.pk).exists())
+        self.assertTrue(Click.objects.using(shard_for_slug('live')).filter(short_url=self.live).exists())
+
+    def test_expired_links_stop_redirecting_before_the_sweep(self):
+        self.assertEqual(self.client.get('/expired/').status_code, 410)
+        self.assertEqual(self.client.get('/live/').status_code, 302)
+
+    def test_swept_links_are_dropped_from_the_redirect_cache(self):
+        service = container.get('link')
+        self.assertIsNotNone(service.get_link_by_slug('exhausted'))
+        service.sweep_expired_links(now=self.now)
+        self.assertEqual(self.client.get('/exhausted/').status_code, 404)
+
+
+class ProfilingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_store_caps_stacks_and_merges_process_files(self):
+        store = profiling.ProfileStore(self.directory, max_stacks=2)
+        store.add('redirect', profiling.CPU, Counter({'a;b': 3, 'a;c': 1}))
+        store.add('redirect', profiling.CPU, Counter({'a;b': 1, 'a;d': 2}))
+        store.flush()
+        # Another worker process's file for the same view
+        with open(os.path.join(self.directory, 'redirect.cpu.99999.collapsed'), 'w') as handle:
+            handle.write('a;c 5\n')
+
+        self.assertEqual(store.read('redirect'), 'a;c 6\na;b 4\n[other] 2\n')
+        self.assertEqual(
+            [(entry['url_name'], entry['kind'], entry['files']) for entry in store.available()], [('redirect', 'cpu', 2)]
+        )
+        self.assertIsNone(store.read('analytics'))
+
+    def test_files_past_retention_are_removed(self):
+        store = profiling.ProfileStore(self.directory, retention=60)
+        store.add('redirect', profiling.CPU, Counter({'a': 1}))
+        store.flush()
+        path = os.path.join(self.directory, f'redirect.cpu.{os.getpid()}.collapsed')
+        os.utime(path, (time.time() - 120, time.time() - 120))
+        self.assertEqual(store.available(), [])
+        self.assertFalse(os.path.exists(path))
+
+    def test_sampler_records_the_stacks_of_the_profiled_thread(self):
+        sampler = profiling.StackSampler(interval=0.001)
+        sampler.begin()
+        deadline = time.monotonic() + 0.1
+        while time.monotonic() < deadline:
+            pass
+        stacks = sampler.end()
+        self.assertTrue(stacks)
+        self.assertTrue(all(stack.endswith('links/tests.py:test_sampler_records_the_stacks_of_the_profiled_thread') for stack in stacks))
+
+    def test_sampled_requests_are_profiled_per_url_name(self):
+        profiling._default_store = None
+        self.addCleanup(setattr, profiling, '_default_store', None)
+        LinkRepository.create('https://example.com/', 'profiled')
+        with override_settings(
+            LINKS_PROFILING_ENABLED=True, LINKS_PROFILING_SAMPLE_RATE=2, LINKS_PROFILING_FLUSH_EVERY=1,
+            LINKS_PROFILING_VIEWS=['redirect'], LINKS_PROFILING_DIR=self.directory,
+        ):
+            for _ in range(4):
+                self.client.get('/profiled/')
+            self.client.get('/api/links/')
+
+        files = sorted(os.listdir(self.directory))
+        self.assertEqual(files, [f'redirect.cpu.{os.getpid()}.collapsed'])
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 200)
+
+
+class SyntheticTrafficTests(TestCase):
+    databases = '__all__'
+
+    def generate(self, **options):
+        output = io.StringIO()
+        call_command('synthetic_traffic', 'generate', batch_size=7, seed=1, stdout=output, **options)
+        return output.getvalue()
+
+    def test_generated_counters_match_the_inserted_clicks(self):
+        output = self.generate(links=20, clicks=300, bot_ratio=0.2, days=3)
+
+        self.assertIn('Created 20 links', output)
+        self.assertEqual(count_links(), 20)
+        links = [link for alias in get_shard_aliases() for link in Link.objects.using(alias)]
+        self.assertEqual(sum(link.raw_click_count for link in links), 300)
+        for link in links:
+            clicks = Click.objects.using(shard_for_slug(link.slug)).filter(short_url_id=link.pk)
+            self.assertEqual(link.click_count, clicks.filter(is_bot=False).count())
+            self.assertEqual(link.bot_click_count, clicks.filter(is_bot=True).count())
+            self.assertEqual(link.raw_click_count, link.click_count + link.bot_click_count)
+        oldest = min(
+            Click.objects.using(alias).order_by('timestamp').first().timestamp
+            for alias in get_shard_aliases() if Click.objects.using(alias).exists()
+        )
+        self.assertLess(oldest, timezone.now() - timedelta(hours=1))
+
+    def test_clicks_are_skewed_towards_the_top_ranked_links(self):
+        self.generate(links=50, clicks=2000, zipf=1.5, days=0)
+
+        counts = sorted(
+            (link.raw_click_count for alias in get_shard_aliases() for link in Link.objects.using(alias)), reverse=True,
+        )
+        # With exponent 1.5 the top link takes about a third of all clicks
+        self.assertGreater(counts[0], 2000 / 5)
+        self.assertLess(counts[-1], counts[0] / 20)
+
+    def test_replay_needs_links(self):
+        with self.assertRaisesMessage(CommandError, 'synthetic_traffic generate'):
+            call_command('synthetic_traffic', 'replay', duration=0.1, stdout=io.StringIO())
+
+
+class SyntheticReplayTests(TransactionTestCase):
+    # The replay clients run in threads, which only see committed rows
+    databases = '__all__'
+
+    def test_replay_reports_each_request_kind(self):
+        call_command('synthetic_traffic', 'generate', links=5, clicks=50, days=0, seed=1, stdout=io.StringIO())
+        output = io.StringIO()
+        call_command(
+            'synthetic_traffic', 'replay', rps=200, duration=0.1, concurrency=1, mix='redirect=1,shorten=1',
+            seed=1, stdout=output,
+        )
+
+        report = output.getvalue()
+        self.assertIn('Sent 20 requests', report)
+        self.assertRegex(report, r'redirect\s+\d+ .* 302=\d+')
+        self.assertRegex(report, r'shorten\s+\d+ .* 201=\d+')
+        self.assertGreater(count_links(), 5)
+
+
+class CampaignCounterTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.campaign = container.get('campaign').get_or_create_campaign('spring')
+        self.link = LinkRepository.create('https://example.com/', 'spring-sale', campaign_id=self.campaign.pk)
+        self.factory = RequestFactory()
+
+    def click(self, user_agent='Mozilla/5.0 (X11; Linux x86_64) Firefox/130.0'):
+        return ClickService().record_click(self.link, self.factory.get('/', HTTP_USER_AGENT=user_agent))
+
+    def counters(self):
+        self.campaign.refresh_from_db()
+        return self.campaign.click_count, self.campaign.bot_click_count, self.campaign.raw_click_count
+
+    def test_counters_are_updated_once_the_click_commits(self):
+        with self.captureOnCommitCallbacks(using=shard_for_slug(self.link.slug)) as callbacks:
+            self.click()
+            self.click('Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)')
+            self.assertEqual(self.counters(), (0, 0, 0))
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.counters(), (1, 1, 2))
+        daily = CampaignDailyStats.objects.get(campaign=self.campaign)
+        self.assertEqual(daily.day, timezone.now().date())
+        self.assertEqual((daily.click_count, daily.bot_click_count, daily.raw_click_count), (1, 1, 2))
+
+    def test_rolled_back_clicks_are_not_counted(self):
+        with self.captureOnCommitCallbacks(using=shard_for_slug(self.link.slug), execute=True):
+            with self.assertRaises(ZeroDivisionError), transaction.atomic(using=shard_for_slug(self.link.slug)):
+                self.click()
+                1 / 0
+        self.assertEqual(self.counters(), (0, 0, 0))
+        self.assertFalse(CampaignDailyStats.objects.exists())
+
+    def test_redirects_count_towards_the_campaign_report(self):
+        with self.captureOnCommitCallbacks(using=shard_for_slug(self.link.slug), execute=True):
+            self.assertEqual(self.client.get('/spring-sale/', HTTP_USER_AGENT='Mozilla/5.0 Firefox/130.0').status_code, 302)
+
+        stats = container.get('campaign').get_campaign_stats(Campaign.objects.get(pk=self.campaign.pk))
+        self.assertEqual((stats['click_count'], stats['raw_click_count'], stats['link_count']), (1, 1, 1))
+        self.assertEqual(stats['daily'][-1]['click_count'], 1)
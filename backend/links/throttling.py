@@ -0,0 +1,293 @@
+"""
+Rate limiting and load shedding for the links API.
+Follows Single Responsibility Principle by keeping admission control out of views.
+
+- TokenBucketThrottle: DRF throttle keyed by client IP (see
+  utils.get_client_ip for which proxies are trusted) and endpoint scope.
+  Buckets live in Redis (one atomic Lua script per check) when
+  LINKS_RATE_LIMIT_REDIS_URL is set, otherwise in a bounded per-process store.
+- LoadSheddingMiddleware: admission control for low-priority endpoints
+  (analytics, shortening). While the observed latency exceeds the SLO it
+  rejects a share of them that grows with the overload, and it caps how
+  many run at once, so redirects keep their capacity under overload.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Tuple
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+from .cache import LRUCache
+from .utils import get_client_ip
+
+
+class LocalBucketStore:
+    """
+    Per-process token buckets guarded by a lock.
+    Memory is bounded by evicting the least recently used client keys.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        """
+        Initialize LocalBucketStore.
+
+        Args:
+            max_keys: Maximum number of buckets kept
+        """
+        self._buckets = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Try to take tokens from a bucket.
+
+        Args:
+            key: Bucket key
+            rate: Tokens added per second
+            burst: Bucket capacity
+            cost: Tokens required
+
+        Returns:
+            Tuple of (allowed, seconds until enough tokens are available)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets.set(key, (tokens, now))
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+class RedisBucketStore:
+    """
+    Token buckets shared by every worker, updated atomically inside Redis.
+    """
+
+    SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, client):
+        """
+        Initialize RedisBucketStore.
+
+        Args:
+            client: redis-py client
+        """
+        self._script = client.register_script(self.SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Try to take tokens from a bucket.
+
+        Args:
+            key: Bucket key
+            rate: Tokens added per second
+            burst: Bucket capacity
+            cost: Tokens required
+
+        Returns:
+            Tuple of (allowed, seconds until enough tokens are available)
+        """
+        allowed, tokens = self._script(keys=[f'links:bucket:{key}'], args=[burst, rate, cost])
+        if allowed:
+            return True, 0.0
+        return False, (cost - float(tokens)) / rate
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    """
+    Get the process-wide bucket store.
+    Uses Redis when LINKS_RATE_LIMIT_REDIS_URL is set.
+
+    Returns:
+        LocalBucketStore or RedisBucketStore
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                url = getattr(settings, 'LINKS_RATE_LIMIT_REDIS_URL', None)
+                if url:
+                    import redis
+
+                    _default_store = RedisBucketStore(redis.Redis.from_url(url))
+                else:
+                    _default_store = LocalBucketStore(getattr(settings, 'LINKS_RATE_LIMIT_MAX_KEYS', 100000))
+    return _default_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle keyed by client IP and the view's `throttle_scope`.
+    Limits come from LINKS_RATE_LIMITS: {scope: {'rate': per_second, 'burst': n}}.
+    Views without a scope, or scopes without a limit, are not throttled.
+    """
+
+    def __init__(self):
+        self._wait = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        limit = getattr(settings, 'LINKS_RATE_LIMITS', {}).get(scope)
+        if not limit:
+            return True
+
+        key = f"{scope}:{get_client_ip(request)}"
+        allowed, self._wait = get_bucket_store().take(key, float(limit['rate']), int(limit['burst']))
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Latency-driven admission control.
+    While the latency EWMA exceeds the SLO, requests are rejected with a
+    probability that grows with the overload (1 - slo / latency, at most
+    max_shed, so some requests keep probing for recovery). This works even
+    on single-threaded workers, where at most one request is ever in flight.
+    On top of that, an AIMD concurrency limit grows by one per healthy
+    request and is cut multiplicatively on every SLO breach.
+    """
+
+    def __init__(self, slo: float, min_limit: int = 1, max_limit: int = 100,
+                 backoff: float = 0.9, smoothing: float = 0.2, max_shed: float = 0.95,
+                 rng: Callable[[], float] = random.random):
+        """
+        Initialize AdaptiveConcurrencyLimiter.
+
+        Args:
+            slo: Target latency in seconds
+            min_limit: Lowest concurrency limit
+            max_limit: Highest concurrency limit
+            backoff: Multiplier applied to the limit on an SLO breach
+            smoothing: EWMA weight of the newest latency sample
+            max_shed: Highest share of requests rejected for latency
+            rng: Source of uniform numbers in [0, 1)
+        """
+        self.slo = slo
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.max_shed = max_shed
+        self.limit = float(max_limit)
+        self.latency = 0.0
+        self.in_flight = 0
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    def shed_probability(self) -> float:
+        """Share of requests currently rejected because of latency."""
+        if not self.overloaded():
+            return 0.0
+        return min(self.max_shed, 1.0 - self.slo / self.latency)
+
+    def try_acquire(self) -> bool:
+        """Admit a request if the latency and the current limit allow it."""
+        shed = self.shed_probability()
+        if shed and self._rng() < shed:
+            return False
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Release a slot without recording latency."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe(self, latency: float) -> None:
+        """
+        Record a completed request's latency and adapt the limit.
+
+        Args:
+            latency: Seconds the request took
+        """
+        with self._lock:
+            self.latency += self.smoothing * (latency - self.latency)
+            if self.latency > self.slo:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1)
+
+    def overloaded(self) -> bool:
+        """Return True while the latency EWMA exceeds the SLO."""
+        return self.latency > self.slo
+
+
+class LoadSheddingMiddleware:
+    """
+    Sheds low-priority requests before redirects when latency exceeds the SLO.
+    Every routed request feeds the latency signal; only URL names listed in
+    LINKS_LOW_PRIORITY_VIEWS are subject to the adaptive limit and receive
+    503 responses with Retry-After when shed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.low_priority = set(getattr(settings, 'LINKS_LOW_PRIORITY_VIEWS', ()))
+        self.unmeasured = set(getattr(settings, 'LINKS_UNMEASURED_VIEWS', ()))
+        self.limiter = AdaptiveConcurrencyLimiter(
+            slo=getattr(settings, 'LINKS_LATENCY_SLO_MS', 250) / 1000.0,
+            max_limit=getattr(settings, 'LINKS_LOW_PRIORITY_MAX_CONCURRENCY', 100),
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        started = getattr(request, '_links_shed_started', None)
+        if started is not None:
+            if getattr(request, '_links_shed_slot', False):
+                self.limiter.release()
+            if not response.streaming:
+                self.limiter.observe(time.monotonic() - started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if url_name in self.unmeasured:
+            return None
+
+        if url_name in self.low_priority:
+            if not self.limiter.try_acquire():
+                response = JsonResponse(
+                    {"detail": "Service is under heavy load. Please retry shortly."},
+                    status=503,
+                )
+                response['Retry-After'] = '1'
+                return response
+            request._links_shed_slot = True
+
+        request._links_shed_started = time.monotonic()
+        return None
@@ -0,0 +1,396 @@
+"""
+Streaming bulk export and import of links with their click totals.
+Follows Single Responsibility Principle by keeping bulk data movement out of views and commands.
+
+Export walks every shard in primary-key order with a chunked iterator
+(a server-side cursor on PostgreSQL), so memory stays flat however many
+links exist, and encodes rows as CSV, NDJSON or Parquet chunk by chunk.
+Campaigns and domains are exported by name and host, since ids differ
+between environments.
+
+Import reads the same formats incrementally and validates every row with
+LinkImportRowSerializer; invalid rows are reported and skipped instead of
+aborting the import. Each batch is grouped by the shard owning the slug
+and inserted with one bulk_create per shard, either skipping (domain, slug)
+pairs that already exist or overwriting them in the same statement.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .domains import get_domain_resolver, normalize_host
+from .invalidation import get_invalidation_bus
+from .models import PRIMARY_DOMAIN_ID, Link
+from .repositories import CampaignRepository, DomainRepository
+from .serializers import LinkImportRowSerializer
+from .sharding import bucket_for_slug, get_shard_aliases, shard_for_slug
+from .utils import format_datetime
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+PARQUET = 'parquet'
+FORMATS = (CSV, NDJSON, PARQUET)
+
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    NDJSON: 'application/x-ndjson',
+    PARQUET: 'application/vnd.apache.parquet',
+}
+
+# Exported columns, in order
+FIELDS = (
+    'slug', 'original_url', 'created_at', 'click_count', 'bot_click_count',
+    'raw_click_count', 'expires_at', 'max_clicks', 'campaign', 'domain',
+)
+DATETIME_FIELDS = ('created_at', 'expires_at')
+INTEGER_FIELDS = ('click_count', 'bot_click_count', 'raw_click_count', 'max_clicks')
+
+# Overwritten on conflict by import_links(on_conflict='update'), created_at included
+UPDATE_FIELDS = (
+    'original_url', 'created_at', 'click_count', 'bot_click_count',
+    'raw_click_count', 'expires_at', 'max_clicks', 'campaign_id',
+)
+
+SKIP = 'skip'
+UPDATE = 'update'
+
+
+def available_formats() -> List[str]:
+    """Formats whose encoder is installed."""
+    return [fmt for fmt in FORMATS if fmt != PARQUET or pyarrow is not None]
+
+
+def _campaign_names() -> Dict[int, str]:
+    return {campaign.pk: campaign.name for campaign in CampaignRepository.get_all()}
+
+
+def _domain_hosts() -> Dict[int, str]:
+    return dict(DomainRepository.get_rows())
+
+
+def iter_link_rows(chunk_size: int = None) -> Iterator[Dict]:
+    """
+    Yield every link as an export row, shard by shard in primary-key order.
+
+    Args:
+        chunk_size: Rows fetched per database round trip (defaults to LINKS_EXPORT_CHUNK_SIZE)
+
+    Yields:
+        Dictionaries with the FIELDS keys
+    """
+    chunk_size = chunk_size or getattr(settings, 'LINKS_EXPORT_CHUNK_SIZE', 2000)
+    campaigns = _campaign_names()
+    domains = _domain_hosts()
+    columns = [field for field in FIELDS if field not in ('campaign', 'domain')] + ['campaign_id', 'domain_id']
+    for alias in get_shard_aliases():
+        rows = Link.objects.using(alias).order_by('pk').values(*columns).iterator(chunk_size=chunk_size)
+        for row in rows:
+            campaign_id = row.pop('campaign_id')
+            row['campaign'] = campaigns.get(campaign_id) if campaign_id is not None else None
+            # Primary-domain links export an empty host
+            row['domain'] = domains.get(row.pop('domain_id'))
+            yield row
+
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _encode_csv(chunks) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow([
+                format_datetime(row[field]) if field in DATETIME_FIELDS else row[field]
+                for field in FIELDS
+            ])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _encode_ndjson(chunks) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            row = {field: format_datetime(row[field]) if field in DATETIME_FIELDS else row[field] for field in FIELDS}
+            lines.append(orjson.dumps(row) if orjson is not None else json.dumps(row).encode('utf-8'))
+        yield b'\n'.join(lines) + b'\n'
+
+
+class _DrainableSink:
+    """Write-only file object whose buffered bytes are handed out as they are produced."""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_schema():
+    timestamp = pyarrow.timestamp('us', tz='UTC')
+    return pyarrow.schema([
+        ('slug', pyarrow.string()),
+        ('original_url', pyarrow.string()),
+        ('created_at', timestamp),
+        ('click_count', pyarrow.int64()),
+        ('bot_click_count', pyarrow.int64()),
+        ('raw_click_count', pyarrow.int64()),
+        ('expires_at', timestamp),
+        ('max_clicks', pyarrow.int64()),
+        ('campaign', pyarrow.string()),
+        ('domain', pyarrow.string()),
+    ])
+
+
+def _encode_parquet(chunks) -> Iterator[bytes]:
+    # Parquet is written front to back (footer last), so each row group can be sent as it is encoded
+    schema = _parquet_schema()
+    sink = _DrainableSink()
+    writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode='w'), schema, compression='zstd')
+    try:
+        for chunk in chunks:
+            columns = [pyarrow.array([row[field] for row in chunk], type=schema.field(field).type) for field in FIELDS]
+            writer.write_batch(pyarrow.record_batch(columns, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_links(fmt: str, rows: Iterable[Dict] = None, chunk_size: int = None) -> Iterator[bytes]:
+    """
+    Encode links incrementally.
+
+    Args:
+        fmt: CSV, NDJSON or PARQUET
+        rows: Rows to encode (defaults to every link, see iter_link_rows)
+        chunk_size: Rows per encoded piece (and per Parquet row group)
+
+    Returns:
+        Iterator of encoded byte strings
+
+    Raises:
+        ValueError: If the format is unknown or its encoder is not installed
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format: {fmt}")
+    chunk_size = chunk_size or getattr(settings, 'LINKS_EXPORT_CHUNK_SIZE', 2000)
+    if rows is None:
+        rows = iter_link_rows(chunk_size)
+    chunks = _chunks(rows, chunk_size)
+    if fmt == CSV:
+        return _encode_csv(chunks)
+    if fmt == NDJSON:
+        return _encode_ndjson(chunks)
+    return _encode_parquet(chunks)
+
+
+def read_rows(handle, fmt: str, chunk_size: int = None) -> Iterator[Dict]:
+    """
+    Decode exported rows from a binary file object.
+
+    Args:
+        handle: File opened in binary mode
+        fmt: CSV, NDJSON or PARQUET
+        chunk_size: Rows decoded at once from Parquet files
+
+    Yields:
+        Dictionaries with string, integer, datetime or None values, to be
+        validated with LinkImportRowSerializer
+
+    Raises:
+        ValueError: If the format is unknown or its decoder is not installed
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported import format: {fmt}")
+    if fmt == PARQUET:
+        parquet = pyarrow.parquet.ParquetFile(handle)
+        for batch in parquet.iter_batches(batch_size=chunk_size or 10000):
+            yield from batch.to_pylist()
+        return
+
+    text = io.TextIOWrapper(handle, encoding='utf-8', newline='')
+    if fmt == CSV:
+        for row in csv.DictReader(text):
+            yield _coerce(row)
+    else:
+        for line in text:
+            if line.strip():
+                yield _coerce(orjson.loads(line) if orjson is not None else json.loads(line))
+
+
+def _coerce(row: Dict) -> Dict:
+    """Turn the empty strings CSV uses for missing values into None; values are parsed on validation."""
+    for field in DATETIME_FIELDS + INTEGER_FIELDS + ('campaign', 'domain'):
+        if row.get(field) == '':
+            row[field] = None
+    return row
+
+
+def import_links(
+    rows: Iterable[Dict],
+    on_conflict: str = SKIP,
+    batch_size: int = None,
+    progress=None,
+    on_error: Callable[[int, Dict], None] = None,
+) -> Dict[str, int]:
+    """
+    Validate exported rows and write them with one bulk_create per shard and batch.
+
+    Args:
+        rows: Rows as produced by read_rows or iter_link_rows
+        on_conflict: SKIP keeps existing links with the same domain and slug, UPDATE overwrites them
+        batch_size: Rows per batch (defaults to LINKS_IMPORT_BATCH_SIZE)
+        progress: Optional callable receiving the number of rows processed so far
+        on_error: Optional callable receiving the 1-based number and the validation
+            errors of every invalid row, which is skipped
+
+    Returns:
+        Dictionary with the number of rows 'processed' and of those 'invalid'
+
+    Raises:
+        ValueError: If on_conflict is not SKIP or UPDATE
+    """
+    if on_conflict not in (SKIP, UPDATE):
+        raise ValueError(f"on_conflict must be '{SKIP}' or '{UPDATE}'")
+    batch_size = batch_size or getattr(settings, 'LINKS_IMPORT_BATCH_SIZE', 5000)
+    campaign_ids: Dict[str, int] = {}
+    domain_ids: Dict[str, int] = {}
+
+    processed = invalid = 0
+    for chunk in _chunks(rows, batch_size):
+        # The last row wins when a (domain, slug) repeats within a batch
+        by_key = {}
+        for number, row in enumerate(chunk, start=processed + 1):
+            serializer = LinkImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                invalid += 1
+                if on_error is not None:
+                    on_error(number, serializer.errors)
+                continue
+            link = _build_link(serializer.validated_data, campaign_ids, domain_ids)
+            by_key[link.domain_id, link.slug] = link
+        by_shard: Dict[str, List[Link]] = {}
+        for link in by_key.values():
+            by_shard.setdefault(shard_for_slug(link.slug), []).append(link)
+        for alias, links in by_shard.items():
+            _write_batch(alias, links, on_conflict, batch_size)
+        processed += len(chunk)
+        if progress is not None:
+            progress(processed)
+    return {'processed': processed, 'invalid': invalid}
+
+
+def _write_batch(alias: str, links: List[Link], on_conflict: str, batch_size: int) -> None:
+    """
+    Insert the links of one shard in one statement per batch, letting the
+    database resolve (domain, slug) conflicts so a concurrent insert of the
+    same slug never aborts the batch: SKIP ignores them, UPDATE overwrites
+    the existing row. created_at is a plain default, so the exported values
+    are stored as given by the insert itself.
+    """
+    queryset = Link.objects.using(alias)
+    with transaction.atomic(using=alias):
+        if on_conflict == UPDATE:
+            queryset.bulk_create(
+                links,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['domain_id', 'slug'],
+                update_fields=UPDATE_FIELDS,
+            )
+            # Conflict updates send no signals; drop the old versions from every worker
+            keys = [link.cache_key for link in links]
+            transaction.on_commit(lambda: _publish_all(keys), using=alias)
+        else:
+            queryset.bulk_create(links, batch_size=batch_size, ignore_conflicts=True)
+
+
+def _publish_all(keys: List[str]) -> None:
+    bus = get_invalidation_bus()
+    for key in keys:
+        bus.publish(key)
+
+
+def _build_link(row: Dict, campaign_ids: Dict[str, int], domain_ids: Dict[str, int]) -> Link:
+    name: Optional[str] = row.get('campaign')
+    campaign_id = None
+    if name:
+        if name not in campaign_ids:
+            campaign_ids[name] = CampaignRepository.get_or_create(name).pk
+        campaign_id = campaign_ids[name]
+    host: Optional[str] = row.get('domain')
+    domain_id = PRIMARY_DOMAIN_ID
+    if host:
+        host = normalize_host(host)
+        if host not in domain_ids:
+            domain_ids[host] = DomainRepository.get_or_create(host).pk
+            get_domain_resolver().invalidate()
+        domain_id = domain_ids[host]
+    created_at: Optional[datetime] = row.get('created_at') or timezone.now()
+    return Link(
+        slug=row['slug'],
+        original_url=row['original_url'],
+        bucket=bucket_for_slug(row['slug']),
+        created_at=created_at,
+        click_count=row.get('click_count') or 0,
+        bot_click_count=row.get('bot_click_count') or 0,
+        raw_click_count=row.get('raw_click_count') or 0,
+        expires_at=row.get('expires_at'),
+        max_clicks=row.get('max_clicks'),
+        campaign_id=campaign_id,
+        domain_id=domain_id,
+    )
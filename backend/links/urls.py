@@ -1,9 +1,21 @@
 from django.urls import path
-from .views import LinkCreateAPIView, RedirectAPIView, AnalyticsAPIView , LinkListAPIView
+from .views import LinkCreateAPIView, RedirectAPIView, AnalyticsAPIView , LinkListAPIView, BatchAnalyticsAPIView, ClickStreamView, GeoAnalyticsAPIView, TimeseriesAnalyticsAPIView, ProfileListAPIView, ProfileDownloadAPIView, RoutingRulesAPIView, QRCodeAPIView, CampaignListAPIView, CampaignStatsAPIView, LinkExportAPIView, AnomalyListAPIView
 
 urlpatterns = [
     path('api/shorten/', LinkCreateAPIView.as_view(), name='shorten'),
     path('api/links/', LinkListAPIView.as_view(), name='links-list'),
+    path('api/links/export/', LinkExportAPIView.as_view(), name='links-export'),
+    path('api/links/<slug:slug>/qr/', QRCodeAPIView.as_view(), name='link-qr'),
+    path('api/links/<slug:slug>/rules/', RoutingRulesAPIView.as_view(), name='link-rules'),
     path('<slug:slug>/', RedirectAPIView.as_view(), name='redirect'),
+    path('api/campaigns/', CampaignListAPIView.as_view(), name='campaigns-list'),
+    path('api/campaigns/<slug:name>/', CampaignStatsAPIView.as_view(), name='campaign-stats'),
+    path('api/analytics/batch/', BatchAnalyticsAPIView.as_view(), name='analytics-batch'),
     path('api/analytics/<slug:slug>/', AnalyticsAPIView.as_view(), name='analytics'),
+    path('api/analytics/<slug:slug>/geo/', GeoAnalyticsAPIView.as_view(), name='analytics-geo'),
+    path('api/analytics/<slug:slug>/timeseries/', TimeseriesAnalyticsAPIView.as_view(), name='analytics-timeseries'),
+    path('api/analytics/<slug:slug>/stream/', ClickStreamView.as_view(), name='analytics-stream'),
+    path('api/anomalies/', AnomalyListAPIView.as_view(), name='anomalies'),
+    path('api/profiles/', ProfileListAPIView.as_view(), name='profiles'),
+    path('api/profiles/<slug:url_name>/', ProfileDownloadAPIView.as_view(), name='profile-download'),
 ]
@@ -5,17 +5,23 @@ Follows Single Responsibility Principle by grouping related utilities.
 
 import string
 import random
+from datetime import datetime
+from typing import Optional
+from django.conf import settings
 from django.db import models
 from django.http import HttpRequest
+from django.utils import timezone
+from .models import PRIMARY_DOMAIN_ID
 
 
-def generate_unique_slug(length: int = 6, repository=None) -> str:
+def generate_unique_slug(length: int = 6, repository=None, domain_id: int = PRIMARY_DOMAIN_ID) -> str:
     """
-    Generate a unique slug for a link.
+    Generate a slug that is unused within a domain's keyspace.
     
     Args:
         length: Length of the slug (default: 6)
         repository: Optional LinkRepository instance for checking slug existence
+        domain_id: Domain the slug is for (default: the primary domain)
         
     Returns:
         Unique slug string
@@ -28,16 +34,20 @@ def generate_unique_slug(length: int = 6, repository=None) -> str:
     
     for _ in range(max_attempts):
         slug = ''.join(random.choices(chars, k=length))
-        if not repository.slug_exists(slug):
+        if not repository.slug_exists(slug, domain_id):
             return slug
     
     # If we couldn't generate a unique slug in max_attempts, increase length
-    return generate_unique_slug(length + 1, repository)
+    return generate_unique_slug(length + 1, repository, domain_id)
 
 
 def get_client_ip(request: HttpRequest) -> str:
     """
     Extract client IP address from request.
+    X-Forwarded-For is only trusted as far as LINKS_TRUSTED_PROXY_COUNT
+    reverse proxies append to it: the client is the hop added by the
+    outermost trusted proxy, counted from the right, because everything to
+    its left was sent by the client and can be forged.
     
     Args:
         request: The HTTP request object
@@ -45,10 +55,30 @@ def get_client_ip(request: HttpRequest) -> str:
     Returns:
         Client IP address as string
     """
+    proxies = getattr(settings, 'LINKS_TRUSTED_PROXY_COUNT', 0)
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        # Get the first IP in the chain (original client)
-        ip = x_forwarded_for.split(',')[0].strip()
-    else:
-        ip = request.META.get('REMOTE_ADDR', '')
-    return ip
+    if proxies and x_forwarded_for:
+        hops = [hop.strip() for hop in x_forwarded_for.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def format_datetime(value: Optional[datetime]) -> Optional[str]:
+    """
+    Format a datetime exactly as DRF's DateTimeField renders it.
+    
+    Args:
+        value: Datetime to format (aware or naive)
+        
+    Returns:
+        ISO 8601 string with a 'Z' suffix for UTC, or None
+    """
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    representation = value.isoformat()
+    if representation.endswith('+00:00'):
+        representation = representation[:-6] + 'Z'
+    return representation
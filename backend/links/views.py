@@ -7,17 +7,77 @@ Follows SOLID principles:
 
 from rest_framework.views import APIView
 from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views import View
 
-from .models import Link
-from .serializers import LinkSerializer, AnalyticsSerializer
-from .services import get_default_services
-from .exceptions import LinkNotFoundError
+from .models import Link, link_cache_key
+from .serializers import (
+    LinkSerializer,
+    AnalyticsSerializer,
+    AnalyticsQuerySerializer,
+    AnalyticsSummarySerializer,
+    BatchAnalyticsRequestSerializer,
+    CampaignSerializer,
+    CampaignStatsQuerySerializer,
+    QRCodeQuerySerializer,
+    RoutingRuleSerializer,
+    RoutingRulesSerializer,
+    TimeseriesQuerySerializer,
+    LINK_ROW_FIELDS,
+    serialize_link_row,
+)
+from .pubsub import get_click_broker
+from .services import container
+from .anomaly import get_anomaly_detector
+from .domains import get_domain_resolver
+from .exceptions import AnomalyDetectionDisabledError, CampaignNotFoundError, LinkExpiredError, LinkNotFoundError, QRCodeUnavailableError
+from .idempotency import IdempotencyStore, fingerprint_request
+from .profiling import KINDS, get_profile_store
+from .utils import get_client_ip
 
 
-# Get default service instances (can be overridden for testing)
-_link_service, _click_service, _analytics_service = get_default_services()
+# Default services, built on first use and resolved per call (see container.override())
+_link_service = container.proxy('link')
+_click_service = container.proxy('click')
+_analytics_service = container.proxy('analytics')
+_routing_service = container.proxy('routing')
+_campaign_service = container.proxy('campaign')
+_idempotency_store = IdempotencyStore()
+
+
+def _domain_id(request, allow_override: bool = True) -> int:
+    """
+    Domain whose slug keyspace a request addresses: the Host header, or for
+    authenticated API callers the host given as ?domain=. Answered from the
+    in-process domain snapshot, without a query.
+    """
+    host = request.get_host()
+    if allow_override:
+        override = request.GET.get('domain')
+        if override and request.user.is_authenticated:
+            host = override
+    return get_domain_resolver().resolve(host)
+
+
+def _short_url(request, link: Link) -> str:
+    """Absolute short URL of a link, on its own domain."""
+    path = reverse('redirect', args=[link.slug])
+    host = get_domain_resolver().host_for(link.domain_id)
+    if host is None:
+        return request.build_absolute_uri(path)
+    return f"{request.scheme}://{host}{path}"
+
+
+def _fast_rendering_enabled() -> bool:
+    """Whether list and analytics responses bypass DRF serializers."""
+    return getattr(settings, 'LINKS_FAST_RENDERING', True)
 
 
 class LinkListAPIView(generics.ListAPIView):
@@ -30,6 +90,20 @@ class LinkListAPIView(generics.ListAPIView):
     def get_queryset(self):
         """Get queryset using service layer."""
         return _link_service.get_all_links()
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List links, building rows from `.values()` on the fast path.
+        Response schema is identical to the LinkSerializer path.
+        """
+        if not _fast_rendering_enabled():
+            return super().list(request, *args, **kwargs)
+        
+        queryset = _link_service.get_all_link_rows(*LINK_ROW_FIELDS)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response([serialize_link_row(row) for row in queryset])
+        return self.get_paginated_response([serialize_link_row(row) for row in page])
 
 
 class LinkCreateAPIView(generics.CreateAPIView):
@@ -37,8 +111,83 @@ class LinkCreateAPIView(generics.CreateAPIView):
     API view for creating a new shortened link.
     Follows Single Responsibility Principle.
     """
+    throttle_scope = 'shorten'
     serializer_class = LinkSerializer
     queryset = Link.objects.all()
+    
+    IDEMPOTENCY_KEY_MAX_LENGTH = 255
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Create a link, honouring an optional Idempotency-Key header.
+        Retries with the same key replay the first successful response
+        without creating another link.
+        """
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > self.IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {"detail": "Idempotency-Key is too long."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        def create_once():
+            response = super(LinkCreateAPIView, self).create(request, *args, **kwargs)
+            return response.status_code, dict(response.data)
+        
+        # Keys are only unique per client
+        if request.user.is_authenticated:
+            scope = f"user:{request.user.pk}"
+        else:
+            scope = f"ip:{get_client_ip(request)}"
+        status_code, data, replayed = _idempotency_store.execute(
+            key, fingerprint_request(request.data), create_once, scope=scope
+        )
+        response = Response(data, status=status_code)
+        if replayed:
+            response['Idempotent-Replayed'] = 'true'
+        return response
+
+
+class LinkExportAPIView(APIView):
+    """
+    Staff-only API view streaming every link with its click totals.
+    Rows are read with a chunked iterator and encoded piece by piece,
+    so memory use does not grow with the number of links.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= selects the export encoding here, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+    
+    def get(self, request):
+        """
+        Handle GET request to export links.
+        
+        Args:
+            request: HTTP request object (?format=csv|ndjson|parquet, default csv)
+            
+        Returns:
+            Streaming attachment response
+        """
+        # Imported here so the Parquet encoder stays out of worker start-up
+        from . import transfer
+        
+        fmt = request.query_params.get('format', transfer.CSV)
+        if fmt not in transfer.available_formats():
+            return Response(
+                {"detail": f"format must be one of: {', '.join(transfer.available_formats())}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        response = StreamingHttpResponse(
+            transfer.export_links(fmt),
+            content_type=transfer.CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="links.{fmt}"'
+        return response
 
 
 class RedirectAPIView(APIView):
@@ -46,6 +195,7 @@ class RedirectAPIView(APIView):
     API view for redirecting short URLs to original URLs.
     Follows Single Responsibility Principle by delegating to services.
     """
+    throttle_scope = 'redirect'
     
     def get(self, request, slug):
         """
@@ -60,16 +210,154 @@ class RedirectAPIView(APIView):
             
         Raises:
             LinkNotFoundError: If link is not found
+            LinkExpiredError: If link is past its expiry time or click limit
         """
-        # Get link using service layer
-        link = _link_service.get_link_by_slug(slug)
+        # Get link using service layer; a short URL belongs to the host it was requested on
+        link = _link_service.get_link_by_slug(slug, _domain_id(request, allow_override=False))
         if not link:
             raise LinkNotFoundError()
         
+        # Limits are checked on the cached instance, without another query
+        if link.is_expired():
+            raise LinkExpiredError()
+        
+        # Compiled per routing_version; links without rules skip straight to original_url
+        destination = _routing_service.resolve_destination(link, request)
+        
         # Record click using service layer
         _click_service.record_click(link, request)
         
-        return redirect(link.original_url)
+        return redirect(destination)
+
+
+class RoutingRulesAPIView(APIView):
+    """
+    API view for reading and replacing a link's routing rules.
+    Follows Single Responsibility Principle by delegating to services.
+    Rules redirect a link's traffic, so only staff may replace them.
+    """
+    
+    @property
+    def throttle_scope(self):
+        # Reads are throttled like other lookups; only writes draw from the shorten quota
+        return 'shorten' if self.request.method == 'PUT' else 'analytics'
+    
+    def get_permissions(self):
+        if self.request.method == 'PUT':
+            return [IsAdminUser()]
+        return super().get_permissions()
+    
+    def get(self, request, slug):
+        """
+        Handle GET request to list a link's rules in evaluation order.
+        
+        Args:
+            request: HTTP request object
+            slug: Short URL slug
+            
+        Returns:
+            JSON response with the routing version and rules
+            
+        Raises:
+            LinkNotFoundError: If link is not found
+        """
+        link = _link_service.get_link_by_slug(slug, _domain_id(request))
+        if not link:
+            raise LinkNotFoundError()
+        return self._rules_response(link, _routing_service.get_rules(link))
+    
+    def put(self, request, slug):
+        """
+        Handle PUT request replacing every rule of a link (staff only).
+        The new rules apply to the next redirect served by any worker.
+        
+        Args:
+            request: HTTP request with a {"rules": [...]} body
+            slug: Short URL slug
+            
+        Returns:
+            JSON response with the new routing version and rules
+            
+        Raises:
+            LinkNotFoundError: If link is not found
+        """
+        link = _link_service.get_link_by_slug(slug, _domain_id(request))
+        if not link:
+            raise LinkNotFoundError()
+        
+        serializer = RoutingRulesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rules = _routing_service.replace_rules(link, serializer.validated_data['rules'])
+        return self._rules_response(link, rules)
+    
+    def _rules_response(self, link, rules):
+        return Response({
+            'slug': link.slug,
+            'routing_version': link.routing_version,
+            'rules': RoutingRuleSerializer(rules, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class QRCodeAPIView(APIView):
+    """
+    API view returning a QR code for a short link.
+    Renderings are cached on disk by content address and carry strong ETags.
+    """
+    throttle_scope = 'analytics'
+    
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= selects the image type here, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+    
+    def get(self, request, slug):
+        """
+        Handle GET request for a QR code of the short URL.
+        
+        Args:
+            request: HTTP request object (?size=, ?format=png|svg, ?ecc=L|M|Q|H, ?border=)
+            slug: Short URL slug
+            
+        Returns:
+            Image response, or 304 when If-None-Match matches
+            
+        Raises:
+            LinkNotFoundError: If link is not found
+            QRCodeUnavailableError: If QR rendering is not installed
+        """
+        from . import qrcodes
+        
+        link = _link_service.get_link_by_slug(slug, _domain_id(request))
+        if not link:
+            raise LinkNotFoundError()
+        
+        query = QRCodeQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        options = qrcodes.QRCodeOptions(
+            data=_short_url(request, link),
+            fmt=params['format'],
+            size=params['size'],
+            error=params['ecc'],
+            border=params['border'],
+        )
+        etag = f'"{options.key}"'
+        
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            if qrcodes.segno is None:
+                raise QRCodeUnavailableError()
+            content_type = qrcodes.CONTENT_TYPES[options.fmt]
+            cache = qrcodes.get_qr_code_cache()
+            if cache is None:
+                response = HttpResponse(qrcodes.render_qr_code(options), content_type=content_type)
+            else:
+                # Served with the server's file wrapper (sendfile) where available
+                response = FileResponse(cache.open_rendering(options), content_type=content_type)
+        
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'LINKS_QR_MAX_AGE', 86400))
+        return response
 
 
 class AnalyticsAPIView(APIView):
@@ -77,10 +365,12 @@ class AnalyticsAPIView(APIView):
     API view for retrieving analytics data for a link.
     Follows Single Responsibility Principle by delegating to services.
     """
+    throttle_scope = 'analytics'
     
     def get(self, request, slug):
         """
         Handle GET request to retrieve analytics.
+        Pass ?exclude_bots=true to leave out bot and crawler clicks.
         
         Args:
             request: HTTP request object
@@ -93,15 +383,343 @@ class AnalyticsAPIView(APIView):
             LinkNotFoundError: If link is not found
         """
         # Get link using service layer
-        link = _link_service.get_link_by_slug(slug)
+        link = _link_service.get_link_by_slug(slug, _domain_id(request))
         if not link:
             raise LinkNotFoundError()
         
+        query = AnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        
         # Get analytics using service layer
-        analytics_data = _analytics_service.get_analytics_data(link)
+        analytics_data = _analytics_service.get_analytics_data(
+            link, exclude_bots=query.validated_data['exclude_bots']
+        )
+        
+        if _fast_rendering_enabled():
+            # Service output already matches the AnalyticsSerializer schema
+            return Response(analytics_data, status=status.HTTP_200_OK)
         
         # Validate and serialize response
         serializer = AnalyticsSerializer(data=analytics_data)
         serializer.is_valid(raise_exception=True)
         
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+class CampaignListAPIView(generics.ListAPIView):
+    """
+    API view for listing campaigns with their click totals.
+    Follows Single Responsibility Principle.
+    """
+    serializer_class = CampaignSerializer
+    throttle_scope = 'analytics'
+    
+    def get_queryset(self):
+        """Get queryset using service layer."""
+        return _campaign_service.get_all_campaigns()
+
+
+class CampaignStatsAPIView(APIView):
+    """
+    API view for a campaign report: totals plus one bucket per UTC day.
+    Reads the campaign's counter rows only, however many links it has.
+    """
+    throttle_scope = 'analytics'
+    
+    def get(self, request, name):
+        """
+        Handle GET request to retrieve a campaign report.
+        
+        Args:
+            request: HTTP request object (?start=YYYY-MM-DD&end=YYYY-MM-DD)
+            name: Campaign name
+            
+        Returns:
+            JSON response with totals and daily buckets
+            
+        Raises:
+            CampaignNotFoundError: If campaign is not found
+        """
+        campaign = _campaign_service.get_campaign(name)
+        if not campaign:
+            raise CampaignNotFoundError()
+        
+        query = CampaignStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        
+        stats = _campaign_service.get_campaign_stats(
+            campaign,
+            start=query.validated_data.get('start'),
+            end=query.validated_data.get('end'),
+        )
+        return Response(stats, status=status.HTTP_200_OK)
+
+
+class GeoAnalyticsAPIView(APIView):
+    """
+    API view for retrieving country and ASN breakdowns for a link.
+    Follows Single Responsibility Principle by delegating to services.
+    """
+    throttle_scope = 'analytics'
+    
+    def get(self, request, slug):
+        """
+        Handle GET request to retrieve the geo breakdown.
+        
+        Args:
+            request: HTTP request object
+            slug: Short URL slug
+            
+        Returns:
+            JSON response with per-country and per-ASN click counts
+            
+        Raises:
+            LinkNotFoundError: If link is not found
+        """
+        link = _link_service.get_link_by_slug(slug, _domain_id(request))
+        if not link:
+            raise LinkNotFoundError()
+        
+        query = AnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        
+        breakdown = _analytics_service.get_geo_breakdown(
+            link, exclude_bots=query.validated_data['exclude_bots']
+        )
+        return Response(breakdown, status=status.HTTP_200_OK)
+
+
+class TimeseriesAnalyticsAPIView(APIView):
+    """
+    API view for retrieving a link's clicks per minute, hour or day.
+    Follows Single Responsibility Principle by delegating to services.
+    """
+    throttle_scope = 'analytics'
+    
+    def get(self, request, slug):
+        """
+        Handle GET request to retrieve the click timeseries.
+        
+        Args:
+            request: HTTP request object (?interval=minute|hour|day&start=&end=&exclude_bots=)
+            slug: Short URL slug
+            
+        Returns:
+            JSON response with click counts per time bucket
+            
+        Raises:
+            LinkNotFoundError: If link is not found
+        """
+        link = _link_service.get_link_by_slug(slug, _domain_id(request))
+        if not link:
+            raise LinkNotFoundError()
+        
+        query = TimeseriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        
+        timeseries = _analytics_service.get_timeseries(
+            link,
+            interval=params['interval'],
+            start=params.get('start'),
+            end=params.get('end'),
+            exclude_bots=params['exclude_bots'],
+        )
+        return Response(timeseries, status=status.HTTP_200_OK)
+
+
+class BatchAnalyticsAPIView(APIView):
+    """
+    API view for retrieving summary analytics for many links at once.
+    Follows Single Responsibility Principle by delegating to services.
+    """
+    throttle_scope = 'analytics'
+    
+    def post(self, request):
+        """
+        Handle POST request to retrieve analytics for a list of slugs.
+        
+        Args:
+            request: HTTP request object with a "slugs" list in the body
+            
+        Returns:
+            JSON response with per-link summaries and the slugs not found
+        """
+        request_serializer = BatchAnalyticsRequestSerializer(data=request.data)
+        request_serializer.is_valid(raise_exception=True)
+        slugs = list(dict.fromkeys(request_serializer.validated_data['slugs']))
+        
+        # Resolve all slugs in one query, then aggregate clicks in one query
+        links_by_slug = {
+            link.slug: link for link in _link_service.get_links_by_slugs(slugs, _domain_id(request))
+        }
+        found = [links_by_slug[slug] for slug in slugs if slug in links_by_slug]
+        summaries = _analytics_service.get_batch_summary(
+            found, exclude_bots=request_serializer.validated_data['exclude_bots']
+        )
+        
+        if not _fast_rendering_enabled():
+            summaries = AnalyticsSummarySerializer(summaries, many=True).data
+        
+        return Response({
+            "results": summaries,
+            "not_found": [slug for slug in slugs if slug not in links_by_slug],
+        }, status=status.HTTP_200_OK)
+
+
+class ClickStreamView(View):
+    """
+    Server-Sent Events stream of live clicks for a link.
+    Served asynchronously on the ASGI app; events come from the in-process
+    click broker, so connected viewers cost no database reads.
+    """
+    
+    async def get(self, request, slug):
+        """
+        Handle GET request to open a click stream.
+        
+        Args:
+            request: HTTP request object
+            slug: Short URL slug
+            
+        Returns:
+            Streaming text/event-stream response
+            
+        Raises:
+            Http404: If link is not found
+        """
+        domain_id = await sync_to_async(_domain_id)(request)
+        link = await sync_to_async(_link_service.get_link_by_slug)(slug, domain_id)
+        if not link:
+            raise Http404("Link not found.")
+        
+        response = StreamingHttpResponse(
+            self._events(link.cache_key),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    async def _events(self, key):
+        """
+        Yield SSE frames until the client disconnects.
+        
+        Args:
+            key: Cache key of the link (see Link.cache_key)
+            
+        Yields:
+            Encoded SSE frames
+        """
+        broker = get_click_broker()
+        subscription = broker.subscribe(key)
+        heartbeat = getattr(settings, 'LINKS_CLICK_STREAM_HEARTBEAT', 15.0)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                if not await subscription.wait(heartbeat):
+                    # Comment frame keeps proxies from closing idle connections
+                    yield ': keep-alive\n\n'
+                    continue
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield f'event: dropped\ndata: {{"count": {dropped}}}\n\n'
+                for message in subscription.drain():
+                    yield f'event: click\ndata: {message}\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+
+class AnomalyListAPIView(APIView):
+    """
+    Staff-only API view listing click-rate spikes flagged by this process.
+    Served from the in-memory detector; no click rows are read.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """
+        Handle GET request to list recent anomalies.
+        
+        Args:
+            request: HTTP request object (?slug= limits the list to one link
+                and adds its current rate estimate; ?domain= picks its domain)
+            
+        Returns:
+            JSON with recent anomalies, newest first
+            
+        Raises:
+            AnomalyDetectionDisabledError: If LINKS_ANOMALY_ENABLED is off
+        """
+        detector = get_anomaly_detector()
+        if detector is None:
+            raise AnomalyDetectionDisabledError()
+        
+        slug = request.query_params.get('slug') or None
+        if slug is not None:
+            slug = link_cache_key(_domain_id(request), slug)
+        data = {
+            "tracked_links": len(detector),
+            "anomalies": [anomaly.as_dict() for anomaly in detector.recent(slug)],
+        }
+        if slug is not None:
+            data["rate"] = detector.rate(slug)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ProfileListAPIView(APIView):
+    """
+    Staff-only API view listing captured endpoint profiles.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """
+        Handle GET request to list profiles.
+        
+        Returns:
+            JSON list of URL names and kinds with captured stacks
+        """
+        store = get_profile_store()
+        store.flush()
+        return Response(store.available(), status=status.HTTP_200_OK)
+
+
+class ProfileDownloadAPIView(APIView):
+    """
+    Staff-only API view downloading a collapsed-stack profile for one URL name.
+    The file can be fed to flamegraph.pl or opened in speedscope.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, url_name):
+        """
+        Handle GET request to download a profile.
+        
+        Args:
+            request: HTTP request object (?kind=cpu|alloc, default cpu)
+            url_name: URL name the profile was captured for
+            
+        Returns:
+            Plain-text collapsed stacks as an attachment
+            
+        Raises:
+            Http404: If nothing was captured for the URL name and kind
+        """
+        kind = request.query_params.get('kind', KINDS[0])
+        if kind not in KINDS:
+            return Response(
+                {"detail": f"kind must be one of: {', '.join(KINDS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        store = get_profile_store()
+        store.flush()
+        profile = store.read(url_name, kind)
+        if profile is None:
+            raise Http404("No profile captured for this endpoint.")
+        
+        response = HttpResponse(profile, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{url_name}.{kind}.collapsed"'
+        return response
+
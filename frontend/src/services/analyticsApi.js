@@ -4,6 +4,7 @@
  */
 
 import api from "./api";
+import { API_CONFIG } from "../constants/config";
 
 /**
  * Analytics API service
@@ -18,4 +19,28 @@ export const analyticsApi = {
     const response = await api.get(`/api/analytics/${slug}/`);
     return response.data;
   },
+
+  /**
+   * Get summary analytics for many links in one request.
+   * @param {string[]} slugs - The link slugs
+   * @returns {Promise<Object>} Object with `results` and `not_found`
+   */
+  getBatchAnalytics: async (slugs) => {
+    const response = await api.post("/api/analytics/batch/", { slugs });
+    return response.data;
+  },
+
+  /**
+   * Subscribe to live clicks for a link via Server-Sent Events.
+   * @param {string} slug - The link slug
+   * @param {Function} onClick - Called with each click event payload
+   * @returns {Function} Unsubscribe function
+   */
+  subscribeToClicks: (slug, onClick) => {
+    const source = new EventSource(
+      `${API_CONFIG.BASE_URL}/api/analytics/${slug}/stream/`
+    );
+    source.addEventListener("click", (event) => onClick(JSON.parse(event.data)));
+    return () => source.close();
+  },
 };